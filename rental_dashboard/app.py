@@ -18,7 +18,11 @@
 
 
 import streamlit as st
-from database.db import init_db, ensure_vendor_share_columns
+from database.db import init_db
+from database.rollups import start_compactor
+from database.snapshot import start_snapshot_exporter
+from database.archive import start_archiver
+from database.maintenance import start_maintenance
 from modules.rental_form import rental_form
 from modules.rental_view import rental_view
 from modules.client_dashboard import client_dashboard
@@ -27,13 +31,14 @@ from modules.location_view import location_view  # if you use it inside vendor v
 import pandas as pd
 from modules.vendor_share import vendor_share
 from modules.map_view import equipment_map_view
-from database.geo import ensure_geo_columns
 
 # --- App setup ---
 st.set_page_config(page_title="Rental Dashboard", layout="wide")
-init_db()
-ensure_geo_columns()
-ensure_vendor_share_columns()
+init_db()  # runs migrations once per process; later reruns are a no-op
+start_compactor()  # telemetry rollups + retention, one background thread per process
+start_snapshot_exporter()  # columnar snapshots for the analytics pages
+start_archiver()  # moves long-closed requests / finished rentals to the archive tables
+start_maintenance()  # WAL checkpoints, ANALYZE/optimize and incremental vacuum at low priority
 
 # --- Top bar: profile selector (top-left) ---
 if "profile" not in st.session_state:
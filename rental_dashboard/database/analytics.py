@@ -0,0 +1,99 @@
+# database/analytics.py
+"""
+Aggregations behind the analytics pages, run in DuckDB when it is installed.
+
+DuckDB runs in-process and scans pandas/numpy columns in place, including
+the memory-mapped snapshot frames (database/snapshot.py), with a vectorised
+multi-threaded engine. Each function has a pandas path that gives the same
+result, used when duckdb isn't installed or ANALYTICS_ENGINE = "pandas".
+
+Like pandas groupby, groups with a NULL key are left out.
+"""
+import threading
+
+import pandas as pd
+from utils.config import ANALYTICS_ENGINE
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+
+def engine() -> str:
+    """Which engine the functions below use: "duckdb" or "pandas"."""
+    return "duckdb" if DUCKDB_AVAILABLE and ANALYTICS_ENGINE != "pandas" else "pandas"
+
+
+_local = threading.local()
+
+
+def _query(sql: str, params=None, **frames) -> pd.DataFrame:
+    """Run `sql` on this thread's in-memory DuckDB, with each DataFrame in `frames` visible under its name."""
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = _local.con = duckdb.connect()
+    for name, frame in frames.items():
+        con.register(name, frame)
+    try:
+        return con.execute(sql, params).df()
+    finally:
+        for name in frames:
+            con.unregister(name)
+
+
+def usage_by_group(df: pd.DataFrame, engine_name: str | None = None) -> pd.DataFrame:
+    """
+    Mean EngineHourDay + mean IdleHourDay per (SiteID, Type, ContactDetails)
+    as avg_usage. Input: one row per unit per day (low-utilization check).
+    """
+    keys = ["SiteID", "Type", "ContactDetails"]
+    if (engine_name or engine()) == "duckdb":
+        return _query("""
+            SELECT SiteID, Type, ContactDetails, AVG(EngineHourDay) + AVG(IdleHourDay) AS avg_usage
+            FROM usage
+            WHERE SiteID IS NOT NULL AND Type IS NOT NULL AND ContactDetails IS NOT NULL
+            GROUP BY SiteID, Type, ContactDetails
+            ORDER BY SiteID, Type, ContactDetails
+        """, usage=df)
+    grouped = df.groupby(keys, observed=True)
+    out = grouped["EngineHourDay"].mean() + grouped["IdleHourDay"].mean()
+    return out.rename("avg_usage").reset_index()
+
+
+def daily_counts(df: pd.DataFrame, site_id, engine_name: str | None = None) -> pd.DataFrame:
+    """Rentals per CheckOutDate for one site, oldest first, as Prophet's (ds, y) frame."""
+    if (engine_name or engine()) == "duckdb":
+        return _query("""
+            SELECT CheckOutDate AS ds, COUNT(*) AS y
+            FROM rentals
+            WHERE SiteID = ? AND CheckOutDate IS NOT NULL
+            GROUP BY CheckOutDate
+            ORDER BY CheckOutDate
+        """, [site_id], rentals=df)
+    site_df = df[df["SiteID"] == site_id]
+    return site_df.groupby("CheckOutDate").size().reset_index(name="y").rename(columns={"CheckOutDate": "ds"})
+
+
+def location_mix(df: pd.DataFrame, engine_name: str | None = None) -> pd.DataFrame:
+    """Units per map location (loc_name, lat, lon): count, rented, share (map_view intensity layer)."""
+    if (engine_name or engine()) == "duckdb":
+        return _query("""
+            SELECT loc_name, lat, lon,
+                   COUNT(*) AS count,
+                   SUM(CAST(is_rented AS INTEGER)) AS rented,
+                   SUM(CAST(is_share AS INTEGER)) AS share
+            FROM units
+            WHERE loc_name IS NOT NULL AND lat IS NOT NULL AND lon IS NOT NULL
+            GROUP BY loc_name, lat, lon
+            ORDER BY loc_name, lat, lon
+        """, units=df)
+    return (
+        df.groupby(["loc_name", "lat", "lon"], as_index=False)
+        .agg(
+            count=("EquipmentID", "size"),
+            rented=("is_rented", "sum"),
+            share=("is_share", "sum"),
+        )
+    )
@@ -0,0 +1,112 @@
+# database/analytics_bench.py
+"""
+Time the database/analytics.py aggregations on DuckDB vs pandas.
+
+    python -m database.analytics_bench [rows]     (default 1,000,000)
+
+Inputs are generated telemetry: `rows` EquipmentTelemetry-style samples from
+UNITS units reporting every SAMPLE_SECONDS, each unit fixed to a site, type
+and location. Every case runs on the samples joined to their unit's
+attributes, so the aggregations see telemetry volume; nothing touches SQLite.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from database import analytics
+
+REPEAT = 3
+UNITS = 2_000
+SITES = 50
+SAMPLE_SECONDS = 300
+START_TS = 1_735_689_600   # 2025-01-01 00:00 UTC
+
+
+def _telemetry(rows: int, seed: int = 42) -> pd.DataFrame:
+    """`rows` samples, round-robin across the units, with per-sample engine and idle hours."""
+    rng = np.random.default_rng(seed)
+    unit = np.arange(rows) % UNITS
+    engine = rng.uniform(0, SAMPLE_SECONDS / 3600, rows)
+    return pd.DataFrame({
+        "EquipmentID": unit,
+        "Ts": START_TS + (np.arange(rows) // UNITS) * SAMPLE_SECONDS + unit % SAMPLE_SECONDS,
+        "EngineHours": engine,
+        "IdleHours": engine * rng.uniform(0, 0.6, rows),
+        "Fuel": rng.uniform(5, 100, rows),
+    })
+
+
+def _units(seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    sites = rng.integers(1, SITES + 1, UNITS)
+    places = rng.integers(0, 200, UNITS)
+    return pd.DataFrame({
+        "EquipmentID": np.arange(UNITS), "SiteID": sites,
+        "Type": pd.Categorical.from_codes(rng.integers(0, 5, UNITS),
+                                          ["Bulldozer", "Crane", "Excavator", "Grader", "Loader"]),
+        "ContactDetails": pd.Categorical.from_codes(sites - 1, [f"site{i}@example.com" for i in range(1, SITES + 1)]),
+        "loc_name": pd.Categorical.from_codes(places, [f"L{i}" for i in range(200)]),
+        "lat": 8.0 + places * 0.1, "lon": 68.0 + places * 0.1,
+        "is_rented": rng.random(UNITS) < 0.6, "is_share": rng.random(UNITS) < 0.2,
+    })
+
+
+def _frames(rows: int) -> dict[str, pd.DataFrame]:
+    samples = _telemetry(rows).merge(_units(), on="EquipmentID")
+    return {
+        "usage": samples.rename(columns={"EngineHours": "EngineHourDay", "IdleHours": "IdleHourDay"})[
+            ["SiteID", "Type", "ContactDetails", "EngineHourDay", "IdleHourDay"]],
+        "rentals": pd.DataFrame({
+            "SiteID": samples["SiteID"],
+            "CheckOutDate": pd.to_datetime(samples["Ts"], unit="s").dt.normalize(),
+        }),
+        "units": samples[["EquipmentID", "loc_name", "lat", "lon", "is_rented", "is_share"]],
+    }
+
+
+def _best(fn) -> tuple[float, pd.DataFrame]:
+    times, result = [], None
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def _same(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    a = a.astype({c: "object" for c in a.columns if not pd.api.types.is_numeric_dtype(a[c])})
+    b = b.astype({c: "object" for c in b.columns if not pd.api.types.is_numeric_dtype(b[c])})
+    a = a.sort_values(list(a.columns[:2]), ignore_index=True)
+    b = b.sort_values(list(b.columns[:2]), ignore_index=True)
+    return len(a) == len(b) and all(
+        np.allclose(a[c], b[c]) if pd.api.types.is_numeric_dtype(a[c]) and pd.api.types.is_numeric_dtype(b[c])
+        else (a[c].astype(str) == b[c].astype(str)).all()
+        for c in a.columns
+    )
+
+
+def run(rows: int) -> list[tuple]:
+    frames = _frames(rows)
+    cases = [
+        ("usage_by_group", lambda e: analytics.usage_by_group(frames["usage"], e)),
+        ("daily_counts", lambda e: analytics.daily_counts(frames["rentals"], 1, e)),
+        ("location_mix", lambda e: analytics.location_mix(frames["units"], e)),
+    ]
+    results = []
+    for name, fn in cases:
+        pandas_s, expected = _best(lambda: fn("pandas"))
+        duck_s, got = _best(lambda: fn("duckdb"))
+        results.append((name, pandas_s, duck_s, _same(expected, got)))
+    return results
+
+
+if __name__ == "__main__":
+    if not analytics.DUCKDB_AVAILABLE:
+        print("❌ duckdb is not installed (pip install duckdb); only the pandas path is available.")
+        sys.exit(1)
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"📊 {rows:,} telemetry samples from {UNITS:,} units, best of {REPEAT}")
+    for name, pandas_s, duck_s, same in run(rows):
+        print(f"  {name:<16} pandas {pandas_s * 1000:8.1f} ms   duckdb {duck_s * 1000:8.1f} ms   "
+              f"{pandas_s / duck_s:5.1f}x   {'✅ same result' if same else '❌ results differ'}")
@@ -0,0 +1,170 @@
+# database/archive.py
+"""
+Archive tier for finished history.
+
+Approved/Rejected requests and completed rentals are only read for history,
+yet they would otherwise stay in RentalRequests and Rentals forever. Every
+owner-dashboard and pending-request query would keep walking a growing table.
+archive_closed() moves rows older than ARCHIVE_AFTER_DAYS into
+RentalRequestsArchive and RentalsArchive (same columns plus ArchivedAt),
+ARCHIVE_BATCH_SIZE rows per transaction:
+
+    RentalRequests  closed (ClosedAt set by transition_request) before the cutoff
+    Rentals         CheckInDate before the cutoff
+
+The archive tables live in the same database file, so each batch's copy and
+delete commit together. The hot tables keep only open and recent rows, and
+their pages stay in the cache.
+
+Reads that need all of history go through the RentalRequestsAll and
+RentalsAll views (hot UNION ALL archive). SQLite pushes WHERE filters into
+both halves, so each half is still served by its own index. The db.py
+readers take include_archive=True for this.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL
+from database.connection import get_connection
+
+REQUEST_ARCHIVE_COLUMNS = (
+    "RequestID", "EquipmentID", "RequesterSiteID", "OwnerSiteID", "Location",
+    "TimeFrom", "TimeTo", "Status", "Version", "ClosedAt",
+)
+RENTAL_ARCHIVE_COLUMNS = (
+    "RentalID", "EquipmentID", "SiteID", "Type", "RentalType", "Location",
+    "OperatingDays", "CheckOutDate", "CheckInDate", "CreatedAt",
+)
+
+ARCHIVE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS RentalRequestsArchive (
+        RequestID INTEGER PRIMARY KEY,
+        EquipmentID TEXT,
+        RequesterSiteID INTEGER,
+        OwnerSiteID INTEGER,
+        Location TEXT,
+        TimeFrom TEXT,
+        TimeTo TEXT,
+        Status TEXT,
+        Version INTEGER,
+        ClosedAt TEXT,
+        ArchivedAt TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RentalsArchive (
+        RentalID INTEGER PRIMARY KEY,
+        EquipmentID TEXT NOT NULL,
+        SiteID INTEGER,
+        Type TEXT,
+        RentalType TEXT,
+        Location TEXT,
+        OperatingDays INTEGER,
+        CheckOutDate TEXT NOT NULL,
+        CheckInDate TEXT,
+        CreatedAt TEXT,
+        ArchivedAt TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS RentalRequestsAll AS
+    SELECT {', '.join(REQUEST_ARCHIVE_COLUMNS)} FROM RentalRequests
+    UNION ALL
+    SELECT {', '.join(REQUEST_ARCHIVE_COLUMNS)} FROM RentalRequestsArchive
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS RentalsAll AS
+    SELECT {', '.join(RENTAL_ARCHIVE_COLUMNS)} FROM Rentals
+    UNION ALL
+    SELECT {', '.join(RENTAL_ARCHIVE_COLUMNS)} FROM RentalsArchive
+    """,
+)
+
+# (hot table, archive table, key, columns, age column, cutoff format) — the age
+# column is indexed on the hot table so each batch is a range read
+ARCHIVED = [
+    ("RentalRequests", "RentalRequestsArchive", "RequestID", REQUEST_ARCHIVE_COLUMNS, "ClosedAt", "%Y-%m-%d %H:%M:%S"),
+    ("Rentals", "RentalsArchive", "RentalID", RENTAL_ARCHIVE_COLUMNS, "CheckInDate", "%Y-%m-%d"),
+]
+
+
+def _archive_batch(conn, hot, archive, key, columns, age_column, cutoff, batch_size) -> int:
+    keys = [row[0] for row in conn.execute(
+        f"SELECT {key} FROM {hot} WHERE {age_column} < ? ORDER BY {age_column} LIMIT ?",
+        (cutoff, batch_size)
+    )]
+    if not keys:
+        return 0
+    marks = ", ".join("?" * len(keys))
+    names = ", ".join(columns)
+    conn.execute(f"INSERT INTO {archive} ({names}) SELECT {names} FROM {hot} WHERE {key} IN ({marks})",
+                 keys)
+    conn.execute(f"DELETE FROM {hot} WHERE {key} IN ({marks})", keys)
+    return len(keys)
+
+
+def archive_closed(older_than_days: float = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE,
+                   pause: float = 0.0) -> dict:
+    """
+    Move closed requests and completed rentals older than `older_than_days`
+    to the archive tables, one short write transaction per batch (sleeping
+    `pause` seconds between batches lets other writers in). Returns
+    {hot table: rows moved}.
+    """
+    now = datetime.now(timezone.utc)
+    moved = {}
+    for hot, archive, key, columns, age_column, fmt in ARCHIVED:
+        cutoff = (now - timedelta(days=older_than_days)).strftime(fmt)
+        moved[hot] = 0
+        while True:
+            with get_connection(immediate=True) as conn:
+                n = _archive_batch(conn, hot, archive, key, columns, age_column, cutoff, batch_size)
+            moved[hot] += n
+            if n < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return moved
+
+
+# --- Background archiver ---
+
+_archiver: threading.Thread | None = None
+_archiver_stop = threading.Event()
+_archiver_lock = threading.Lock()
+
+
+def _archiver_loop(interval: float):
+    while not _archiver_stop.wait(interval):
+        try:
+            moved = archive_closed()
+            if any(moved.values()):
+                print(f"🗃️ Archived {', '.join(f'{n} {table}' for table, n in moved.items())}")
+        except Exception as e:
+            print(f"⚠️ Archiving failed: {e}")
+
+
+def start_archiver(interval: float = ARCHIVE_INTERVAL):
+    """Start the process-wide archiver thread once; later calls are no-ops."""
+    global _archiver
+    with _archiver_lock:
+        if _archiver is None or not _archiver.is_alive():
+            _archiver_stop.clear()
+            _archiver = threading.Thread(target=_archiver_loop, args=(interval,), name="history-archiver",
+                                         daemon=True)
+            _archiver.start()
+
+
+def stop_archiver():
+    _archiver_stop.set()
+
+
+if __name__ == "__main__":
+    import sys
+    from database.db import init_db
+    init_db()
+    days = float(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS
+    moved = archive_closed(days)
+    print(f"🗃️ Archived rows older than {days:g} days: {', '.join(f'{table} {n}' for table, n in moved.items())}")
@@ -0,0 +1,141 @@
+# database/cache.py
+"""
+Process-wide query cache shared by every session.
+
+    @cached("Rentals", "RentalsArchive")
+    def get_rentals(site_id=None, ...): ...
+
+A result is keyed by (function, arguments) and stamped with
+data_version(*tables) from when it was loaded. It is served until one of the
+tables it reads changes: there is no TTL, and writes to other tables don't
+touch it. Concurrent misses on the same key at the same version run the
+query once: the first loads, the rest wait for its result. If that load
+fails, or its result is evicted before a waiter reads it, the waiter runs the
+query itself.
+
+The version check and the load run in one read transaction (read_snapshot),
+so a result always matches its stamp. A helper called inside a page's
+read_snapshot() block returns exactly what the query would return there.
+Inside a transaction that has written, the cache is bypassed.
+
+Only the newest version of each key is kept, and at most QUERY_CACHE_ENTRIES
+keys; the least recently used go first. Results are shared, so DataFrames
+and lists are handed out as copies.
+"""
+import functools
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import pandas as pd
+from utils.config import QUERY_CACHE_ENTRIES
+from database.connection import read_snapshot, has_pending_writes
+from database.changes import data_version, tracked_tables
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _detach(value):
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+class QueryCache:
+    """LRU map of key -> (data version, result)."""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict = {}   # key -> (version, Event) while a miss is being loaded
+        self._hits = self._misses = self._evictions = 0
+
+    def get(self, key, tables: tuple[str, ...], load):
+        """The cached result for `key` at the current version of `tables`, else `load()` (then cached)."""
+        with read_snapshot():
+            if has_pending_writes():
+                # Inside a writer's transaction: its rows aren't committed, so neither serve nor share
+                return load()
+            version = data_version(*tables)
+            while True:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None and entry[0] == version:
+                        self._entries.move_to_end(key)
+                        self._hits += 1
+                        return _detach(entry[1])
+                    flight = self._loading.get(key)
+                    if flight is None or flight[0] != version:
+                        break
+                # Someone is loading this key at our version: wait for theirs instead of running it again
+                flight[1].wait()
+            with self._lock:
+                self._misses += 1
+                flight = (version, threading.Event())
+                self._loading.setdefault(key, flight)
+            try:
+                value = load()
+                with self._lock:
+                    # A reader on an older snapshot must not replace a newer result
+                    current = self._entries.get(key)
+                    if current is None or current[0] <= version:
+                        self._entries[key] = (version, value)
+                        self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self._evictions += 1
+            finally:
+                with self._lock:
+                    if self._loading.get(key) is flight:
+                        del self._loading[key]
+                flight[1].set()
+        return _detach(value)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+query_cache = QueryCache()
+
+
+def cached(*tables: str):
+    """
+    Serve a read helper from query_cache, invalidated by changes to `tables`
+    (every table the query reads, directly or through a view). Calls with
+    unhashable arguments go straight to the database.
+    """
+    unknown = set(tables) - tracked_tables()
+    if not tables or unknown:
+        missing = ", ".join(sorted(unknown)) or "(none given)"
+        raise ValueError(f"Cached queries need change-tracked tables; not tracked: {missing}.")
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return fn(*args, **kwargs)
+            return query_cache.get(key, tables, lambda: fn(*args, **kwargs))
+        wrapper.uncached = fn
+        return wrapper
+    return decorate
@@ -0,0 +1,143 @@
+# database/changes.py
+"""
+Change-data capture.
+
+Triggers on the tracked tables bump a global version (DataVersion '*') on every
+row write, stamp the table's own DataVersion row with it, and upsert the row's
+key into ChangeLog with that version. ChangeLog holds the *latest* change per
+key, so it stays as large as the set of keys ever touched instead of growing
+with every write.
+
+Readers take `data_version()` before a full load, then call
+`changes_since(version)` to pick up only what changed after it.
+
+VERSIONED_TABLES only bump the versions, with no ChangeLog rows: nothing
+patches them row by row, but the query cache (database/cache.py) and the
+snapshot exporter still need to know when they changed.
+"""
+from typing import NamedTuple
+
+import pandas as pd
+from database.connection import get_connection
+from database.repository import vendors_frame, requests_frame
+
+# (table, key expression) — EquipmentLatest is tracked because it feeds VendorCurrent
+CDC_TABLES = [
+    ("Vendor", "EquipmentID"),
+    ("EquipmentLatest", "EquipmentID"),
+    ("SiteInfo", "rowid"),
+    ("RentalRequests", "RequestID"),
+]
+
+# Version-only tracking: history and rollup tables that are appended in bulk
+VERSIONED_TABLES = ["Rentals", "RentalsArchive", "RentalRequestsArchive", "TelemetryDay"]
+
+# Physical tables behind each logical row set returned by changes_since()
+VENDOR_SOURCES = ("Vendor", "EquipmentLatest")
+
+_OPS = {"INSERT": ("NEW", "I"), "UPDATE": ("NEW", "U"), "DELETE": ("OLD", "D")}
+
+
+def cdc_trigger_sql(table: str, key: str, event: str) -> str:
+    row, op = _OPS[event]
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS trg_cdc_{table.lower()}_{event.lower()}
+    AFTER {event} ON {table}
+    BEGIN
+        UPDATE DataVersion SET Version = Version + 1 WHERE TableName = '*';
+        UPDATE DataVersion SET Version = (SELECT Version FROM DataVersion WHERE TableName = '*')
+        WHERE TableName = '{table}';
+        INSERT INTO ChangeLog (TableName, RowKey, Version, Op)
+        SELECT '{table}', {row}.{key}, Version, '{op}' FROM DataVersion WHERE TableName = '*'
+        ON CONFLICT(TableName, RowKey) DO UPDATE SET Version = excluded.Version, Op = excluded.Op;
+    END
+    """
+
+
+def version_trigger_sql(table: str, event: str) -> str:
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS trg_version_{table.lower()}_{event.lower()}
+    AFTER {event} ON {table}
+    BEGIN
+        UPDATE DataVersion SET Version = Version + 1 WHERE TableName = '*';
+        UPDATE DataVersion SET Version = (SELECT Version FROM DataVersion WHERE TableName = '*')
+        WHERE TableName = '{table}';
+    END
+    """
+
+
+def tracked_tables() -> set[str]:
+    """Tables that data_version(*tables) can answer for."""
+    return {table for table, _key in CDC_TABLES} | set(VERSIONED_TABLES)
+
+
+class ChangeSet(NamedTuple):
+    version: int                     # pass this to the next changes_since() call
+    keys: dict[str, list]            # table -> keys inserted/updated since
+    deleted: dict[str, list]         # table -> keys deleted since
+    rows: dict[str, pd.DataFrame]    # "Vendor" (VendorCurrent), "SiteInfo", "RentalRequests" -> current rows
+
+    def __bool__(self):
+        return bool(self.keys or self.deleted)
+
+
+def data_version(*tables: str) -> int:
+    """Global change version, or the latest version that touched any of `tables`."""
+    names = tables or ("*",)
+    with get_connection() as conn:
+        row = conn.execute(
+            f"SELECT MAX(Version) FROM DataVersion WHERE TableName IN ({', '.join('?' * len(names))})", names
+        ).fetchone()
+        return row[0] or 0
+
+
+def changes_since(version: int, tables=None) -> ChangeSet:
+    """
+    Keys changed after `version` and the current rows for them.
+
+    The new version is read first, so a write that commits while this runs is
+    either included or picked up by the next call; re-applying a row is harmless
+    because the rows are current state, not diffs.
+    """
+    tables = tuple(tables or (t for t, _ in CDC_TABLES))
+    current = data_version()
+    keys, deleted, rows = {}, {}, {}
+    if current <= version:
+        return ChangeSet(current, keys, deleted, rows)
+
+    with get_connection() as conn:
+        changed = conn.execute(
+            f"""
+            SELECT TableName, RowKey, Op FROM ChangeLog
+            WHERE Version > ? AND TableName IN ({', '.join('?' * len(tables))})
+            ORDER BY Version
+            """,
+            (version, *tables)
+        ).fetchall()
+        for table, key, op in changed:
+            (deleted if op == "D" else keys).setdefault(table, []).append(key)
+
+        if "SiteInfo" in keys:
+            rows["SiteInfo"] = pd.read_sql_query(
+                """
+                SELECT rowid AS RowID, * FROM SiteInfo
+                WHERE rowid IN (SELECT RowKey FROM ChangeLog WHERE TableName = 'SiteInfo' AND Version > ?)
+                """,
+                conn, params=(version,)
+            )
+    if any(t in keys for t in VENDOR_SOURCES):
+        rows["Vendor"] = vendors_frame(changed_since=version)
+    if "RentalRequests" in keys:
+        rows["RentalRequests"] = requests_frame(changed_since=version)
+    return ChangeSet(current, keys, deleted, rows)
+
+
+def patch_frame(df: pd.DataFrame, rows: pd.DataFrame, key: str, drop_keys=()) -> pd.DataFrame:
+    """
+    Apply current `rows` to a frame loaded earlier: rows with the same `key`
+    are replaced, keys in `drop_keys` removed, new keys appended. Sorted by key.
+    """
+    stale = df[key].isin(rows[key]) | df[key].isin(list(drop_keys))
+    return pd.concat([df[~stale], rows.reindex(columns=df.columns)], ignore_index=True).sort_values(
+        key, ignore_index=True
+    )
@@ -0,0 +1,217 @@
+# database/connection.py
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from utils.config import (
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE_KB,
+    DB_WAL_SIZE_LIMIT_MB,
+)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections for one database file.
+
+    A thread checks a connection out for the outermost `connection()` block and
+    gives it back when that block ends. Nested blocks on the same thread reuse
+    the checked-out connection, so a helper that calls other helpers runs all
+    of its statements on one connection and inside one transaction.
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._closed = False
+        self._checkout_hooks: list = []
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+        # Only takes effect on a new file; older ones switch with `python -m database.maintenance vacuum`
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA journal_size_limit={int(DB_WAL_SIZE_LIMIT_MB) * 1024 * 1024}")
+        conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Negative cache_size is in KiB rather than pages
+        conn.execute(f"PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise sqlite3.OperationalError(
+                f"No free database connection after {DB_POOL_TIMEOUT}s (pool size {self.size})."
+            )
+        try:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+            return self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn: sqlite3.Connection, broken: bool = False):
+        try:
+            if broken or self._closed:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, immediate: bool = False):
+        """
+        Yield a pooled connection. The outermost block commits on success and
+        rolls back on error; `immediate=True` takes the write lock up front.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            # Nested use on this thread: same connection, same transaction
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        self._local.on_commit = callbacks = []
+        broken = committed = False
+        try:
+            for hook in self._checkout_hooks:
+                hook(conn)
+            self._local.baseline = conn.total_changes
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+            committed = True
+        except BaseException:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                broken = True
+            raise
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._local.on_commit = []
+            self._checkin(conn, broken=broken)
+        if committed:
+            for fn in callbacks:
+                try:
+                    fn()
+                except Exception as e:
+                    print(f"⚠️ on_commit callback failed: {e}")
+
+    def add_checkout_hook(self, fn):
+        """
+        Call `fn(conn)` each time an outermost block checks a connection out,
+        before any BEGIN — the place for per-connection setup such as ATTACH.
+        """
+        if fn not in self._checkout_hooks:
+            self._checkout_hooks.append(fn)
+
+    def on_commit(self, fn):
+        """
+        Run `fn()` once this thread's outermost block has committed (dropped if
+        it rolls back). With no block open, run it right away.
+        """
+        if getattr(self._local, "conn", None) is None:
+            fn()
+        else:
+            self._local.on_commit.append(fn)
+
+    def has_pending_writes(self) -> bool:
+        """Whether this thread's open block has written rows that aren't committed yet."""
+        conn = getattr(self._local, "conn", None)
+        return conn is not None and conn.in_transaction and conn.total_changes != self._local.baseline
+
+    def close(self):
+        """Close every idle connection. Checked-out ones close when returned to a closed pool."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str | None = None) -> ConnectionPool:
+    path = path or DB_PATH
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+def get_connection(path: str | None = None, immediate: bool = False):
+    """
+    Context manager yielding a pooled connection to `path` (defaults to DB_PATH):
+
+        with get_connection() as conn:
+            conn.execute(...)
+
+    Commits when the outermost block exits and never leaves the connection
+    open-and-orphaned; the pool closes everything at interpreter exit.
+    """
+    return get_pool(path).connection(immediate=immediate)
+
+
+def on_commit(fn, path: str | None = None):
+    """Defer `fn()` until the current transaction on `path` commits; see ConnectionPool.on_commit."""
+    get_pool(path).on_commit(fn)
+
+
+def has_pending_writes(path: str | None = None) -> bool:
+    return get_pool(path).has_pending_writes()
+
+
+@contextmanager
+def read_snapshot():
+    """
+    One deferred read transaction for a page render:
+
+        with read_snapshot():
+            owned = count_units(site_id=...)
+            page, cursor = fetch_vendor_page(...)
+
+    Every helper called inside runs on this connection (the pool nests on the
+    thread), so all of them see the database as of the first read, whatever
+    commits meanwhile. Readers don't block the writer under WAL; keep writes
+    and waits (rerun_on_event) outside the block.
+    """
+    with get_connection() as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN DEFERRED")
+        yield conn
+
+
+@atexit.register
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
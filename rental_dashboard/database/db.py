@@ -1,10 +1,18 @@
-import sqlite3
-from utils.config import DB_PATH
-from datetime import datetime, timedelta
+from typing import NamedTuple
 import pandas as pd
-
-def get_connection():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+from database.connection import get_connection, on_commit
+from database.migrations import migrate
+from database.telemetry import record_sample
+from database.shards import install as install_shards
+from database.repository import VENDOR_COLUMNS, VendorRow, list_vendors, vendors_frame, requests_frame
+from database.cache import cached
+from database.search import search_ids
+from database.fleet_summary import unit_types
+from database.reservations import book, release, no_overlap_sql, parse_time
+from utils.config import PAGE_SIZE
+from utils.events import (
+    publish, ShareChanged, RequestCreated, RequestStatusChanged, EquipmentRented, UsageUpdated,
+)
 
 def backfill_demo_site_ids():
     with get_connection() as conn:
@@ -13,491 +21,43 @@ def backfill_demo_site_ids():
             SET SiteID = CASE
                 WHEN (CAST(substr(EquipmentID, 4) AS INTEGER) % 2) = 0 THEN 2
                 ELSE 1
-            END
+            END,
+            Version = Version + 1
             WHERE SiteID IS NULL
         """)
-        conn.commit()
 
-def init_db():
+RENTAL_TYPES = ("Rigid", "Flexible")
+AVAILABILITY_STATES = ("Available", "Rented")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-
-    # Vendor/Equipment Table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS Vendor (
-        EquipmentID TEXT PRIMARY KEY,
-        Type TEXT,
-        SiteID INTEGER,
-        CheckOutDate TEXT,
-        CheckInDate TEXT,
-        EngineHourDay REAL,
-        IdleHourDay REAL,
-        OperatingDays INTEGER,
-        DaysLeft INTEGER,
-        Fuel REAL,
-        Location TEXT,
-        Availability TEXT CHECK(Availability IN ('Available', 'Rented')) DEFAULT 'Available',
-        RentalType TEXT CHECK(RentalType IN ('Rigid', 'Flexible')),
-        ReadyToShare INTEGER DEFAULT 0,
-        SharedBySiteID INTEGER
-    )
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS SiteInfo (
-        SiteID INTEGER,
-        EquipmentID TEXT,
-        Location TEXT,
-        ContactDetails TEXT,
-        FOREIGN KEY (EquipmentID) REFERENCES Vendor(EquipmentID)
-    )
-    """)
-
-    conn.execute("""
-            CREATE TABLE IF NOT EXISTS RentalRequests (
-                RequestID INTEGER PRIMARY KEY AUTOINCREMENT,
-                EquipmentID TEXT,
-                RequesterSiteID INTEGER,
-                OwnerSiteID INTEGER,
-                Location TEXT,
-                TimeFrom TEXT,
-                TimeTo   TEXT,
-                Status TEXT CHECK(Status IN ('Pending','Approved','Rejected')) DEFAULT 'Pending'
-            )
-    """)
-    # If table existed before without OwnerSiteID, add it:
-    # cur = conn.execute("PRAGMA table_info(RentalRequests)")
-    # cols = {r[1] for r in cur.fetchall()}
-    # if "OwnerSiteID" not in cols:
-    #     conn.execute("ALTER TABLE RentalRequests ADD COLUMN OwnerSiteID INTEGER")
-    # conn.commit()
-
-    cursor.execute("SELECT COUNT(*) FROM Vendor")
-    count = cursor.fetchone()[0]
-
-    if count == 0:
-        equipment_list = [
-            
-            ('EQX1151', 'Excavator', 'Available'),
-            ('EQX1152', 'Excavator', 'Available'),
-            ('EQX1153', 'Excavator', 'Available'),
-            ('EQX1154', 'Excavator', 'Available'),
-            ('EQX1155', 'Excavator', 'Available'),
-            ('EQX1156', 'Excavator', 'Available'),
-            ('EQX1157', 'Excavator', 'Available'),
-            ('EQX1158', 'Excavator', 'Available'),
-            ('EQX1159', 'Excavator', 'Available'),
-            ('EQX1160', 'Excavator', 'Available'),
-            ('EQX1161', 'Excavator', 'Available'),
-            ('EQX1162', 'Excavator', 'Available'),
-            ('EQX1163', 'Excavator', 'Available'),
-            ('EQX1164', 'Excavator', 'Available'),
-            ('EQX1165', 'Excavator', 'Available'),
-            ('EQX1166', 'Excavator', 'Available'),
-            ('EQX1167', 'Excavator', 'Available'),
-            ('EQX1168', 'Excavator', 'Available'),
-            ('EQX1169', 'Excavator', 'Available'),
-            ('EQX1170', 'Excavator', 'Available'),
-            ('EQX1171', 'Excavator', 'Available'),
-            ('EQX1172', 'Excavator', 'Available'),
-            ('EQX1173', 'Excavator', 'Available'),
-            ('EQX1174', 'Excavator', 'Available'),
-            ('EQX1175', 'Excavator', 'Available'),
-            ('EQX1176', 'Excavator', 'Available'),
-            ('EQX1177', 'Excavator', 'Available'),
-            ('EQX1178', 'Excavator', 'Available'),
-            ('EQX1179', 'Excavator', 'Available'),
-            ('EQX1180', 'Excavator', 'Available'),
-            ('EQX1181', 'Excavator', 'Available'),
-            ('EQX1182', 'Excavator', 'Available'),
-            ('EQX1183', 'Excavator', 'Available'),
-            ('EQX1184', 'Excavator', 'Available'),
-            ('EQX1185', 'Excavator', 'Available'),
-            ('EQX1186', 'Excavator', 'Available'),
-            ('EQX1187', 'Excavator', 'Available'),
-            ('EQX1188', 'Excavator', 'Available'),
-            ('EQX1189', 'Excavator', 'Available'),
-            ('EQX1190', 'Excavator', 'Available'),
-            ('EQX1191', 'Excavator', 'Available'),
-            ('EQX1192', 'Excavator', 'Available'),
-            ('EQX1193', 'Excavator', 'Available'),
-            ('EQX1194', 'Excavator', 'Available'),
-            ('EQX1195', 'Excavator', 'Available'),
-            ('EQX1196', 'Excavator', 'Available'),
-            ('EQX1197', 'Excavator', 'Available'),
-            ('EQX1198', 'Excavator', 'Available'),
-            ('EQX1199', 'Excavator', 'Available'),
-            ('EQX1200', 'Excavator', 'Available'),
-            ('EQX1201', 'Excavator', 'Available'),
-            ('EQX1202', 'Excavator', 'Available'),
-            ('EQX1203', 'Excavator', 'Available'),
-            ('EQX1204', 'Excavator', 'Available'),
-            ('EQX1205', 'Excavator', 'Available'),
-            ('EQX1206', 'Excavator', 'Available'),
-            ('EQX1207', 'Excavator', 'Available'),
-            ('EQX1208', 'Excavator', 'Available'),
-            ('EQX1209', 'Excavator', 'Available'),
-            ('EQX1210', 'Excavator', 'Available'),
-            ('EQX1211', 'Excavator', 'Available'),
-            ('EQX1212', 'Excavator', 'Available'),
-            ('EQX1213', 'Excavator', 'Available'),
-            ('EQX1214', 'Excavator', 'Available'),
-            ('EQX1215', 'Excavator', 'Available'),
-            ('EQX1216', 'Excavator', 'Available'),
-            ('EQX1217', 'Excavator', 'Available'),
-            ('EQX1218', 'Excavator', 'Available'),
-            ('EQX1219', 'Excavator', 'Available'),
-            ('EQX1220', 'Excavator', 'Available'),
-            ('EQX1221', 'Excavator', 'Available'),
-            ('EQX1222', 'Excavator', 'Available'),
-            ('EQX1223', 'Excavator', 'Available'),
-            ('EQX1224', 'Excavator', 'Available'),
-            ('EQX1225', 'Excavator', 'Available'),
-            ('EQX1226', 'Excavator', 'Available'),
-            ('EQX1227', 'Excavator', 'Available'),
-            ('EQX1228', 'Excavator', 'Available'),
-            ('EQX1229', 'Excavator', 'Available'),
-            ('EQX1230', 'Excavator', 'Available'),
-            ('EQX1231', 'Excavator', 'Available'),
-            ('EQX1232', 'Excavator', 'Available'),
-            ('EQX1233', 'Excavator', 'Available'),
-            ('EQX1234', 'Excavator', 'Available'),
-            ('EQX1235', 'Excavator', 'Available'),
-            ('EQX1236', 'Excavator', 'Available'),
-            ('EQX1237', 'Excavator', 'Available'),
-            ('EQX1238', 'Excavator', 'Available'),
-            ('EQX1239', 'Excavator', 'Available'),
-            ('EQX1240', 'Excavator', 'Available'),
-            ('EQX1241', 'Excavator', 'Available'),
-            ('EQX1242', 'Excavator', 'Available'),
-            ('EQX1243', 'Excavator', 'Available'),
-            ('EQX1244', 'Excavator', 'Available'),
-            ('EQX1245', 'Excavator', 'Available'),
-            ('EQX1246', 'Excavator', 'Available'),
-            ('EQX1247', 'Excavator', 'Available'),
-            ('EQX1248', 'Excavator', 'Available'),
-            ('EQX1249', 'Excavator', 'Available'),
-            ('EQX1250', 'Excavator', 'Available'),
-            ('EQX1400', 'Crane', 'Available'),
-            ('EQX1401', 'Crane', 'Available'),
-            ('EQX1402', 'Crane', 'Available'),
-            ('EQX1403', 'Crane', 'Available'),
-            ('EQX1404', 'Crane', 'Available'),
-            ('EQX1405', 'Crane', 'Available'),
-            ('EQX1406', 'Crane', 'Available'),
-            ('EQX1407', 'Crane', 'Available'),
-            ('EQX1408', 'Crane', 'Available'),
-            ('EQX1409', 'Crane', 'Available'),
-            ('EQX1410', 'Crane', 'Available'),
-            ('EQX1411', 'Crane', 'Available'),
-            ('EQX1412', 'Crane', 'Available'),
-            ('EQX1413', 'Crane', 'Available'),
-            ('EQX1414', 'Crane', 'Available'),
-            ('EQX1415', 'Crane', 'Available'),
-            ('EQX1416', 'Crane', 'Available'),
-            ('EQX1417', 'Crane', 'Available'),
-            ('EQX1418', 'Crane', 'Available'),
-            ('EQX1419', 'Crane', 'Available'),
-            ('EQX1420', 'Crane', 'Available'),
-            ('EQX1421', 'Crane', 'Available'),
-            ('EQX1422', 'Crane', 'Available'),
-            ('EQX1423', 'Crane', 'Available'),
-            ('EQX1424', 'Crane', 'Available'),
-            ('EQX1425', 'Crane', 'Available'),
-            ('EQX1426', 'Crane', 'Available'),
-            ('EQX1427', 'Crane', 'Available'),
-            ('EQX1428', 'Crane', 'Available'),
-            ('EQX1429', 'Crane', 'Available'),
-            ('EQX1430', 'Crane', 'Available'),
-            ('EQX1431', 'Crane', 'Available'),
-            ('EQX1432', 'Crane', 'Available'),
-            ('EQX1433', 'Crane', 'Available'),
-            ('EQX1434', 'Crane', 'Available'),
-            ('EQX1435', 'Crane', 'Available'),
-            ('EQX1436', 'Crane', 'Available'),
-            ('EQX1437', 'Crane', 'Available'),
-            ('EQX1438', 'Crane', 'Available'),
-            ('EQX1439', 'Crane', 'Available'),
-            ('EQX1440', 'Crane', 'Available'),
-            ('EQX1441', 'Crane', 'Available'),
-            ('EQX1442', 'Crane', 'Available'),
-            ('EQX1443', 'Crane', 'Available'),
-            ('EQX1444', 'Crane', 'Available'),
-            ('EQX1445', 'Crane', 'Available'),
-            ('EQX1446', 'Crane', 'Available'),
-            ('EQX1447', 'Crane', 'Available'),
-            ('EQX1448', 'Crane', 'Available'),
-            ('EQX1449', 'Crane', 'Available'),
-            ('EQX1450', 'Crane', 'Available'),
-            ('EQX1451', 'Crane', 'Available'),
-            ('EQX1452', 'Crane', 'Available'),
-            ('EQX1453', 'Crane', 'Available'),
-            ('EQX1454', 'Crane', 'Available'),
-            ('EQX1455', 'Crane', 'Available'),
-            ('EQX1456', 'Crane', 'Available'),
-            ('EQX1457', 'Crane', 'Available'),
-            ('EQX1458', 'Crane', 'Available'),
-            ('EQX1459', 'Crane', 'Available'),
-            ('EQX1460', 'Crane', 'Available'),
-            ('EQX1461', 'Crane', 'Available'),
-            ('EQX1462', 'Crane', 'Available'),
-            ('EQX1463', 'Crane', 'Available'),
-            ('EQX1464', 'Crane', 'Available'),
-            ('EQX1465', 'Crane', 'Available'),
-            ('EQX1466', 'Crane', 'Available'),
-            ('EQX1467', 'Crane', 'Available'),
-            ('EQX1468', 'Crane', 'Available'),
-            ('EQX1469', 'Crane', 'Available'),
-            ('EQX1470', 'Crane', 'Available'),
-            ('EQX1471', 'Crane', 'Available'),
-            ('EQX1472', 'Crane', 'Available'),
-            ('EQX1473', 'Crane', 'Available'),
-            ('EQX1474', 'Crane', 'Available'),
-            ('EQX1475', 'Crane', 'Available'),
-            ('EQX1476', 'Crane', 'Available'),
-            ('EQX1477', 'Crane', 'Available'),
-            ('EQX1478', 'Crane', 'Available'),
-            ('EQX1479', 'Crane', 'Available'),
-            ('EQX1480', 'Crane', 'Available'),
-            ('EQX1481', 'Crane', 'Available'),
-            ('EQX1482', 'Crane', 'Available'),
-            ('EQX1483', 'Crane', 'Available'),
-            ('EQX1484', 'Crane', 'Available'),
-            ('EQX1485', 'Crane', 'Available'),
-            ('EQX1486', 'Crane', 'Available'),
-            ('EQX1487', 'Crane', 'Available'),
-            ('EQX1488', 'Crane', 'Available'),
-            ('EQX1489', 'Crane', 'Available'),
-            ('EQX1490', 'Crane', 'Available'),
-            ('EQX1491', 'Crane', 'Available'),
-            ('EQX1492', 'Crane', 'Available'),
-            ('EQX1493', 'Crane', 'Available'),
-            ('EQX1494', 'Crane', 'Available'),
-            ('EQX1495', 'Crane', 'Available'),
-            ('EQX1496', 'Crane', 'Available'),
-            ('EQX1497', 'Crane', 'Available'),
-            ('EQX1498', 'Crane', 'Available'),
-            ('EQX1499', 'Crane', 'Available'),
-            ('EQX1500', 'Crane', 'Available'),
-            ('EQX1501', 'Bulldozer', 'Available'),
-            ('EQX1502', 'Bulldozer', 'Available'),
-            ('EQX1503', 'Bulldozer', 'Available'),
-            ('EQX1504', 'Bulldozer', 'Available'),
-            ('EQX1505', 'Bulldozer', 'Available'),
-            ('EQX1506', 'Bulldozer', 'Available'),
-            ('EQX1507', 'Bulldozer', 'Available'),
-            ('EQX1508', 'Bulldozer', 'Available'),
-            ('EQX1509', 'Bulldozer', 'Available'),
-            ('EQX1510', 'Bulldozer', 'Available'),
-            ('EQX1511', 'Bulldozer', 'Available'),
-            ('EQX1512', 'Bulldozer', 'Available'),
-            ('EQX1513', 'Bulldozer', 'Available'),
-            ('EQX1514', 'Bulldozer', 'Available'),
-            ('EQX1515', 'Bulldozer', 'Available'),
-            ('EQX1516', 'Bulldozer', 'Available'),
-            ('EQX1517', 'Bulldozer', 'Available'),
-            ('EQX1518', 'Bulldozer', 'Available'),
-            ('EQX1519', 'Bulldozer', 'Available'),
-            ('EQX1520', 'Bulldozer', 'Available'),
-            ('EQX1521', 'Bulldozer', 'Available'),
-            ('EQX1522', 'Bulldozer', 'Available'),
-            ('EQX1523', 'Bulldozer', 'Available'),
-            ('EQX1524', 'Bulldozer', 'Available'),
-            ('EQX1525', 'Bulldozer', 'Available'),
-            ('EQX1526', 'Bulldozer', 'Available'),
-            ('EQX1527', 'Bulldozer', 'Available'),
-            ('EQX1528', 'Bulldozer', 'Available'),
-            ('EQX1529', 'Bulldozer', 'Available'),
-            ('EQX1530', 'Bulldozer', 'Available'),
-            ('EQX1531', 'Bulldozer', 'Available'),
-            ('EQX1532', 'Bulldozer', 'Available'),
-            ('EQX1533', 'Bulldozer', 'Available'),
-            ('EQX1534', 'Bulldozer', 'Available'),
-            ('EQX1535', 'Bulldozer', 'Available'),
-            ('EQX1536', 'Bulldozer', 'Available'),
-            ('EQX1537', 'Bulldozer', 'Available'),
-            ('EQX1538', 'Bulldozer', 'Available'),
-            ('EQX1539', 'Bulldozer', 'Available'),
-            ('EQX1540', 'Bulldozer', 'Available'),
-            ('EQX1541', 'Bulldozer', 'Available'),
-            ('EQX1542', 'Bulldozer', 'Available'),
-            ('EQX1543', 'Bulldozer', 'Available'),
-            ('EQX1544', 'Bulldozer', 'Available'),
-            ('EQX1545', 'Bulldozer', 'Available'),
-            ('EQX1546', 'Bulldozer', 'Available'),
-            ('EQX1547', 'Bulldozer', 'Available'),
-            ('EQX1548', 'Bulldozer', 'Available'),
-            ('EQX1549', 'Bulldozer', 'Available'),
-            ('EQX1550', 'Bulldozer', 'Available'),
-            ('EQX1551', 'Bulldozer', 'Available'),
-            ('EQX1552', 'Bulldozer', 'Available'),
-            ('EQX1553', 'Bulldozer', 'Available'),
-            ('EQX1554', 'Bulldozer', 'Available'),
-            ('EQX1555', 'Bulldozer', 'Available'),
-            ('EQX1556', 'Bulldozer', 'Available'),
-            ('EQX1557', 'Bulldozer', 'Available'),
-            ('EQX1558', 'Bulldozer', 'Available'),
-            ('EQX1559', 'Bulldozer', 'Available'),
-            ('EQX1560', 'Bulldozer', 'Available'),
-            ('EQX1561', 'Bulldozer', 'Available'),
-            ('EQX1562', 'Bulldozer', 'Available'),
-            ('EQX1563', 'Bulldozer', 'Available'),
-            ('EQX1564', 'Bulldozer', 'Available'),
-            ('EQX1565', 'Bulldozer', 'Available'),
-            ('EQX1566', 'Bulldozer', 'Available'),
-            ('EQX1567', 'Bulldozer', 'Available'),
-            ('EQX1568', 'Bulldozer', 'Available'),
-            ('EQX1569', 'Bulldozer', 'Available'),
-            ('EQX1570', 'Bulldozer', 'Available'),
-            ('EQX1571', 'Bulldozer', 'Available'),
-            ('EQX1572', 'Bulldozer', 'Available'),
-            ('EQX1573', 'Bulldozer', 'Available'),
-            ('EQX1574', 'Bulldozer', 'Available'),
-            ('EQX1575', 'Bulldozer', 'Available'),
-            ('EQX1576', 'Bulldozer', 'Available'),
-            ('EQX1577', 'Bulldozer', 'Available'),
-            ('EQX1578', 'Bulldozer', 'Available'),
-            ('EQX1579', 'Bulldozer', 'Available'),
-            ('EQX1580', 'Bulldozer', 'Available'),
-            ('EQX1581', 'Bulldozer', 'Available'),
-            ('EQX1582', 'Bulldozer', 'Available'),
-            ('EQX1583', 'Bulldozer', 'Available'),
-            ('EQX1584', 'Bulldozer', 'Available'),
-            ('EQX1585', 'Bulldozer', 'Available'),
-            ('EQX1586', 'Bulldozer', 'Available'),
-            ('EQX1587', 'Bulldozer', 'Available'),
-            ('EQX1588', 'Bulldozer', 'Available'),
-            ('EQX1589', 'Bulldozer', 'Available'),
-            ('EQX1590', 'Bulldozer', 'Available'),
-            ('EQX1591', 'Bulldozer', 'Available'),
-            ('EQX1592', 'Bulldozer', 'Available'),
-            ('EQX1593', 'Bulldozer', 'Available'),
-            ('EQX1594', 'Bulldozer', 'Available'),
-            ('EQX1595', 'Bulldozer', 'Available'),
-            ('EQX1596', 'Bulldozer', 'Available'),
-            ('EQX1597', 'Bulldozer', 'Available'),
-            ('EQX1598', 'Bulldozer', 'Available'),
-            ('EQX1599', 'Bulldozer', 'Available'),
-            ('EQX1600', 'Bulldozer', 'Available'),
-            ('EQX1751', 'Grader', 'Available'),
-            ('EQX1752', 'Grader', 'Available'),
-            ('EQX1753', 'Grader', 'Available'),
-            ('EQX1754', 'Grader', 'Available'),
-            ('EQX1755', 'Grader', 'Available'),
-            ('EQX1756', 'Grader', 'Available'),
-            ('EQX1757', 'Grader', 'Available'),
-            ('EQX1758', 'Grader', 'Available'),
-            ('EQX1759', 'Grader', 'Available'),
-            ('EQX1760', 'Grader', 'Available'),
-            ('EQX1761', 'Grader', 'Available'),
-            ('EQX1762', 'Grader', 'Available'),
-            ('EQX1763', 'Grader', 'Available'),
-            ('EQX1764', 'Grader', 'Available'),
-            ('EQX1765', 'Grader', 'Available'),
-            ('EQX1766', 'Grader', 'Available'),
-            ('EQX1767', 'Grader', 'Available'),
-            ('EQX1768', 'Grader', 'Available'),
-            ('EQX1769', 'Grader', 'Available'),
-            ('EQX1770', 'Grader', 'Available'),
-            ('EQX1771', 'Grader', 'Available'),
-            ('EQX1772', 'Grader', 'Available'),
-            ('EQX1773', 'Grader', 'Available'),
-            ('EQX1774', 'Grader', 'Available'),
-            ('EQX1775', 'Grader', 'Available'),
-            ('EQX1776', 'Grader', 'Available'),
-            ('EQX1777', 'Grader', 'Available'),
-            ('EQX1778', 'Grader', 'Available'),
-            ('EQX1779', 'Grader', 'Available'),
-            ('EQX1780', 'Grader', 'Available'),
-            ('EQX1781', 'Grader', 'Available'),
-            ('EQX1782', 'Grader', 'Available'),
-            ('EQX1783', 'Grader', 'Available'),
-            ('EQX1784', 'Grader', 'Available'),
-            ('EQX1785', 'Grader', 'Available'),
-            ('EQX1786', 'Grader', 'Available'),
-            ('EQX1787', 'Grader', 'Available'),
-            ('EQX1788', 'Grader', 'Available'),
-            ('EQX1789', 'Grader', 'Available'),
-            ('EQX1790', 'Grader', 'Available'),
-            ('EQX1791', 'Grader', 'Available'),
-            ('EQX1792', 'Grader', 'Available'),
-            ('EQX1793', 'Grader', 'Available'),
-            ('EQX1794', 'Grader', 'Available'),
-            ('EQX1795', 'Grader', 'Available'),
-            ('EQX1796', 'Grader', 'Available'),
-            ('EQX1797', 'Grader', 'Available'),
-            ('EQX1798', 'Grader', 'Available'),
-            ('EQX1799', 'Grader', 'Available'),
-            ('EQX1800', 'Grader', 'Available'),
-            ('EQX1801', 'Grader', 'Available'),
-            ('EQX1802', 'Grader', 'Available'),
-            ('EQX1803', 'Grader', 'Available'),
-            ('EQX1804', 'Grader', 'Available'),
-            ('EQX1805', 'Grader', 'Available'),
-            ('EQX1806', 'Grader', 'Available'),
-            ('EQX1807', 'Grader', 'Available'),
-            ('EQX1808', 'Grader', 'Available'),
-            ('EQX1809', 'Grader', 'Available'),
-            ('EQX1810', 'Grader', 'Available'),
-            ('EQX1811', 'Grader', 'Available'),
-            ('EQX1812', 'Grader', 'Available'),
-            ('EQX1813', 'Grader', 'Available'),
-            ('EQX1814', 'Grader', 'Available'),
-            ('EQX1815', 'Grader', 'Available'),
-            ('EQX1816', 'Grader', 'Available'),
-            ('EQX1817', 'Grader', 'Available'),
-            ('EQX1818', 'Grader', 'Available'),
-            ('EQX1819', 'Grader', 'Available'),
-            ('EQX1820', 'Grader', 'Available'),
-            ('EQX1821', 'Grader', 'Available'),
-            ('EQX1822', 'Grader', 'Available'),
-            ('EQX1823', 'Grader', 'Available'),
-            ('EQX1824', 'Grader', 'Available'),
-            ('EQX1825', 'Grader', 'Available'),
-            ('EQX1826', 'Grader', 'Available'),
-            ('EQX1827', 'Grader', 'Available'),
-            ('EQX1828', 'Grader', 'Available'),
-            ('EQX1829', 'Grader', 'Available'),
-            ('EQX1830', 'Grader', 'Available'),
-            ('EQX1831', 'Grader', 'Available'),
-            ('EQX1832', 'Grader', 'Available'),
-            ('EQX1833', 'Grader', 'Available'),
-            ('EQX1834', 'Grader', 'Available'),
-            ('EQX1835', 'Grader', 'Available'),
-            ('EQX1836', 'Grader', 'Available'),
-            ('EQX1837', 'Grader', 'Available'),
-            ('EQX1838', 'Grader', 'Available'),
-            ('EQX1839', 'Grader', 'Available'),
-            ('EQX1840', 'Grader', 'Available'),
-            ('EQX1841', 'Grader', 'Available'),
-            ('EQX1842', 'Grader', 'Available'),
-            ('EQX1843', 'Grader', 'Available'),
-            ('EQX1844', 'Grader', 'Available'),
-            ('EQX1845', 'Grader', 'Available'),
-            ('EQX1846', 'Grader', 'Available'),
-            ('EQX1847', 'Grader', 'Available'),
-            ('EQX1848', 'Grader', 'Available'),
-            ('EQX1849', 'Grader', 'Available'),
-            ('EQX1850', 'Grader', 'Available')
-        ]
-        
-        backfill_demo_site_ids()
-
-        cursor.executemany("""
-        INSERT INTO Vendor (EquipmentID, Type, Availability)
-        VALUES (?, ?, ?)
-        """, equipment_list)
-
-        conn.commit()
-        print("✅ Vendor table pre-populated with default equipment data.")
-
-    conn.close()
+def canonical_rental_type(value):
+    """Map ' flexible ', 'RIGID', ... onto the stored spelling; None stays None."""
+    if value is None or str(value).strip() == "":
+        return None
+    for rt in RENTAL_TYPES:
+        if str(value).strip().lower() == rt.lower():
+            return rt
+    raise ValueError(f"Unknown rental type {value!r}; expected one of {', '.join(RENTAL_TYPES)}.")
+
+def canonical_availability(value):
+    for state in AVAILABILITY_STATES:
+        if str(value).strip().lower() == state.lower():
+            return state
+    raise ValueError(f"Unknown availability {value!r}; expected one of {', '.join(AVAILABILITY_STATES)}.")
+
+def init_db():
+    """Bring the schema up to date. Cheap after the first call in a process."""
+    migrate()
+    install_shards()
 
 
 def add_rental_request(equipment_id: str, requester_site_id: int, location: str, time_from: str, time_to: str):
-    with get_connection() as conn:
+    """
+    Ask the owner of a shared unit for it from `time_from` to `time_to`. The
+    window is booked on the unit's share calendar right away, so a request
+    overlapping another open or approved one is refused (ValueError).
+    """
+    start, end = parse_time(time_from), parse_time(time_to)
+    with get_connection(immediate=True) as conn:
         cur = conn.execute("SELECT SiteID FROM Vendor WHERE EquipmentID = ?", (equipment_id,))
         row = cur.fetchone()
         owner_site_id = row[0] if row else None
@@ -508,57 +68,122 @@ def add_rental_request(equipment_id: str, requester_site_id: int, location: str,
         if owner_site_id == requester_site_id:
             raise ValueError("You cannot request your own equipment.")
 
-        conn.execute(
+        cur = conn.execute(
             "INSERT INTO RentalRequests (EquipmentID, RequesterSiteID, OwnerSiteID, Location, TimeFrom, TimeTo) "
             "VALUES (?,?,?,?,?,?)",
             (equipment_id, requester_site_id, owner_site_id, location, time_from, time_to)
         )
-        conn.commit()
+        # Raises (and rolls the request back) if the window is taken
+        book(equipment_id, start, end, "Share", ref_id=cur.lastrowid, site_id=requester_site_id)
+        on_commit(lambda: publish(RequestCreated(equipment_id, requester_site_id, owner_site_id)))
 
 
+def search_equipment(query: str, limit: int = 20, columns=VENDOR_COLUMNS, **filters) -> pd.DataFrame:
+    """
+    Best `limit` units matching `query` (word prefixes over ID, type, location
+    and site contact), best first. Extra `filters` as in vendors_frame()
+    (e.g. ready_to_share=True) are applied to those top matches.
+    """
+    ids = search_ids(query, limit)
+    if not ids:
+        return vendors_frame(columns, equipment_ids=[])
+    rank = {eq_id: i for i, eq_id in enumerate(ids)}
+    frame = vendors_frame(columns, equipment_ids=ids, **filters)
+    return frame.sort_values("EquipmentID", key=lambda s: s.map(rank), ignore_index=True)
+
 def get_requests_for_owner(site_id: int) -> pd.DataFrame:
-    with get_connection() as conn:
-        return pd.read_sql_query(
-            """
-            SELECT RequestID, EquipmentID, RequesterSiteID, OwnerSiteID, Location, TimeFrom, TimeTo, Status
-            FROM RentalRequests
-            WHERE OwnerSiteID = ? AND Status = 'Pending'
-            ORDER BY RequestID DESC
-            """,
-            conn, params=(site_id,)
-        )
+    return requests_frame(owner_site_id=site_id, status="Pending")
 
-def approve_request(request_id: int, requester_site_id: int, equipment_id: str):
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("UPDATE RentalRequests SET Status='Approved' WHERE RequestID=?", (request_id,))
-        cur.execute("UPDATE Vendor SET SharedBySiteID=?, ReadyToShare=0 WHERE EquipmentID=?",
-                    (requester_site_id, equipment_id))
-        conn.commit()
+def fetch_request_page(before: int | None = None, page_size: int = PAGE_SIZE, owner_site_id: int | None = None,
+                       status: str | None = None, include_archive: bool = False):
+    """
+    One keyset page of RentalRequests, newest first, starting below the
+    `before` RequestID cursor. Returns (page DataFrame, next cursor or None).
+    """
+    page = requests_frame(owner_site_id=owner_site_id, status=status, before=before, limit=page_size + 1,
+                          include_archive=include_archive)
+    if len(page) > page_size:
+        page = page.iloc[:page_size]
+        return page, int(page["RequestID"].iloc[-1])
+    return page, None
 
-def update_request_status(request_id: int, status: str, requester_site_id: int):
-    with get_connection() as conn:
-        cur = conn.cursor()
+# Allowed RentalRequests status changes; anything else is a conflict
+REQUEST_TRANSITIONS = {"Pending": ("Approved", "Rejected")}
 
-        # Update request status
-        cur.execute(
-            "UPDATE RentalRequests SET Status = ? WHERE RequestID = ?",
-            (status, request_id)
-        )
 
-        # Store RequestID in Vendor table for the related equipment
-        cur.execute(
-            """
-            UPDATE Vendor
-            SET SharedBySiteID = ?
-            WHERE EquipmentID = (
-                SELECT EquipmentID FROM RentalRequests WHERE RequestID = ?
-            )
-            """,
-            (requester_site_id, request_id)
-        )
+class TransitionResult(NamedTuple):
+    ok: bool
+    status: str | None       # the request's status after the call (None if it doesn't exist)
+    message: str
+
+
+class _Conflict(Exception):
+    pass
+
+
+def transition_request(request_id: int, status: str, expected_version: int | None = None) -> TransitionResult:
+    """
+    Move a request out of Pending with compare-and-swap, no locks held between
+    read and write. The UPDATE only matches while the request is still Pending
+    (and, if given, still at `expected_version`, the Version the caller read).
+
+    Approving also hands the unit to the requester, guarded on the unit still
+    being on share (ReadyToShare = 1); if another approval got it first, the
+    request is left Pending. Rejecting never touches Vendor but frees the
+    request's window on the share calendar.
+    """
+    allowed = {s for targets in REQUEST_TRANSITIONS.values() for s in targets}
+    if status not in allowed:
+        raise ValueError(f"Invalid request status: {status!r}. Use one of {sorted(allowed)}.")
+
+    try:
+        with get_connection() as conn:
+            query = ("UPDATE RentalRequests SET Status = ?, ClosedAt = CURRENT_TIMESTAMP, Version = Version + 1 "
+                     "WHERE RequestID = ? AND Status = 'Pending'")
+            params = [status, request_id]
+            if expected_version is not None:
+                query += " AND Version = ?"
+                params.append(expected_version)
+            row = conn.execute(query + " RETURNING EquipmentID, RequesterSiteID, OwnerSiteID", params).fetchone()
+
+            if row is None:
+                current = conn.execute("SELECT Status FROM RentalRequests WHERE RequestID = ?", (request_id,)).fetchone()
+                if current is None:
+                    return TransitionResult(False, None, f"Request {request_id} no longer exists.")
+                if current[0] != "Pending":
+                    return TransitionResult(False, current[0], f"Request {request_id} was already {current[0]}.")
+                return TransitionResult(False, current[0], f"Request {request_id} changed since you loaded it; refresh and retry.")
+
+            equipment_id, requester_site_id, owner_site_id = row
+            if status == "Approved":
+                handed = conn.execute(
+                    "UPDATE Vendor SET SharedBySiteID = ?, ReadyToShare = 0, Version = Version + 1 "
+                    "WHERE EquipmentID = ? AND ReadyToShare = 1 RETURNING EquipmentID",
+                    (requester_site_id, equipment_id)
+                ).fetchone()
+                if handed is None:
+                    # Rolls back the status change above
+                    raise _Conflict(f"{equipment_id} is no longer on share; it may have been given to another site.")
+                on_commit(lambda: publish(ShareChanged(equipment_id, False, owner_site_id)))
+            else:
+                release("Share", request_id)
+            on_commit(lambda: publish(RequestStatusChanged(request_id, status, requester_site_id, owner_site_id)))
+    except _Conflict as e:
+        return TransitionResult(False, "Pending", str(e))
+    return TransitionResult(True, status, f"Request {request_id} {status.lower()}.")
+
+
+def approve_request(request_id: int, requester_site_id: int | None = None, equipment_id: str | None = None,
+                    expected_version: int | None = None) -> TransitionResult:
+    """Approve a Pending request (see transition_request). The site and unit come from the request row."""
+    return transition_request(request_id, "Approved", expected_version)
+
+
+def update_request_status(request_id: int, status: str, requester_site_id: int | None = None,
+                          expected_version: int | None = None) -> TransitionResult:
+    """Approve or reject a Pending request (see transition_request)."""
+    return transition_request(request_id, status, expected_version)
 
-        conn.commit()
 
 
 
@@ -566,135 +191,295 @@ def update_request_status(request_id: int, status: str, requester_site_id: int):
 
 
 def insert_site(site_id, location, contact, equipment_id=None):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO SiteInfo (SiteID, EquipmentID, Location, ContactDetails) VALUES (?, ?, ?, ?)",
-        (site_id, equipment_id, location, contact)
-    )
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO SiteInfo (SiteID, EquipmentID, Location, ContactDetails) VALUES (?, ?, ?, ?)",
+            (site_id, equipment_id, location, contact)
+        )
 
 
 
 def insert_vendor(equipment_id, type_, site_id, operating_days, location, start_date, rental_type, availability="Available"):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO Vendor (
-            EquipmentID, Type, SiteID, OperatingDays, Location,
-            CheckOutDate, Availability, RentalType
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (equipment_id, type_, site_id, operating_days, location, start_date, availability, rental_type))
-    conn.commit()
-    conn.close()
-
-
-
-def fetch_vendors(filter_by=None, site_id=None):
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    query = "SELECT * FROM Vendor WHERE 1=1"
-    params = []
-    
-    if filter_by == "Available":
-        query += " AND Availability='Available'"
-    elif filter_by == "Rented":
-        query += " AND Availability='Rented'"
-    
-    if site_id:
-        query += " AND SiteID=?"
-        params.append(site_id)
-    
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    rental_type = canonical_rental_type(rental_type)
+    availability = canonical_availability(availability)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO Vendor (
+                EquipmentID, Type, SiteID, OperatingDays, Location,
+                CheckOutDate, Availability, RentalType
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (equipment_id, type_, site_id, operating_days, location, start_date, availability, rental_type))
+
+
+
+def fetch_vendors(filter_by=None, site_id=None) -> list[VendorRow]:
+    """VendorCurrent rows as VendorRow records (still plain tuples for positional callers)."""
+    return list_vendors(filter_by=filter_by, site_id=site_id)
+
+def fetch_vendor_page(after: str | None = None, page_size: int = PAGE_SIZE, **filters):
+    """
+    One keyset page of VendorCurrent in EquipmentID order, starting after the
+    `after` cursor. Filters as in repository.vendors_frame (filter_by, site_id,
+    ready_to_share, exclude_site_id, rental_type; optional columns).
+    Returns (page DataFrame, cursor for the next page or None on the last page).
+    """
+    page = vendors_frame(after=after, limit=page_size + 1, **filters)
+    if len(page) > page_size:
+        page = page.iloc[:page_size]
+        return page, page["EquipmentID"].iloc[-1]
+    return page, None
 
 def get_available_types():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT DISTINCT Type
-        FROM Vendor
-        WHERE Availability = 'Available'
-    """)
-    types = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return types
+    # Served from FleetSummary: one row per group, not one per unit
+    return unit_types("Available")
 
 # Get one available equipmentID for a given type
 def get_available_equipment(type_):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT EquipmentID FROM Vendor WHERE Type=? AND Availability='Available' LIMIT 1", (type_,))
-    row = cursor.fetchone()
-    conn.close()
-    return row[0] if row else None
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT EquipmentID FROM Vendor WHERE Type=? AND Availability='Available' LIMIT 1", (type_,))
+        row = cursor.fetchone()
+        return row[0] if row else None
 
 # Update Vendor row when rented
 def rent_equipment(equipment_id, site_id, operating_days, location, start_date, rental_type):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Compute end date and days left
-    cursor.execute("SELECT date(?, '+' || ? || ' days')", (start_date, operating_days))
-    end_date = cursor.fetchone()[0]
-
-    cursor.execute("SELECT julianday(?) - julianday('now')", (end_date,))
-    days_left = int(cursor.fetchone()[0])
-
-    # Update Vendor table (mark rented + add details)
-    cursor.execute("""
-        UPDATE Vendor
-        SET SiteID = ?,
-            CheckOutDate = ?,
-            CheckInDate = ?,
-            OperatingDays = ?,
-            DaysLeft = ?,
-            Location = ?,
-            RentalType = ?,
-            Availability = 'Rented'
-        WHERE EquipmentID = ?
-    """, (site_id, start_date, end_date, operating_days, days_left, location, rental_type, equipment_id))
-
-    conn.commit()
-    conn.close()
+    """
+    Rent one unit to `site_id`. Claimed like reserve_units: the UPDATE only
+    matches while the unit is still 'Available', under BEGIN IMMEDIATE, so a
+    concurrent claim makes this one raise ValueError instead of overwriting it.
+    """
+    rental_type = canonical_rental_type(rental_type)
+    with get_connection(immediate=True) as conn:
+        cursor = conn.cursor()
+
+        # Compute end date and days left
+        cursor.execute("SELECT date(?, '+' || ? || ' days')", (start_date, operating_days))
+        end_date = cursor.fetchone()[0]
+
+        cursor.execute("SELECT julianday(?) - julianday('now')", (end_date,))
+        days_left = int(cursor.fetchone()[0])
+
+        # Update Vendor table (mark rented + add details)
+        cursor.execute("""
+            UPDATE Vendor
+            SET SiteID = ?,
+                CheckOutDate = ?,
+                CheckInDate = ?,
+                OperatingDays = ?,
+                DaysLeft = ?,
+                Location = ?,
+                RentalType = ?,
+                Availability = 'Rented',
+                Version = Version + 1
+            WHERE EquipmentID = ? AND Availability = 'Available'
+        """, (site_id, start_date, end_date, operating_days, days_left, location, rental_type, equipment_id))
+        if cursor.rowcount == 0:
+            raise ValueError(f"{equipment_id} is not available; it may have just been rented to another site.")
+
+        # Append to rental history in the same transaction as the status flip
+        cursor.execute("""
+            INSERT INTO Rentals (EquipmentID, SiteID, Type, RentalType, Location, OperatingDays, CheckOutDate, CheckInDate)
+            SELECT EquipmentID, ?, Type, ?, ?, ?, ?, ?
+            FROM Vendor
+            WHERE EquipmentID = ?
+        """, (site_id, rental_type, location, operating_days, start_date, end_date, equipment_id))
+        # Raises (and undoes the rental) if the unit is already booked then
+        book(equipment_id, start_date, end_date, "Rental", ref_id=cursor.lastrowid, site_id=site_id)
+        on_commit(lambda: publish(EquipmentRented(equipment_id, site_id, rental_type)))
+
+def reserve_units(type_, quantity: int, site_id, operating_days, location, start_date, rental_type) -> list[str]:
+    """
+    Rent `quantity` available units of `type_` to `site_id` in one transaction.
+
+    The units are claimed by a single UPDATE ... RETURNING that only matches
+    rows still 'Available', under BEGIN IMMEDIATE, so two concurrent orders can
+    never get the same unit. Units with a rental booked in the window are
+    skipped by a calendar probe inside the same statement, and only the first
+    `quantity` in EquipmentID order are touched. Raises ValueError (and claims
+    nothing) if fewer than `quantity` are free. Returns the claimed EquipmentIDs.
+    """
+    quantity = int(quantity)
+    if quantity < 1:
+        raise ValueError("Quantity must be at least 1.")
+    rental_type = canonical_rental_type(rental_type)
+
+    with get_connection(immediate=True) as conn:
+        end_date, days_left = conn.execute(
+            "SELECT date(?, '+' || ? || ' days'), CAST(julianday(date(?, '+' || ? || ' days')) - julianday('now') AS INTEGER)",
+            (start_date, operating_days, start_date, operating_days)
+        ).fetchone()
+        claimed = sorted(row[0] for row in conn.execute(f"""
+            UPDATE Vendor
+            SET SiteID = :site_id,
+                CheckOutDate = :start_date,
+                CheckInDate = :end_date,
+                OperatingDays = :operating_days,
+                DaysLeft = :days_left,
+                Location = :location,
+                RentalType = :rental_type,
+                Availability = 'Rented',
+                Version = Version + 1
+            WHERE Availability = 'Available'
+              AND EquipmentID IN (
+                  SELECT v.EquipmentID FROM Vendor v
+                  WHERE v.Type = :type AND v.Availability = 'Available'
+                    AND {no_overlap_sql("v.EquipmentID")}
+                  ORDER BY v.EquipmentID
+                  LIMIT :quantity
+              )
+            RETURNING EquipmentID
+        """, {
+            "site_id": site_id, "start_date": start_date, "end_date": end_date, "operating_days": operating_days,
+            "days_left": days_left, "location": location, "rental_type": rental_type, "type": type_,
+            "quantity": quantity, "kind": "Rental", "start": parse_time(start_date), "end": parse_time(end_date),
+        }).fetchall())
+
+        if len(claimed) < quantity:
+            # Raising rolls the partial claim back
+            raise ValueError(f"Only {len(claimed)} {type_}(s) available, {quantity} requested.")
+
+        for equipment_id in claimed:
+            rental_id = conn.execute("""
+                INSERT INTO Rentals (EquipmentID, SiteID, Type, RentalType, Location, OperatingDays, CheckOutDate, CheckInDate)
+                SELECT EquipmentID, SiteID, Type, RentalType, Location, OperatingDays, CheckOutDate, CheckInDate
+                FROM Vendor
+                WHERE EquipmentID = ?
+            """, (equipment_id,)).lastrowid
+            book(equipment_id, start_date, end_date, "Rental", ref_id=rental_id, site_id=site_id)
+
+        def announce():
+            for eq_id in claimed:
+                publish(EquipmentRented(eq_id, site_id, rental_type))
+        on_commit(announce)
+    return claimed
+
+# --- Rental history (Rentals table; include_archive=True also reads RentalsArchive) ---
+def _rentals_source(include_archive: bool) -> str:
+    return "RentalsAll" if include_archive else "Rentals"
+
+# The archiver moves rows between the two, so both version every rental read
+RENTAL_TABLES = ("Rentals", "RentalsArchive")
+
+@cached(*RENTAL_TABLES)
+def get_rentals(site_id=None, start=None, end=None, include_archive=False) -> pd.DataFrame:
+    """
+    Rentals whose CheckOutDate falls in [start, end) (ISO dates, either bound
+    optional), optionally for one site. Served by (SiteID, CheckOutDate).
+    """
+    query = f"""
+        SELECT RentalID, EquipmentID, SiteID, Type, RentalType, Location,
+               OperatingDays, CheckOutDate, CheckInDate
+        FROM {_rentals_source(include_archive)}
+        WHERE 1=1
+    """
+    params = []
+    if site_id is not None:
+        query += " AND SiteID = ?"
+        params.append(site_id)
+    if start is not None:
+        query += " AND CheckOutDate >= ?"
+        params.append(str(start))
+    if end is not None:
+        query += " AND CheckOutDate < ?"
+        params.append(str(end))
+    query += " ORDER BY CheckOutDate"
+    with get_connection() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+@cached(*RENTAL_TABLES)
+def get_equipment_rental_history(equipment_id: str, include_archive=False) -> pd.DataFrame:
+    """Every rental of one unit, newest first. Served by (EquipmentID, CheckOutDate)."""
+    with get_connection() as conn:
+        return pd.read_sql_query(
+            f"""
+            SELECT RentalID, EquipmentID, SiteID, Type, RentalType, Location,
+                   OperatingDays, CheckOutDate, CheckInDate
+            FROM {_rentals_source(include_archive)}
+            WHERE EquipmentID = ?
+            ORDER BY CheckOutDate DESC
+            """,
+            conn, params=(equipment_id,)
+        )
+
+@cached(*RENTAL_TABLES)
+def get_daily_rental_counts(site_id: int, start=None, end=None, include_archive=False) -> pd.DataFrame:
+    """Rentals started per day for a site, as (CheckOutDate, Rentals)."""
+    query = f"SELECT CheckOutDate, COUNT(*) AS Rentals FROM {_rentals_source(include_archive)} WHERE SiteID = ?"
+    params = [site_id]
+    if start is not None:
+        query += " AND CheckOutDate >= ?"
+        params.append(str(start))
+    if end is not None:
+        query += " AND CheckOutDate < ?"
+        params.append(str(end))
+    query += " GROUP BY CheckOutDate ORDER BY CheckOutDate"
+    with get_connection() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+# Also exported as the "rentals" snapshot dataset (database/snapshot.py); the forecast
+# wants all of history, so this reads the archive too
+RENTAL_HISTORY_SQL = """
+    SELECT r.EquipmentID, r.Type, r.SiteID, r.CheckOutDate, r.CheckInDate,
+           COALESCE(u.EngineHourDay, v.EngineHourDay, 0) AS EngineHourDay,
+           COALESCE(u.IdleHourDay, v.IdleHourDay, 0) AS IdleHourDay,
+           r.OperatingDays
+    FROM RentalsAll r
+    LEFT JOIN VendorCurrent v ON v.EquipmentID = r.EquipmentID
+    LEFT JOIN (
+        SELECT EquipmentID,
+               AVG(COALESCE(EngineSum, 0)) AS EngineHourDay,
+               AVG(COALESCE(IdleSum, 0)) AS IdleHourDay
+        FROM TelemetryDay
+        GROUP BY EquipmentID
+    ) u ON u.EquipmentID = r.EquipmentID
+    ORDER BY r.CheckOutDate
+"""
+
+@cached(*RENTAL_TABLES, "Vendor", "EquipmentLatest", "TelemetryDay")
+def get_rental_history_for_analysis() -> pd.DataFrame:
+    """
+    Rental history in the shape modules/analysis.py works with
+    (EquipmentID, Type, SiteID, CheckOutDate, CheckInDate, EngineHourDay,
+    IdleHourDay, OperatingDays). Usage is the unit's average day from the
+    telemetry day rollups, or its current values before any rollup exists.
+    """
+    with get_connection() as conn:
+        df = pd.read_sql_query(RENTAL_HISTORY_SQL, conn)
+    df["CheckOutDate"] = pd.to_datetime(df["CheckOutDate"], errors="coerce")
+    df["CheckInDate"] = pd.to_datetime(df["CheckInDate"], errors="coerce")
+    return df
 
 def get_available_equipment_ids(type_):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT EquipmentID
-        FROM Vendor
-        WHERE Type = ? AND Availability = 'Available'
-    """, (type_,))
-    ids = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return ids
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT EquipmentID
+            FROM Vendor
+            WHERE Type = ? AND Availability = 'Available'
+        """, (type_,))
+        ids = [row[0] for row in cursor.fetchall()]
+        return ids
 
 # Update usage (engine + idle hours) for rented equipment
+# Appends a sample to EquipmentTelemetry; today's totals are derived in EquipmentLatest
 def update_usage(equipment_id, engine_hours, idle_hours):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE Vendor
-            SET 
-                EngineHourDay = (COALESCE(EngineHourDay, 0) + ?) % 24,
-                IdleHourDay   = (COALESCE(IdleHourDay, 0) + ?) % 24
-            WHERE EquipmentID = ? AND Availability = 'Rented';
-    """, (engine_hours, idle_hours, equipment_id))
-    conn.commit()
-    conn.close()
+    if record_sample(equipment_id, engine_hours=engine_hours, idle_hours=idle_hours):
+        on_commit(lambda: publish(UsageUpdated((equipment_id,))))
 
 import time
 import random
 
+def get_rented_equipment_ids():
+    with get_connection() as conn:
+        return [r[0] for r in conn.execute("SELECT EquipmentID FROM Vendor WHERE Availability = 'Rented'")]
+
 def simulate_realtime_updates():
+    from database.ingest import get_writer
+    writer = get_writer()
     while True:
-        rented_ids = fetch_vendors(filter_by="Rented") 
-        equipment_ids = [row[0] for row in rented_ids]
+        equipment_ids = get_rented_equipment_ids()
         if equipment_ids:
             # Pick a random rented equipment
             eq_id = random.choice(equipment_ids)
@@ -703,117 +488,44 @@ def simulate_realtime_updates():
             engine_hours = round(random.uniform(0.1, 1.0), 2)
             idle_hours   = round(random.uniform(0.0, 0.5), 2)
 
-            update_usage(eq_id, engine_hours, idle_hours)
-            print(f"Updated {eq_id}: +{engine_hours} engine hr, +{idle_hours} idle hr")
+            writer.submit(eq_id, engine_hours=engine_hours, idle_hours=idle_hours)
+            print(f"Queued {eq_id}: +{engine_hours} engine hr, +{idle_hours} idle hr "
+                  f"({writer.stats()['samples_per_sec']:.1f} samples/s)")
 
         time.sleep(2)  # wait 2 sec like real-time stream
 
 def update_fuel(equipment_id, fuel):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE Vendor
-        SET Fuel = ?
-        WHERE EquipmentID = ? AND Availability = 'Rented'
-    """, (fuel, equipment_id))
-    conn.commit()
-    conn.close()
+    if record_sample(equipment_id, fuel=fuel):
+        on_commit(lambda: publish(UsageUpdated((equipment_id,))))
 
 def mark_ready_to_share(equipment_id: str, ready: bool, shared_by_site_id: int | None):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "UPDATE Vendor SET ReadyToShare=?, SharedBySiteID=? WHERE EquipmentID=?",
-        (1 if ready else 0, shared_by_site_id if ready else None, equipment_id),
-    )
-    conn.commit()
-    conn.close()
-
-def fetch_share_ready(exclude_site_id: int | None = None):
-    ensure_vendor_share_columns()  # make sure columns exist
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        if exclude_site_id is None:
-            cur.execute("SELECT * FROM Vendor WHERE ReadyToShare=1")
-        else:
-            cur.execute("SELECT * FROM Vendor WHERE ReadyToShare=1 AND SiteID<>?", (exclude_site_id,))
-        return cur.fetchall()
-    finally:
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE Vendor SET ReadyToShare=?, SharedBySiteID=?, Version=Version+1 WHERE EquipmentID=? RETURNING SiteID",
+            (1 if ready else 0, shared_by_site_id if ready else None, equipment_id),
+        )
+        row = cur.fetchone()
+        if row:
+            on_commit(lambda: publish(ShareChanged(equipment_id, bool(ready), row[0])))
 
+def fetch_share_ready(exclude_site_id: int | None = None) -> list[VendorRow]:
+    return list_vendors(ready_to_share=True, exclude_site_id=exclude_site_id)
 
 # --- add near your other DB helpers ---
 def ensure_vendor_share_columns():
     """
-    Ensures Vendor table exists and has:
-      - RentalType TEXT CHECK(RentalType IN ('Rigid','Flexible'))
-      - ReadyToShare INTEGER DEFAULT 0
-      - SharedBySiteID INTEGER
-    (Won't destroy existing data.)
+    Kept for older callers: the share columns (RentalType, ReadyToShare,
+    SharedBySiteID) are now added by the migrations in database/migrations.py.
     """
-    with get_connection() as conn:
-        cur = conn.cursor()
-
-        # Create if missing (matches your schema)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS Vendor (
-                EquipmentID TEXT PRIMARY KEY,
-                Type TEXT,
-                SiteID INTEGER,
-                CheckOutDate TEXT,
-                CheckInDate TEXT,
-                EngineHourDay REAL,
-                IdleHourDay REAL,
-                OperatingDays INTEGER,
-                DaysLeft INTEGER,
-                Fuel REAL,
-                Location TEXT,
-                Availability TEXT CHECK(Availability IN ('Available', 'Rented')) DEFAULT 'Available',
-                RentalType TEXT CHECK(RentalType IN ('Rigid', 'Flexible')),
-                ReadyToShare INTEGER DEFAULT 0,
-                SharedBySiteID INTEGER
-            )
-        """)
-
-        # Make sure columns exist even if table was older
-        cur.execute("PRAGMA table_info(Vendor)")
-        existing = {row[1] for row in cur.fetchall()}
-
-        if "RentalType" not in existing:
-            cur.execute("ALTER TABLE Vendor ADD COLUMN RentalType TEXT")
-        if "ReadyToShare" not in existing:
-            cur.execute("ALTER TABLE Vendor ADD COLUMN ReadyToShare INTEGER DEFAULT 0")
-        if "SharedBySiteID" not in existing:
-            cur.execute("ALTER TABLE Vendor ADD COLUMN SharedBySiteID INTEGER")
-        conn.commit()
+    migrate()
 
 def get_flexible_rentals() -> pd.DataFrame:
     """
-    Fetch Flexible rentals from Vendor, tolerant to case/spacing.
+    Fetch Flexible rentals from Vendor. RentalType is stored canonically
+    (see canonical_rental_type / migration 6), so this is an index seek.
     """
-    with get_connection() as conn:
-        q = """
-        SELECT
-            EquipmentID,
-            Type,
-            SiteID,
-            CheckOutDate,
-            CheckInDate,
-            EngineHourDay,
-            IdleHourDay,
-            OperatingDays,
-            DaysLeft,
-            Fuel,
-            Location,
-            Availability,
-            RentalType,
-            ReadyToShare,
-            SharedBySiteID
-        FROM Vendor
-        WHERE TRIM(LOWER(COALESCE(RentalType,''))) = 'flexible'
-        """
-        return pd.read_sql_query(q, conn)
+    return vendors_frame(rental_type="Flexible")
 
 def set_ready_to_share(equipment_id: str, value: int = 1, shared_by_site_id: int | None = None):
     """
@@ -825,20 +537,27 @@ def set_ready_to_share(equipment_id: str, value: int = 1, shared_by_site_id: int
         if int(value) == 1:
             # If caller didn’t pass a site, keep existing
             cur.execute(
-                "UPDATE Vendor SET ReadyToShare = 1, SharedBySiteID = COALESCE(?, SharedBySiteID) WHERE EquipmentID = ?",
+                "UPDATE Vendor SET ReadyToShare = 1, SharedBySiteID = COALESCE(?, SharedBySiteID), Version = Version + 1 "
+                "WHERE EquipmentID = ? "
+                "RETURNING SiteID",
                 (shared_by_site_id, equipment_id)
             )
         else:
             cur.execute(
-                "UPDATE Vendor SET ReadyToShare = 0, SharedBySiteID = NULL WHERE EquipmentID = ?",
+                "UPDATE Vendor SET ReadyToShare = 0, SharedBySiteID = NULL, Version = Version + 1 "
+                "WHERE EquipmentID = ? RETURNING SiteID",
                 (equipment_id,)
             )
-        conn.commit()
+        row = cur.fetchone()
+        if row:
+            on_commit(lambda: publish(ShareChanged(equipment_id, int(value) == 1, row[0])))
 
 
-def get_all_rental_requests() -> pd.DataFrame:
+@cached("RentalRequests", "RentalRequestsArchive")
+def get_all_rental_requests(include_archive=False) -> pd.DataFrame:
     """
-    Fetch all RentalRequests rows for debugging/inspection.
+    Fetch all RentalRequests rows for debugging/inspection (plus archived ones with include_archive=True).
     """
+    source = "RentalRequestsAll" if include_archive else "RentalRequests"
     with get_connection() as conn:
-        return pd.read_sql_query("SELECT * FROM RentalRequests ORDER BY RequestID DESC", conn)
\ No newline at end of file
+        return pd.read_sql_query(f"SELECT * FROM {source} ORDER BY RequestID DESC", conn)
\ No newline at end of file
@@ -0,0 +1,323 @@
+# database/fleet_io.py
+"""
+Streaming bulk import/export of the fleet (Vendor) and site (SiteInfo) tables.
+
+    python -m database.fleet_io import vendor fleet.csv
+    python -m database.fleet_io import sites sites.ndjson --mode insert
+    python -m database.fleet_io export vendor - --format ndjson > fleet.ndjson
+
+Files are CSV (header row) or NDJSON (one JSON object per line), picked by
+extension or --format; "-" is stdin/stdout. The columns are the CSV header
+(or the first NDJSON object's keys) and must include the table's key.
+
+Imports read the file lazily and write BULK_CHUNK_ROWS rows per executemany,
+so memory stays flat however large the file is. By default (bulk=True) the
+table's secondary indexes and the FleetSummary/VendorSearch triggers are
+dropped for the load; the indexes are rebuilt and both tables recomputed at
+the end. Drop, load and rebuild are one IMMEDIATE transaction: a failed row
+or a killed process leaves the table, its indexes and triggers as they were,
+and readers keep seeing the indexed table until the commit. Other writers
+wait for the whole load. Change-capture triggers stay on, so live pages pick
+up every imported row. bulk=False (--incremental) keeps everything in place
+and commits every BULK_COMMIT_ROWS rows (each committed batch is kept if a
+later row fails), which suits a small file into a large, live table.
+
+Rows are keyed on EquipmentID (vendor) or (SiteID, EquipmentID) (sites).
+mode="upsert" updates the file's columns on existing keys and inserts the
+rest; mode="insert" leaves existing keys alone. Re-running the same file is
+safe.
+
+Exports stream rows in key order from one read transaction.
+"""
+import argparse
+import csv
+import json
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import NamedTuple
+
+from utils.config import BULK_CHUNK_ROWS, BULK_COMMIT_ROWS
+from database.connection import get_connection, read_snapshot
+from database.migrations import INDEXES, indexes_on
+from database.db import canonical_availability, canonical_rental_type, init_db
+from database.fleet_summary import fleet_summary_trigger_sql, rebuild_fleet_summary
+from database.search import vendor_search_trigger_sql, rebuild_vendor_search
+
+FORMATS = ("csv", "ndjson")
+MODES = ("upsert", "insert")
+
+
+class BulkTable(NamedTuple):
+    name: str
+    key: tuple[str, ...]
+    unique: bool              # key is the PRIMARY KEY (ON CONFLICT); otherwise matched by probe_index
+    probe_index: str | None   # index the key match needs; kept during loads
+
+
+TABLES = {
+    "vendor": BulkTable("Vendor", ("EquipmentID",), True, None),
+    # A site can have several SiteInfo rows (one per unit); rowid is the only real key
+    "sites": BulkTable("SiteInfo", ("SiteID", "EquipmentID"), False, "idx_siteinfo_site"),
+}
+
+# Row versions (optimistic concurrency) are bumped by every UPDATE; files never carry them
+MANAGED_COLUMNS = {"Version"}
+
+# Stored spellings are enforced by triggers; accept what people type
+NORMALIZE = {
+    "Availability": lambda v: "Available" if v is None else canonical_availability(v),
+    "RentalType": canonical_rental_type,
+}
+
+
+# Tables kept in step by per-row triggers. A bulk load drops the triggers and
+# rebuilds the table once instead: a SiteInfo row re-indexes every unit of its
+# site in VendorSearch, which is quadratic over a site file.
+DERIVED = [
+    (fleet_summary_trigger_sql(), rebuild_fleet_summary),
+    (vendor_search_trigger_sql(), rebuild_vendor_search),
+]
+
+_TRIGGER = re.compile(r"CREATE TRIGGER IF NOT EXISTS (\w+)")
+_TRIGGER_TABLE = re.compile(r" ON (\w+)\s")
+
+
+class BulkResult(NamedTuple):
+    rows: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _table(kind: str) -> BulkTable:
+    if kind not in TABLES:
+        raise ValueError(f"Unknown table {kind!r}; expected one of {', '.join(TABLES)}.")
+    return TABLES[kind]
+
+
+def _format(path: str, fmt: str | None) -> str:
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv" if path.endswith(".csv") else None)
+    if fmt not in FORMATS:
+        raise ValueError(f"Can't tell the format of {path!r}; pass fmt as one of {', '.join(FORMATS)}.")
+    return fmt
+
+
+@contextmanager
+def _open(path: str, mode: str):
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+    else:
+        with open(path, mode, newline="", encoding="utf-8") as f:
+            yield f
+
+
+def _batches(iterable, size: int):
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+class _Progress:
+    """Counts rows and prints the running rows/sec every BULK_COMMIT_ROWS rows."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._next = BULK_COMMIT_ROWS
+
+    def add(self, n: int):
+        self.rows += n
+        if self.rows >= self._next:
+            self._next += BULK_COMMIT_ROWS
+            print(f"⏳ {self.label}: {self.rows:,} rows ({self.result().rate:,.0f} rows/s)", file=sys.stderr)
+
+    def result(self) -> BulkResult:
+        return BulkResult(self.rows, time.perf_counter() - self.started)
+
+
+# --- Import ---
+
+def read_records(path: str, fmt: str | None = None):
+    """Yield one dict per row of a CSV/NDJSON file; empty CSV fields are None."""
+    fmt = _format(path, fmt)
+    with _open(path, "r") as f:
+        if fmt == "csv":
+            for record in csv.DictReader(f):
+                yield {k: (v if v != "" else None) for k, v in record.items()}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _columns(conn, table: str) -> list[str]:
+    """The table's importable/exportable columns."""
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({table})") if r[1] not in MANAGED_COLUMNS]
+
+
+def _statements(spec: BulkTable, columns: list[str], mode: str, versioned: bool = False) -> list[tuple[str, callable]]:
+    """(sql, row values -> parameters) pairs run in order for every chunk."""
+    names, marks = ", ".join(columns), ", ".join("?" * len(columns))
+    rest = [c for c in columns if c not in spec.key]
+    bump = ", Version = Version + 1" if versioned else ""
+    if spec.unique:
+        action = "NOTHING"
+        if mode == "upsert" and rest:
+            action = "UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in rest) + bump
+        sql = (f"INSERT INTO {spec.name} ({names}) VALUES ({marks}) "
+               f"ON CONFLICT({', '.join(spec.key)}) DO {action}")
+        return [(sql, lambda values: values)]
+
+    # No unique constraint to conflict on: update matches, then insert what is still missing
+    positions = [columns.index(k) for k in spec.key]
+    match = " AND ".join(f"{k} IS ?" for k in spec.key)
+    statements = []
+    if mode == "upsert" and rest:
+        rest_positions = [columns.index(c) for c in rest]
+        statements.append((
+            f"UPDATE {spec.name} SET {', '.join(f'{c} = ?' for c in rest)}{bump} WHERE {match}",
+            lambda values: [values[i] for i in rest_positions] + [values[i] for i in positions],
+        ))
+    statements.append((
+        f"INSERT INTO {spec.name} ({names}) SELECT {marks} "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {spec.name} WHERE {match})",
+        lambda values: list(values) + [values[i] for i in positions],
+    ))
+    return statements
+
+
+def _derived_on(table: str) -> list[tuple[list[str], callable]]:
+    """(trigger DDL on `table`, rebuild function) for each derived table those triggers maintain."""
+    derived = []
+    for triggers, rebuild in DERIVED:
+        on_table = [ddl for ddl in triggers if _TRIGGER_TABLE.search(ddl).group(1) == table]
+        if on_table:
+            derived.append((on_table, rebuild))
+    return derived
+
+
+def _values(record: dict, columns: list[str], row_number: int) -> tuple:
+    if record.keys() - set(columns):
+        raise ValueError(f"Row {row_number}: unexpected columns {sorted(record.keys() - set(columns))}.")
+    try:
+        return tuple(NORMALIZE[c](record.get(c)) if c in NORMALIZE else record.get(c) for c in columns)
+    except ValueError as e:
+        raise ValueError(f"Row {row_number}: {e}") from None
+
+
+def _load(statements, columns: list[str], records, progress: _Progress):
+    """
+    Run `statements` over `records`, one transaction per BULK_COMMIT_ROWS
+    rows, or all in the caller's when called inside its get_connection() block.
+    """
+    for batch in _batches(records, BULK_COMMIT_ROWS):
+        done = 0
+        with get_connection(immediate=True) as conn:
+            for chunk in _batches(batch, BULK_CHUNK_ROWS):
+                rows = [_values(r, columns, progress.rows + done + n + 1) for n, r in enumerate(chunk)]
+                for sql, params in statements:
+                    conn.executemany(sql, map(params, rows))
+                done += len(rows)
+        progress.add(done)
+
+
+def import_file(kind: str, path: str, fmt: str | None = None, mode: str = "upsert",
+                bulk: bool = True) -> BulkResult:
+    """Stream a CSV/NDJSON file into the `kind` table ("vendor" or "sites"); see the module docstring."""
+    spec = _table(kind)
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(MODES)}.")
+    records = read_records(path, fmt)
+    first = next(records, None)
+    if first is None:
+        return BulkResult(0, 0.0)
+
+    columns = list(first)
+    with get_connection() as conn:
+        unknown = set(columns) - set(_columns(conn, spec.name))
+        versioned = "Version" in {r[1] for r in conn.execute(f"PRAGMA table_info({spec.name})")}
+    if unknown:
+        raise ValueError(f"{spec.name} has no importable column(s) {sorted(unknown)}.")
+    if set(spec.key) - set(columns):
+        raise ValueError(f"{path}: {kind} rows need the key column(s) {', '.join(spec.key)}.")
+    statements = _statements(spec, columns, mode, versioned)
+
+    progress = _Progress(f"{kind} import")
+    if not bulk:
+        _load(statements, columns, chain([first], records), progress)
+        return progress.result()
+
+    indexes = [name for name in indexes_on(spec.name) if name != spec.probe_index]
+    derived = _derived_on(spec.name)
+    with get_connection(immediate=True) as conn:
+        for name in indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        for triggers, _ in derived:
+            for ddl in triggers:
+                conn.execute(f"DROP TRIGGER IF EXISTS {_TRIGGER.search(ddl).group(1)}")
+        # The batches nest in this block, so they join its transaction
+        _load(statements, columns, chain([first], records), progress)
+        started = time.perf_counter()
+        for name in indexes:
+            conn.execute(INDEXES[name])
+        for triggers, rebuild in derived:
+            for ddl in triggers:
+                conn.execute(ddl)
+            rebuild(conn)
+    print(f"🧱 Rebuilt {len(indexes)} {spec.name} index(es) and {len(derived)} derived table(s) "
+          f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return progress.result()
+
+
+# --- Export ---
+
+def export_file(kind: str, path: str, fmt: str | None = None) -> BulkResult:
+    """Stream every row of the `kind` table, in key order, to a CSV/NDJSON file."""
+    spec = _table(kind)
+    fmt = _format(path, fmt)
+    progress = _Progress(f"{kind} export")
+    with read_snapshot() as conn, _open(path, "w") as f:
+        columns = _columns(conn, spec.name)
+        order = ", ".join(spec.key) if spec.unique else "rowid"
+        cur = conn.execute(f"SELECT {', '.join(columns)} FROM {spec.name} ORDER BY {order}")
+        writer = csv.writer(f, lineterminator="\n") if fmt == "csv" else None
+        if writer:
+            writer.writerow(columns)
+        while rows := cur.fetchmany(BULK_CHUNK_ROWS):
+            if writer:
+                writer.writerows(rows)
+            else:
+                f.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+            progress.add(len(rows))
+    return progress.result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m database.fleet_io", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("table", choices=tuple(TABLES))
+    parser.add_argument("path", help='CSV or NDJSON file, or "-" for stdin/stdout')
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--mode", choices=MODES, default="upsert", help="import only (default: upsert)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="import only: keep indexes and triggers during the load (small files)")
+    args = parser.parse_args()
+
+    init_db()
+    try:
+        if args.action == "import":
+            result = import_file(args.table, args.path, args.format, args.mode, bulk=not args.incremental)
+        else:
+            result = export_file(args.table, args.path, args.format)
+    except (ValueError, OSError, sqlite3.IntegrityError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ {args.action.capitalize()}ed {result.rows:,} {args.table} rows in {result.seconds:.1f}s "
+          f"({result.rate:,.0f} rows/s)", file=sys.stderr)
@@ -0,0 +1,130 @@
+# database/fleet_summary.py
+"""
+Unit counts per (SiteID, Type, Availability, ReadyToShare, RentalType).
+
+Triggers on Vendor keep FleetSummary in step with every insert, delete and
+update of a grouping column, inside the writer's own transaction, so KPI
+tiles and pickers read a few group rows instead of walking the fleet.
+
+Key columns are NOT NULL so ON CONFLICT can find the group: a missing SiteID
+is stored as 0 and a missing Type/Availability/RentalType as ''.
+"""
+from database.connection import get_connection
+from database.cache import cached
+
+FLEET_SUMMARY_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS FleetSummary (
+    SiteID INTEGER NOT NULL,
+    Type TEXT NOT NULL,
+    Availability TEXT NOT NULL,
+    ReadyToShare INTEGER NOT NULL,
+    RentalType TEXT NOT NULL,
+    Units INTEGER NOT NULL,
+    PRIMARY KEY (Availability, Type, SiteID, ReadyToShare, RentalType)
+) WITHOUT ROWID
+"""
+
+GROUP_COLUMNS = ("SiteID", "Type", "Availability", "ReadyToShare", "RentalType")
+
+
+def _keys(row: str) -> list[str]:
+    return [
+        f"COALESCE({row}.SiteID, 0)",
+        f"COALESCE({row}.Type, '')",
+        f"COALESCE({row}.Availability, '')",
+        f"COALESCE({row}.ReadyToShare, 0)",
+        f"COALESCE({row}.RentalType, '')",
+    ]
+
+
+def _add(row: str) -> str:
+    return f"""
+        INSERT INTO FleetSummary ({', '.join(GROUP_COLUMNS)}, Units)
+        VALUES ({', '.join(_keys(row))}, 1)
+        ON CONFLICT DO UPDATE SET Units = Units + 1;"""
+
+
+def _remove(row: str) -> str:
+    match = " AND ".join(f"{col} = {key}" for col, key in zip(GROUP_COLUMNS, _keys(row)))
+    return f"""
+        UPDATE FleetSummary SET Units = Units - 1 WHERE {match};
+        DELETE FROM FleetSummary WHERE {match} AND Units <= 0;"""
+
+
+def fleet_summary_trigger_sql() -> list[str]:
+    changed = " OR ".join(f"NEW.{col} IS NOT OLD.{col}" for col in GROUP_COLUMNS)
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_fleet_summary_insert
+        AFTER INSERT ON Vendor
+        BEGIN{_add("NEW")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_fleet_summary_delete
+        AFTER DELETE ON Vendor
+        BEGIN{_remove("OLD")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_fleet_summary_update
+        AFTER UPDATE OF {', '.join(GROUP_COLUMNS)} ON Vendor
+        WHEN {changed}
+        BEGIN{_remove("OLD")}{_add("NEW")}
+        END
+        """,
+    ]
+
+
+def rebuild_fleet_summary(conn):
+    """Recount every group from Vendor (after a bulk load with the triggers bypassed, or to repair drift)."""
+    conn.execute("DELETE FROM FleetSummary")
+    conn.execute(f"""
+        INSERT INTO FleetSummary ({', '.join(GROUP_COLUMNS)}, Units)
+        SELECT {', '.join(_keys("Vendor"))}, COUNT(*)
+        FROM Vendor
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+
+# FleetSummary is written only by Vendor triggers (or rebuilt with them), so Vendor versions it
+@cached("Vendor")
+def count_units(site_id=None, exclude_site_id=None, type_=None, availability=None,
+                ready_to_share=None, rental_type=None) -> int:
+    """Units matching the filters (same meaning as repository.count_vendors), summed over groups."""
+    query = "SELECT COALESCE(SUM(Units), 0) FROM FleetSummary WHERE 1=1"
+    params = []
+    if availability is not None:
+        query += " AND Availability = ?"
+        params.append(availability)
+    if type_ is not None:
+        query += " AND Type = ?"
+        params.append(type_)
+    if site_id:
+        query += " AND SiteID = ?"
+        params.append(site_id)
+    if exclude_site_id is not None:
+        # SiteID <> ? never matches a NULL SiteID, stored here as 0
+        query += " AND SiteID <> ? AND SiteID <> 0"
+        params.append(exclude_site_id)
+    if ready_to_share is not None:
+        query += " AND ReadyToShare = ?"
+        params.append(1 if ready_to_share else 0)
+    if rental_type is not None:
+        query += " AND RentalType = ?"
+        params.append(rental_type)
+    with get_connection() as conn:
+        return conn.execute(query, params).fetchone()[0]
+
+
+@cached("Vendor")
+def unit_types(availability: str | None = "Available") -> list[str]:
+    """Equipment types with at least one unit in `availability` (any state if None), sorted."""
+    query = "SELECT Type FROM FleetSummary WHERE Type <> ''"
+    params = []
+    if availability is not None:
+        query += " AND Availability = ?"
+        params.append(availability)
+    query += " GROUP BY Type ORDER BY Type"
+    with get_connection() as conn:
+        return [row[0] for row in conn.execute(query, params)]
@@ -0,0 +1,247 @@
+# database/ingest.py
+import atexit
+import collections
+import queue
+import sqlite3
+import threading
+import time
+
+from utils.config import (
+    TELEMETRY_BATCH_SIZE, TELEMETRY_FLUSH_INTERVAL, TELEMETRY_QUEUE_SIZE, TELEMETRY_WRITE_ATTEMPTS, SHARDING_ENABLED,
+)
+from database.connection import get_connection
+from database.telemetry import INSERT_SAMPLE_SQL, INSERT_DEAD_LETTER_SQL, sample_params
+from database.shards import write_samples
+from utils.events import publish, UsageUpdated
+
+
+class TelemetryWriter:
+    """
+    Group-committing telemetry writer.
+
+    Producers (the simulators, device feeds) call `submit()`, which only puts
+    the sample on a bounded in-memory queue. A background thread drains the
+    queue and writes each batch with one executemany inside one transaction,
+    flushing when `batch_size` samples are waiting or `flush_interval` seconds
+    have passed. When the queue is full `submit()` blocks (backpressure) and,
+    if a timeout is given, raises queue.Full once it expires.
+
+    A resent sample (same unit and Ts as a stored one) is skipped, not an
+    error. A batch that fails to write is kept aside and retried, waiting
+    twice as long each time, up to `max_attempts` tries. The last try writes
+    it one sample at a time, so only the samples SQLite rejects go to the
+    TelemetryDeadLetter table with their error; if the database itself is the
+    problem (locked, full) the rest of the batch goes there together. If even
+    that write fails, the samples stay in memory for the next retry instead of
+    being dropped. `flush()` may run on any thread alongside the writer.
+    """
+
+    def __init__(self, batch_size: int = TELEMETRY_BATCH_SIZE, flush_interval: float = TELEMETRY_FLUSH_INTERVAL,
+                 max_queue: int = TELEMETRY_QUEUE_SIZE, path: str | None = None,
+                 max_attempts: int = TELEMETRY_WRITE_ATTEMPTS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.path = path
+        self.max_attempts = max_attempts
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._retry: collections.deque = collections.deque()  # (batch, attempts so far, retry after)
+        self._retry_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._write_lock = threading.Lock()
+
+        # Counters for stats(); producers and the writer both update them
+        self._stats_lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._flushes = 0
+        self._failed_batches = 0
+        self._dead_lettered = 0
+        self._write_seconds = 0.0
+        self._last_batch_rate = 0.0
+
+    # --- producer side ---
+    def submit(self, equipment_id, engine_hours=None, idle_hours=None, fuel=None, ts=None,
+               timeout: float | None = None):
+        """Queue one sample. Blocks while the queue is full."""
+        self._queue.put(sample_params(equipment_id, engine_hours, idle_hours, fuel, ts), timeout=timeout)
+        with self._stats_lock:
+            self._submitted += 1
+
+    # --- consumer side ---
+    def _drain(self, batch: list[tuple] | None = None) -> list[tuple]:
+        """Move queued samples into `batch` without blocking, up to batch_size."""
+        batch = [] if batch is None else batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[tuple]) -> int:
+        if not batch:
+            return 0
+        with self._write_lock:
+            started = time.perf_counter()
+            if SHARDING_ENABLED and self.path is None:
+                # One transaction per site shard instead of one on the catalog
+                written = write_samples(batch)
+            else:
+                with get_connection(self.path, immediate=True) as conn:
+                    cur = conn.executemany(INSERT_SAMPLE_SQL, batch)
+                    written = max(cur.rowcount, 0)
+            elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._written += written
+            self._dropped += len(batch) - written  # unit not rented, or a resent sample
+            self._flushes += 1
+            self._write_seconds += elapsed
+            self._last_batch_rate = len(batch) / elapsed if elapsed > 0 else 0.0
+        if written:
+            # One event per batch, not per sample (the unit ID is the last parameter)
+            publish(UsageUpdated(tuple({params[-1] for params in batch})))
+        return written
+
+    def _commit(self, batch: list[tuple], attempts: int = 0) -> int:
+        """_write(batch), setting it aside for a retry (or the dead-letter table) if it fails."""
+        try:
+            return self._write(batch)
+        except Exception as e:
+            attempts += 1
+            with self._stats_lock:
+                self._failed_batches += 1
+            if attempts < self.max_attempts:
+                self._requeue(batch, attempts)
+                print(f"⚠️ Telemetry flush of {len(batch)} samples failed (attempt {attempts}), will retry: {e}")
+                return 0
+            if len(batch) == 1:
+                self._dead_letter(batch, attempts, e)
+                return 0
+            return self._salvage(batch, attempts)
+
+    def _salvage(self, batch: list[tuple], attempts: int) -> int:
+        """Last try: write the samples one by one and dead-letter only the ones SQLite rejects."""
+        written = 0
+        for i, params in enumerate(batch):
+            try:
+                written += self._write([params])
+            except sqlite3.IntegrityError as e:
+                self._dead_letter([params], attempts, e)
+            except Exception as e:
+                # Not this sample's fault: don't wait out a busy timeout per sample
+                self._dead_letter(batch[i:], attempts, e)
+                break
+        return written
+
+    def _requeue(self, batch: list[tuple], attempts: int):
+        with self._retry_lock:
+            self._retry.append((batch, attempts, time.monotonic() + self.flush_interval * 2 ** attempts))
+
+    def _dead_letter(self, batch: list[tuple], attempts: int, error: Exception):
+        try:
+            with get_connection(self.path, immediate=True) as conn:
+                conn.executemany(INSERT_DEAD_LETTER_SQL, [(*params, str(error)) for params in batch])
+        except Exception as e:
+            # The database can't take even this; keep the samples for the next retry round
+            self._requeue(batch, attempts - 1)
+            print(f"⚠️ Could not dead-letter {len(batch)} telemetry samples, keeping them queued: {e}")
+            return
+        with self._stats_lock:
+            self._dead_lettered += len(batch)
+        print(f"⚠️ {len(batch)} telemetry samples moved to TelemetryDeadLetter after {attempts} attempts: {error}")
+
+    def _retry_due(self, force: bool = False) -> int:
+        """Retry the failed batches whose backoff has passed (all of them with `force`)."""
+        with self._retry_lock:
+            pending, self._retry = self._retry, collections.deque()
+        written, now = 0, time.monotonic()
+        for batch, attempts, retry_after in pending:
+            if force or retry_after <= now:
+                written += self._commit(batch, self.max_attempts - 1 if force else attempts)
+            else:
+                with self._retry_lock:
+                    self._retry.append((batch, attempts, retry_after))
+        return written
+
+    def flush(self, final: bool = False) -> int:
+        """
+        Write everything queued right now on the calling thread. Returns rows
+        written. With `final` (on stop) batches waiting on a retry get one
+        last try too, and anything that still fails goes to the dead-letter table.
+        """
+        written = self._retry_due(force=final)
+        while True:
+            batch = self._drain()
+            if not batch:
+                return written
+            written += self._commit(batch, self.max_attempts - 1 if final else 0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._retry_due()
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = self._drain([first])
+            # Not a full batch yet: give producers until the deadline to fill it
+            while len(batch) < self.batch_size and time.monotonic() < deadline:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+                self._drain(batch)
+            self._commit(batch)
+        self.flush(final=True)
+
+    def start(self) -> "TelemetryWriter":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None):
+        """Stop the background thread after writing whatever is still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _retrying(self) -> int:
+        with self._retry_lock:
+            return sum(len(batch) for batch, _attempts, _after in self._retry)
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self._started_at
+        with self._stats_lock:
+            return {
+                "submitted": self._submitted,
+                "written": self._written,
+                "dropped": self._dropped,
+                "queued": self._queue.qsize(),
+                "flushes": self._flushes,
+                "failed_batches": self._failed_batches,
+                "retrying": self._retrying(),
+                "dead_lettered": self._dead_lettered,
+                "samples_per_sec": self._written / elapsed if elapsed > 0 else 0.0,
+                "write_samples_per_sec": self._written / self._write_seconds if self._write_seconds > 0 else 0.0,
+                "last_batch_samples_per_sec": self._last_batch_rate,
+            }
+
+
+_writer: TelemetryWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> TelemetryWriter:
+    """The process-wide writer shared by the simulators and device feeds (started on first use)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = TelemetryWriter().start()
+            atexit.register(_writer.stop, 5)
+        return _writer
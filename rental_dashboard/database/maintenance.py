@@ -0,0 +1,244 @@
+# database/maintenance.py
+"""
+Background database maintenance.
+
+    checkpoint          PRAGMA wal_checkpoint(PASSIVE): copy committed WAL frames into
+                        the database without waiting on readers or writers
+    optimize            PRAGMA optimize: re-ANALYZE only the tables whose stats look stale
+    analyze             ANALYZE with analysis_limit sampling, so big tables stay cheap
+    incremental_vacuum  hand free pages back to the OS, MAINTENANCE_VACUUM_PAGES at a time
+
+Each task runs every MAINTENANCE_INTERVALS[task] seconds on the catalog and,
+with SHARDING_ENABLED, on every shard file. analyze and incremental_vacuum
+only run inside MAINTENANCE_WINDOW. The scheduler thread runs at a lower OS
+priority (nice +10 on Linux). No task takes a lock that blocks readers: a
+PASSIVE checkpoint stops at the oldest open read, and the rest are short
+autocommit writes.
+
+maintenance_stats() reports runs, durations and each task's last effect
+(WAL frames checkpointed, free pages released, stat rows). Without these
+passes, long-lived dashboard reads keep SQLite's automatic checkpoint from
+finishing, so the WAL keeps growing and plans run on stale statistics.
+
+incremental_vacuum needs auto_vacuum=INCREMENTAL. New database files get it
+from the pool; an older file converts once with
+
+    python -m database.maintenance vacuum
+
+which is a full VACUUM (blocks writers while it runs), followed by
+rebuild_vendor_search() because VACUUM may renumber Vendor rowids.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+from utils.config import (
+    SHARDING_ENABLED,
+    MAINTENANCE_INTERVALS,
+    MAINTENANCE_WINDOW,
+    MAINTENANCE_ANALYSIS_LIMIT,
+    MAINTENANCE_VACUUM_PAGES,
+)
+from database.connection import get_connection, get_pool
+from database.shards import shard_path, shard_sites
+from database.search import rebuild_vendor_search
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _pragma(conn, name: str) -> int:
+    return conn.execute(f"PRAGMA main.{name}").fetchone()[0]
+
+
+# --- Tasks (each takes a database path and returns what it did) ---
+
+def checkpoint(path: str) -> dict:
+    wal = path + "-wal"
+    before = _size(wal)
+    with get_connection(path) as conn:
+        busy, frames, done = conn.execute("PRAGMA main.wal_checkpoint(PASSIVE)").fetchone()
+    return {"wal_frames": frames, "checkpointed": done, "busy": busy,
+            "wal_bytes_before": before, "wal_bytes_after": _size(wal)}
+
+
+def _stat_rows(conn) -> int:
+    has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    return conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] if has_stats else 0
+
+
+def optimize(path: str) -> dict:
+    with get_connection(path) as conn:
+        conn.execute(f"PRAGMA analysis_limit={int(MAINTENANCE_ANALYSIS_LIMIT)}")
+        # 0x10000: consider every table, not only those this connection has queried
+        conn.execute("PRAGMA main.optimize=0x10002")
+        return {"stat_rows": _stat_rows(conn)}
+
+
+def analyze(path: str) -> dict:
+    with get_connection(path) as conn:
+        conn.execute(f"PRAGMA analysis_limit={int(MAINTENANCE_ANALYSIS_LIMIT)}")
+        conn.execute("ANALYZE main")
+        return {"stat_rows": _stat_rows(conn)}
+
+
+def incremental_vacuum(path: str) -> dict:
+    with get_connection(path) as conn:
+        free_before = _pragma(conn, "freelist_count")
+        if _pragma(conn, "auto_vacuum") != 2:
+            return {"skipped": "auto_vacuum is not INCREMENTAL", "free_pages": free_before}
+        # Each result row is one freed page; it only runs as far as it is stepped
+        conn.execute(f"PRAGMA main.incremental_vacuum({int(MAINTENANCE_VACUUM_PAGES)})").fetchall()
+        free_after = _pragma(conn, "freelist_count")
+        return {"free_pages_before": free_before, "free_pages_after": free_after,
+                "bytes_released": (free_before - free_after) * _pragma(conn, "page_size")}
+
+
+def vacuum(path: str) -> dict:
+    """Full VACUUM that also switches the file to auto_vacuum=INCREMENTAL. Manual only: it blocks writers."""
+    before = _size(path)
+    with get_connection(path) as conn:
+        conn.execute("PRAGMA main.auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM main")
+    if path == get_pool().path:
+        with get_connection(immediate=True) as conn:
+            rebuild_vendor_search(conn)
+    return {"bytes_before": before, "bytes_after": _size(path)}
+
+
+class Task(NamedTuple):
+    fn: callable
+    windowed: bool      # only inside MAINTENANCE_WINDOW
+
+
+TASKS = {
+    "checkpoint": Task(checkpoint, False),
+    "optimize": Task(optimize, False),
+    "analyze": Task(analyze, True),
+    "incremental_vacuum": Task(incremental_vacuum, True),
+}
+
+
+def database_paths() -> list[str]:
+    """The catalog plus, when sharding is on, every shard file."""
+    paths = [get_pool().path]
+    if SHARDING_ENABLED:
+        paths += [shard_path(site_id) for site_id in shard_sites()]
+    return paths
+
+
+def in_window(now: datetime | None = None, window=MAINTENANCE_WINDOW) -> bool:
+    """Whether `now` (local time) falls in the ("HH:MM", "HH:MM") window; it may wrap past midnight."""
+    if window is None:
+        return True
+    now = (now or datetime.now()).strftime("%H:%M")
+    start, end = window
+    return start <= now < end if start <= end else now >= start or now < end
+
+
+# --- Metrics ---
+
+_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def run_task(name: str) -> dict:
+    """Run one task on every database file now, record its metrics and return {path: result}."""
+    fn = vacuum if name == "vacuum" else TASKS[name].fn
+    started = time.monotonic()
+    results, error = {}, None
+    for path in database_paths():
+        try:
+            results[path] = fn(path)
+        except Exception as e:
+            error = results[path] = f"{type(e).__name__}: {e}"
+    seconds = time.monotonic() - started
+    with _stats_lock:
+        entry = _stats.setdefault(name, {"runs": 0, "errors": 0, "total_seconds": 0.0})
+        entry["runs"] += 1
+        entry["errors"] += error is not None
+        entry["total_seconds"] += seconds
+        entry.update(last_run=time.time(), last_seconds=seconds, last_result=results, last_error=error)
+    if error:
+        print(f"⚠️ Maintenance task {name} failed: {error}")
+    return results
+
+
+def maintenance_stats() -> dict:
+    """{task: runs, errors, total_seconds, last_run (epoch), last_seconds, last_result, last_error}."""
+    with _stats_lock:
+        return {name: dict(entry) for name, entry in _stats.items()}
+
+
+# --- Scheduler ---
+
+_scheduler: threading.Thread | None = None
+_scheduler_stop = threading.Event()
+_scheduler_lock = threading.Lock()
+
+
+def _lower_priority():
+    # On Linux a thread has its own nice value; elsewhere this is a no-op
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+def _scheduler_loop(intervals: dict):
+    _lower_priority()
+    last_run = dict.fromkeys(intervals, 0.0)
+    tick = min(15.0, *intervals.values())
+    while True:
+        for name, interval in intervals.items():
+            if _scheduler_stop.is_set():
+                return
+            if time.time() - last_run[name] < interval:
+                continue
+            if TASKS[name].windowed and not in_window():
+                continue
+            last_run[name] = time.time()
+            run_task(name)
+        if _scheduler_stop.wait(tick):
+            return
+
+
+def start_maintenance(intervals: dict | None = None):
+    """Start the process-wide maintenance thread once; later calls are no-ops."""
+    global _scheduler
+    intervals = {name: interval for name, interval in (intervals or MAINTENANCE_INTERVALS).items() if interval}
+    if not intervals:
+        return  # every task is switched off
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler_stop.clear()
+            _scheduler = threading.Thread(target=_scheduler_loop, args=(intervals,), name="db-maintenance",
+                                          daemon=True)
+            _scheduler.start()
+
+
+def stop_maintenance():
+    _scheduler_stop.set()
+
+
+if __name__ == "__main__":
+    import sys
+    from database.db import init_db
+    init_db()
+    names = sys.argv[1:] or list(TASKS)
+    for name in names:
+        if name != "vacuum" and name not in TASKS:
+            print(f"❌ Unknown task {name!r}; expected one of {', '.join([*TASKS, 'vacuum'])}.")
+            sys.exit(1)
+    for name in names:
+        run_task(name)
+        entry = maintenance_stats()[name]
+        print(f"🧹 {name} ({entry['last_seconds']:.2f}s)")
+        for path, result in entry["last_result"].items():
+            print(f"   {path}: {result}")
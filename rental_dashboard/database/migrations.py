@@ -0,0 +1,483 @@
+# database/migrations.py
+import re
+import threading
+
+from utils.config import DB_PATH
+from database.connection import get_connection
+from database.seed import seed_demo_fleet
+from database.telemetry import TELEMETRY_TABLE_SQL, LATEST_TABLE_SQL, LATEST_TRIGGER_SQL, DEAD_LETTER_TABLE_SQL
+from database.rollups import GRAINS, rollup_table_sql
+from database.changes import CDC_TABLES, VERSIONED_TABLES, cdc_trigger_sql, version_trigger_sql
+from database.reservations import backfill_reservations
+from database.search import VENDOR_SEARCH_TABLE_SQL, vendor_search_trigger_sql, rebuild_vendor_search
+from database.fleet_summary import FLEET_SUMMARY_TABLE_SQL, fleet_summary_trigger_sql, rebuild_fleet_summary
+from database.archive import ARCHIVE_SCHEMA
+
+
+# The one place the Vendor table is defined
+VENDOR_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS Vendor (
+    EquipmentID TEXT PRIMARY KEY,
+    Type TEXT,
+    SiteID INTEGER,
+    CheckOutDate TEXT,
+    CheckInDate TEXT,
+    EngineHourDay REAL,
+    IdleHourDay REAL,
+    OperatingDays INTEGER,
+    DaysLeft INTEGER,
+    Fuel REAL,
+    Location TEXT,
+    Availability TEXT CHECK(Availability IN ('Available', 'Rented')) DEFAULT 'Available',
+    RentalType TEXT CHECK(RentalType IN ('Rigid', 'Flexible')),
+    ReadyToShare INTEGER DEFAULT 0,
+    SharedBySiteID INTEGER
+)
+"""
+
+
+# Index DDL per migration step. A step's list is frozen once it has shipped:
+# databases that already ran the step never see an edit to it, so a new or
+# changed index goes in a new list for a new step.
+
+# get_available_types (covering), get_available_equipment_ids, fetch_vendors(filter_by);
+# fetch_vendors(site_id) and the client dashboard "owned by this site" (ordered by EquipmentID);
+# fetch_share_ready and "on share" (only the shared slice is indexed); get_requests_for_owner
+# (OwnerSiteID = ? AND Status = 'Pending' ORDER BY RequestID DESC); low-utilization contacts
+# join and map_view site fallback
+_M005_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_vendor_avail_type ON Vendor(Availability, Type)",
+    "CREATE INDEX IF NOT EXISTS idx_vendor_site ON Vendor(SiteID, EquipmentID)",
+    "CREATE INDEX IF NOT EXISTS idx_vendor_share_ready ON Vendor(EquipmentID) WHERE ReadyToShare = 1",
+    "CREATE INDEX IF NOT EXISTS idx_requests_owner_status ON RentalRequests(OwnerSiteID, Status, RequestID)",
+    "CREATE INDEX IF NOT EXISTS idx_siteinfo_site ON SiteInfo(SiteID)",
+]
+
+# get_flexible_rentals (Share page): RentalType is canonical from migration 6 on
+_M006_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_vendor_rental_type ON Vendor(RentalType)",
+]
+
+# rental history range scans: per site demand, per unit history
+_M007_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_rentals_site_checkout ON Rentals(SiteID, CheckOutDate)",
+    "CREATE INDEX IF NOT EXISTS idx_rentals_equipment_checkout ON Rentals(EquipmentID, CheckOutDate)",
+]
+
+# compactor range reads and retention deletes walk time, not units
+_M009_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_telemetry_ts ON EquipmentTelemetry(Ts)",
+    "CREATE INDEX IF NOT EXISTS idx_telemetry_minute_bucket ON TelemetryMinute(Bucket)",
+    "CREATE INDEX IF NOT EXISTS idx_telemetry_hour_bucket ON TelemetryHour(Bucket)",
+    "CREATE INDEX IF NOT EXISTS idx_telemetry_day_bucket ON TelemetryDay(Bucket)",
+]
+
+# keyset pages come out of the index already ordered: idx_vendor_rental_type gains
+# EquipmentID (rebuilt under the same name), fetch_vendor_page(filter_by=...) per availability
+_M010_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_vendor_rental_type ON Vendor(RentalType, EquipmentID)",
+    "CREATE INDEX IF NOT EXISTS idx_vendor_avail_id ON Vendor(Availability, EquipmentID)",
+]
+
+# changes_since(version): everything after a version, in order
+_M011_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_changelog_version ON ChangeLog(Version)",
+]
+
+# find_free_units(type_): the units of one type, in order; the reservation overlap
+# probe (latest booking of a unit starting before a time); release(kind, ref_id)
+_M013_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_vendor_type ON Vendor(Type, EquipmentID)",
+    "CREATE INDEX IF NOT EXISTS idx_reservations_unit_start ON Reservations(Kind, EquipmentID, StartTs)",
+    "CREATE INDEX IF NOT EXISTS idx_reservations_ref ON Reservations(Kind, RefID)",
+]
+
+# archive_closed(): closed requests / finished rentals past the cutoff, oldest first;
+# history readers with include_archive=True hit the archive ones through the *All views
+_M019_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_requests_closed ON RentalRequests(ClosedAt)",
+    "CREATE INDEX IF NOT EXISTS idx_rentals_checkin ON Rentals(CheckInDate)",
+    "CREATE INDEX IF NOT EXISTS idx_requests_archive_owner ON RentalRequestsArchive(OwnerSiteID, Status, RequestID)",
+    "CREATE INDEX IF NOT EXISTS idx_rentals_archive_site_checkout ON RentalsArchive(SiteID, CheckOutDate)",
+    "CREATE INDEX IF NOT EXISTS idx_rentals_archive_equipment_checkout ON RentalsArchive(EquipmentID, CheckOutDate)",
+]
+
+_INDEX_DDL = re.compile(r"CREATE INDEX IF NOT EXISTS (\w+) ON (\w+)\(")
+
+# The current definition of every index, by name (a later step's rebuild wins).
+# Kept as data so bulk loaders can drop and rebuild them around large imports.
+INDEXES = {
+    _INDEX_DDL.match(ddl).group(1): ddl
+    for ddl in (*_M005_INDEXES, *_M006_INDEXES, *_M007_INDEXES, *_M009_INDEXES, *_M010_INDEXES,
+                *_M011_INDEXES, *_M013_INDEXES, *_M019_INDEXES)
+}
+
+
+def create_indexes(conn, ddls: list[str]):
+    """Run one step's index DDL; every table it names exists by that step."""
+    for ddl in ddls:
+        conn.execute(ddl)
+
+
+def indexes_on(table: str) -> list[str]:
+    """Names of the INDEXES entries on `table`."""
+    return [name for name, ddl in INDEXES.items() if _INDEX_DDL.match(ddl).group(2) == table]
+
+
+def _columns(conn, table: str) -> set[str]:
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+# --- Migration steps ---------------------------------------------------------
+# Each step must be safe on databases created before schema versioning existed,
+# so they use IF NOT EXISTS / column checks rather than assuming a blank file.
+
+def _m001_base_tables(conn):
+    conn.execute(VENDOR_TABLE_SQL)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS SiteInfo (
+        SiteID INTEGER,
+        EquipmentID TEXT,
+        Location TEXT,
+        ContactDetails TEXT,
+        FOREIGN KEY (EquipmentID) REFERENCES Vendor(EquipmentID)
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS RentalRequests (
+        RequestID INTEGER PRIMARY KEY AUTOINCREMENT,
+        EquipmentID TEXT,
+        RequesterSiteID INTEGER,
+        OwnerSiteID INTEGER,
+        Location TEXT,
+        TimeFrom TEXT,
+        TimeTo   TEXT,
+        Status TEXT CHECK(Status IN ('Pending','Approved','Rejected')) DEFAULT 'Pending'
+    )
+    """)
+
+
+def _m002_vendor_share_columns(conn):
+    # Vendor tables created before sharing existed lack these columns
+    existing = _columns(conn, "Vendor")
+    if "RentalType" not in existing:
+        conn.execute("ALTER TABLE Vendor ADD COLUMN RentalType TEXT")
+    if "ReadyToShare" not in existing:
+        conn.execute("ALTER TABLE Vendor ADD COLUMN ReadyToShare INTEGER DEFAULT 0")
+    if "SharedBySiteID" not in existing:
+        conn.execute("ALTER TABLE Vendor ADD COLUMN SharedBySiteID INTEGER")
+
+    existing = _columns(conn, "RentalRequests")
+    if "OwnerSiteID" not in existing:
+        conn.execute("ALTER TABLE RentalRequests ADD COLUMN OwnerSiteID INTEGER")
+
+
+def _m003_geo_columns(conn):
+    existing = _columns(conn, "SiteInfo")
+    if "Latitude" not in existing:
+        conn.execute("ALTER TABLE SiteInfo ADD COLUMN Latitude REAL")
+    if "Longitude" not in existing:
+        conn.execute("ALTER TABLE SiteInfo ADD COLUMN Longitude REAL")
+
+
+def _m004_seed_demo_fleet(conn):
+    seed_demo_fleet(conn)
+
+
+def _m005_hot_path_indexes(conn):
+    create_indexes(conn, _M005_INDEXES)
+
+
+def _m006_canonical_rental_type_availability(conn):
+    # One-time backfill of the spellings older write paths let through
+    conn.execute("""
+        UPDATE Vendor
+        SET RentalType = CASE LOWER(TRIM(RentalType))
+            WHEN 'flexible' THEN 'Flexible'
+            WHEN 'rigid' THEN 'Rigid'
+            ELSE NULL
+        END
+        WHERE RentalType IS NOT NULL AND RentalType NOT IN ('Rigid', 'Flexible')
+    """)
+    conn.execute("""
+        UPDATE Vendor
+        SET Availability = CASE LOWER(TRIM(Availability))
+            WHEN 'rented' THEN 'Rented'
+            ELSE 'Available'
+        END
+        WHERE Availability IS NULL OR Availability NOT IN ('Available', 'Rented')
+    """)
+
+    # Tables that got these columns via ALTER have no CHECK constraint; these
+    # triggers enforce the same rule so equality filters stay exact.
+    for event, columns in (("INSERT", ""), ("UPDATE", " OF RentalType, Availability")):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_vendor_canonical_{event.lower()}
+            BEFORE {event}{columns} ON Vendor
+            WHEN (NEW.RentalType IS NOT NULL AND NEW.RentalType NOT IN ('Rigid', 'Flexible'))
+              OR NEW.Availability NOT IN ('Available', 'Rented')
+            BEGIN
+                SELECT RAISE(ABORT, 'Vendor.RentalType/Availability must be canonical');
+            END
+        """)
+
+    create_indexes(conn, _M006_INDEXES)
+
+
+def _m007_rentals_history(conn):
+    # Append-only: one row per rental, Vendor keeps only the current one
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS Rentals (
+        RentalID INTEGER PRIMARY KEY AUTOINCREMENT,
+        EquipmentID TEXT NOT NULL,
+        SiteID INTEGER,
+        Type TEXT,
+        RentalType TEXT,
+        Location TEXT,
+        OperatingDays INTEGER,
+        CheckOutDate TEXT NOT NULL,
+        CheckInDate TEXT,
+        CreatedAt TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (EquipmentID) REFERENCES Vendor(EquipmentID)
+    )
+    """)
+
+    # Keep the rentals that are live today so history doesn't start empty
+    conn.execute("""
+        INSERT INTO Rentals (EquipmentID, SiteID, Type, RentalType, Location, OperatingDays, CheckOutDate, CheckInDate)
+        SELECT EquipmentID, SiteID, Type, RentalType, Location, OperatingDays, CheckOutDate, CheckInDate
+        FROM Vendor
+        WHERE Availability = 'Rented' AND CheckOutDate IS NOT NULL
+    """)
+
+    create_indexes(conn, _M007_INDEXES)
+
+
+def _m008_equipment_telemetry(conn):
+    # Append-only samples; EngineHours/IdleHours are deltas since the previous sample
+    conn.execute(TELEMETRY_TABLE_SQL)
+
+    # Latest-value table: today's engine/idle totals (capped at 24h) and last fuel level
+    conn.execute(LATEST_TABLE_SQL)
+    conn.execute(LATEST_TRIGGER_SQL)
+
+    # What readers query instead of Vendor: same columns in the same order, with
+    # the live usage/fuel values taken from EquipmentLatest when a unit has reported
+    conn.execute("""
+    CREATE VIEW IF NOT EXISTS VendorCurrent AS
+    SELECT
+        v.EquipmentID, v.Type, v.SiteID, v.CheckOutDate, v.CheckInDate,
+        COALESCE(l.EngineHourDay, v.EngineHourDay) AS EngineHourDay,
+        COALESCE(l.IdleHourDay, v.IdleHourDay) AS IdleHourDay,
+        v.OperatingDays, v.DaysLeft,
+        COALESCE(l.Fuel, v.Fuel) AS Fuel,
+        v.Location, v.Availability, v.RentalType, v.ReadyToShare, v.SharedBySiteID
+    FROM Vendor v
+    LEFT JOIN EquipmentLatest l ON l.EquipmentID = v.EquipmentID
+    """)
+
+
+def _m009_telemetry_rollups(conn):
+    for _grain, table, _size, _source, _retention in GRAINS:
+        conn.execute(rollup_table_sql(table))
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS RollupWatermark (
+        Grain TEXT PRIMARY KEY,
+        Watermark INTEGER NOT NULL
+    )
+    """)
+    create_indexes(conn, _M009_INDEXES)
+
+
+def _m010_keyset_pagination_indexes(conn):
+    # idx_vendor_rental_type gained EquipmentID; rebuild it under the same name
+    conn.execute("DROP INDEX IF EXISTS idx_vendor_rental_type")
+    create_indexes(conn, _M010_INDEXES)
+
+
+def _m011_change_data_capture(conn):
+    # One row per tracked table plus '*', the global counter every trigger bumps
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS DataVersion (
+        TableName TEXT PRIMARY KEY,
+        Version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.executemany(
+        "INSERT OR IGNORE INTO DataVersion (TableName, Version) VALUES (?, 0)",
+        [("*",)] + [(table,) for table, _key in CDC_TABLES]
+    )
+    # Latest change per row key; RowKey is untyped so EquipmentID/RequestID/rowid keep their types
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ChangeLog (
+        TableName TEXT NOT NULL,
+        RowKey NOT NULL,
+        Version INTEGER NOT NULL,
+        Op TEXT NOT NULL CHECK(Op IN ('I', 'U', 'D')),
+        PRIMARY KEY (TableName, RowKey)
+    ) WITHOUT ROWID
+    """)
+    for table, key in CDC_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(cdc_trigger_sql(table, key, event))
+    create_indexes(conn, _M011_INDEXES)
+
+
+def _m012_row_versions(conn):
+    # Optimistic concurrency: every UPDATE of a row bumps its Version, so a
+    # writer can compare-and-swap on the Version it read. The bump is a trigger
+    # rather than each UPDATE's job so no writer can forget it.
+    for table, key in (("RentalRequests", "RequestID"), ("Vendor", "EquipmentID")):
+        if "Version" not in _columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN Version INTEGER NOT NULL DEFAULT 0")
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_version
+        AFTER UPDATE ON {table}
+        WHEN NEW.Version = OLD.Version
+        BEGIN
+            UPDATE {table} SET Version = OLD.Version + 1 WHERE {key} = NEW.{key};
+        END
+        """)
+
+
+def _m013_reservation_calendar(conn):
+    # Half-open [StartTs, EndTs) bookings in epoch seconds; see database/reservations.py
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS Reservations (
+        ReservationID INTEGER PRIMARY KEY AUTOINCREMENT,
+        EquipmentID TEXT NOT NULL,
+        Kind TEXT NOT NULL CHECK(Kind IN ('Rental', 'Share')),
+        StartTs INTEGER NOT NULL,
+        EndTs INTEGER NOT NULL CHECK(EndTs > StartTs),
+        SiteID INTEGER,
+        RefID INTEGER,
+        FOREIGN KEY (EquipmentID) REFERENCES Vendor(EquipmentID)
+    )
+    """)
+    create_indexes(conn, _M013_INDEXES)
+    if conn.execute("SELECT 1 FROM Reservations LIMIT 1").fetchone() is None:
+        booked, skipped = backfill_reservations(conn)
+        print(f"📅 Booked {booked} existing rentals/requests ({skipped} skipped: unparsable or overlapping).")
+
+
+def _m014_fleet_summary(conn):
+    conn.execute(FLEET_SUMMARY_TABLE_SQL)
+    for ddl in fleet_summary_trigger_sql():
+        conn.execute(ddl)
+    rebuild_fleet_summary(conn)
+
+
+def _m015_vendor_search(conn):
+    conn.execute(VENDOR_SEARCH_TABLE_SQL)
+    for ddl in vendor_search_trigger_sql():
+        conn.execute(ddl)
+    rebuild_vendor_search(conn)
+
+
+def _m016_archive_tier(conn):
+    if "ClosedAt" not in _columns(conn, "RentalRequests"):
+        conn.execute("ALTER TABLE RentalRequests ADD COLUMN ClosedAt TEXT")
+    # When older requests were decided isn't recorded; their archive clock starts now
+    conn.execute("UPDATE RentalRequests SET ClosedAt = CURRENT_TIMESTAMP WHERE Status != 'Pending' AND ClosedAt IS NULL")
+    for ddl in ARCHIVE_SCHEMA:
+        conn.execute(ddl)
+
+
+def _m017_table_versions(conn):
+    # Version-only change tracking for the history and rollup tables the query cache reads
+    conn.executemany(
+        "INSERT OR IGNORE INTO DataVersion (TableName, Version) VALUES (?, 0)",
+        [(table,) for table in VERSIONED_TABLES]
+    )
+    for table in VERSIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(version_trigger_sql(table, event))
+
+
+def _m018_telemetry_dead_letter(conn):
+    conn.execute(DEAD_LETTER_TABLE_SQL)
+
+
+def _m019_archive_indexes(conn):
+    # Databases that ran migration 16 before its indexes moved here already have them
+    create_indexes(conn, _M019_INDEXES)
+
+
+def _m020_drop_row_version_triggers(conn):
+    # Migration 12's bump was a second UPDATE per write, which fired the change
+    # capture, FleetSummary and search triggers again; writers bump Version themselves now
+    for table in ("RentalRequests", "Vendor"):
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{table.lower()}_version")
+
+
+# (version, name, step) — append only; never renumber or edit an applied step
+MIGRATIONS = [
+    (1, "base tables", _m001_base_tables),
+    (2, "vendor share columns", _m002_vendor_share_columns),
+    (3, "site geo columns", _m003_geo_columns),
+    (4, "seed demo fleet", _m004_seed_demo_fleet),
+    (5, "hot path indexes", _m005_hot_path_indexes),
+    (6, "canonical rental type and availability", _m006_canonical_rental_type_availability),
+    (7, "rentals history", _m007_rentals_history),
+    (8, "equipment telemetry", _m008_equipment_telemetry),
+    (9, "telemetry rollups", _m009_telemetry_rollups),
+    (10, "keyset pagination indexes", _m010_keyset_pagination_indexes),
+    (11, "change data capture", _m011_change_data_capture),
+    (12, "row versions", _m012_row_versions),
+    (13, "reservation calendar", _m013_reservation_calendar),
+    (14, "fleet summary", _m014_fleet_summary),
+    (15, "vendor search", _m015_vendor_search),
+    (16, "archive tier", _m016_archive_tier),
+    (17, "table versions", _m017_table_versions),
+    (18, "telemetry dead letter", _m018_telemetry_dead_letter),
+    (19, "archive indexes", _m019_archive_indexes),
+    (20, "drop row version triggers", _m020_drop_row_version_triggers),
+]
+
+
+# --- Engine ------------------------------------------------------------------
+
+_migrated: set[str] = set()
+_lock = threading.Lock()
+
+
+def schema_version(conn) -> int:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS SchemaVersion (
+        Version INTEGER PRIMARY KEY,
+        Name TEXT,
+        AppliedAt TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(Version), 0) FROM SchemaVersion").fetchone()[0]
+
+
+def migrate(path: str | None = None) -> int:
+    """
+    Apply pending migrations to `path` (defaults to DB_PATH) and return the
+    schema version. Runs at most once per database per process; later calls
+    return without touching SQLite.
+    """
+    key = path or DB_PATH
+    if key in _migrated:
+        return MIGRATIONS[-1][0]
+
+    with _lock:
+        if key in _migrated:
+            return MIGRATIONS[-1][0]
+
+        # BEGIN IMMEDIATE so two processes starting together don't both migrate
+        with get_connection(path, immediate=True) as conn:
+            current = schema_version(conn)
+            for version, name, step in MIGRATIONS:
+                if version <= current:
+                    continue
+                step(conn)
+                conn.execute("INSERT INTO SchemaVersion (Version, Name) VALUES (?, ?)", (version, name))
+                print(f"🛠️ Applied migration {version}: {name}")
+                current = version
+
+        _migrated.add(key)
+        return current
@@ -0,0 +1,192 @@
+# database/repository.py
+from typing import NamedTuple
+
+import pandas as pd
+from database.connection import get_connection
+
+
+class VendorRow(NamedTuple):
+    """One Vendor/VendorCurrent row. A NamedTuple: no per-row __dict__, still indexable."""
+    EquipmentID: str
+    Type: str | None
+    SiteID: int | None
+    CheckOutDate: str | None
+    CheckInDate: str | None
+    EngineHourDay: float | None
+    IdleHourDay: float | None
+    OperatingDays: int | None
+    DaysLeft: int | None
+    Fuel: float | None
+    Location: str | None
+    Availability: str | None
+    RentalType: str | None
+    ReadyToShare: int
+    SharedBySiteID: int | None
+
+
+class RequestRow(NamedTuple):
+    RequestID: int
+    EquipmentID: str
+    RequesterSiteID: int | None
+    OwnerSiteID: int | None
+    Location: str | None
+    TimeFrom: str | None
+    TimeTo: str | None
+    Status: str
+    Version: int
+
+
+VENDOR_COLUMNS = VendorRow._fields
+REQUEST_COLUMNS = RequestRow._fields
+
+# Fixed dtypes for the DataFrame paths; "int64" columns treat NULL as 0
+VENDOR_DTYPES = {
+    "EquipmentID": "string",
+    "Type": "string",
+    "SiteID": "Int64",
+    "CheckOutDate": "string",
+    "CheckInDate": "string",
+    "EngineHourDay": "float64",
+    "IdleHourDay": "float64",
+    "OperatingDays": "Int64",
+    "DaysLeft": "Int64",
+    "Fuel": "float64",
+    "Location": "string",
+    "Availability": "string",
+    "RentalType": "string",
+    "ReadyToShare": "int64",
+    "SharedBySiteID": "Int64",
+}
+
+REQUEST_DTYPES = {
+    "RequestID": "int64",
+    "EquipmentID": "string",
+    "RequesterSiteID": "Int64",
+    "OwnerSiteID": "Int64",
+    "Location": "string",
+    "TimeFrom": "string",
+    "TimeTo": "string",
+    "Status": "string",
+    "Version": "int64",
+}
+
+
+def _frame(rows: list[tuple], columns, dtypes: dict) -> pd.DataFrame:
+    """Build a DataFrame column by column straight from cursor rows."""
+    columns = list(columns)
+    if not rows:
+        return pd.DataFrame({c: pd.Series(dtype=dtypes[c]) for c in columns})
+    data = {}
+    for name, values in zip(columns, zip(*rows)):
+        dtype = dtypes[name]
+        if dtype == "int64":
+            values = [0 if v is None else v for v in values]
+        data[name] = pd.array(values, dtype=dtype)
+    return pd.DataFrame(data, copy=False)
+
+
+# --- Vendor ---
+
+def _vendor_query(columns, filter_by=None, site_id=None, ready_to_share=None, exclude_site_id=None,
+                  rental_type=None, order_by_id=False, after=None, limit=None, changed_since=None,
+                  equipment_ids=None) -> tuple[str, list]:
+    query = f"SELECT {', '.join(columns)} FROM VendorCurrent WHERE 1=1"
+    params = []
+    if after is not None:
+        # Keyset cursor: resume after the last EquipmentID already shown
+        query += " AND EquipmentID > ?"
+        params.append(after)
+        order_by_id = True
+    if filter_by in ("Available", "Rented"):
+        query += " AND Availability = ?"
+        params.append(filter_by)
+    if site_id:
+        query += " AND SiteID = ?"
+        params.append(site_id)
+    if ready_to_share is not None:
+        # Literal so the partial ReadyToShare = 1 index can be matched
+        query += " AND ReadyToShare = 1" if ready_to_share else " AND ReadyToShare = 0"
+    if exclude_site_id is not None:
+        query += " AND SiteID <> ?"
+        params.append(exclude_site_id)
+    if rental_type is not None:
+        query += " AND RentalType = ?"
+        params.append(rental_type)
+    if equipment_ids is not None:
+        query += f" AND EquipmentID IN ({', '.join('?' * len(equipment_ids))})"
+        params.extend(equipment_ids)
+    if changed_since is not None:
+        # Units whose Vendor row or live telemetry changed after this CDC version
+        query += (" AND EquipmentID IN (SELECT RowKey FROM ChangeLog"
+                  " WHERE Version > ? AND TableName IN ('Vendor', 'EquipmentLatest'))")
+        params.append(changed_since)
+    if order_by_id or limit is not None:
+        query += " ORDER BY EquipmentID"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+
+def list_vendors(**filters) -> list[VendorRow]:
+    """Small-result path: typed rows. Filters as in vendors_frame()."""
+    query, params = _vendor_query(VENDOR_COLUMNS, **filters)
+    with get_connection() as conn:
+        return list(map(VendorRow._make, conn.execute(query, params).fetchall()))
+
+
+def vendors_frame(columns=VENDOR_COLUMNS, **filters) -> pd.DataFrame:
+    """
+    Bulk path: VendorCurrent rows as a DataFrame with fixed dtypes.
+
+    Filters: filter_by ('Available'/'Rented'), site_id, ready_to_share (bool),
+    exclude_site_id, rental_type, order_by_id, changed_since (CDC version),
+    equipment_ids (a list). `after` + `limit` give one keyset page in EquipmentID order.
+    """
+    ids = filters.get("equipment_ids")
+    if ids is not None and len(ids) == 0:
+        # IN () matches nothing, but SQLite still plans it as a walk of the table
+        return _frame([], columns, VENDOR_DTYPES)
+    query, params = _vendor_query(columns, **filters)
+    with get_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return _frame(rows, columns, VENDOR_DTYPES)
+
+
+def count_vendors(**filters) -> int:
+    query, params = _vendor_query(("COUNT(*)",), **filters)
+    with get_connection() as conn:
+        return conn.execute(query, params).fetchone()[0]
+
+
+# --- RentalRequests ---
+
+def requests_frame(owner_site_id=None, status=None, before=None, limit=None, changed_since=None,
+                   include_archive=False) -> pd.DataFrame:
+    """
+    RentalRequests newest first, optionally for one owner site and/or status.
+    `before` + `limit` give one keyset page (RequestID < before).
+    include_archive=True also returns archived (long-closed) requests.
+    """
+    source = "RentalRequestsAll" if include_archive else "RentalRequests"
+    query = f"SELECT {', '.join(REQUEST_COLUMNS)} FROM {source} WHERE 1=1"
+    params = []
+    if before is not None:
+        query += " AND RequestID < ?"
+        params.append(before)
+    if owner_site_id is not None:
+        query += " AND OwnerSiteID = ?"
+        params.append(owner_site_id)
+    if status is not None:
+        query += " AND Status = ?"
+        params.append(status)
+    if changed_since is not None:
+        query += " AND RequestID IN (SELECT RowKey FROM ChangeLog WHERE Version > ? AND TableName = 'RentalRequests')"
+        params.append(changed_since)
+    query += " ORDER BY RequestID DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    with get_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return _frame(rows, REQUEST_COLUMNS, REQUEST_DTYPES)
@@ -0,0 +1,174 @@
+# database/reservations.py
+"""
+Reservation calendar.
+
+Every booking is a half-open interval [StartTs, EndTs) in epoch seconds on one
+unit. There are two calendars, told apart by Kind:
+
+  'Rental' — the unit is out with a site (Rentals rows), so the vendor can't rent it
+  'Share'  — an owner site lends its rented unit to another site (RentalRequests)
+
+A share sits inside the owner's rental, so the two kinds never conflict with
+each other; within one kind the bookings of a unit never overlap. Because of
+that invariant, the only booking that can overlap [start, end) is the one with
+the greatest StartTs below `end`, and (Kind, EquipmentID, StartTs) finds it
+with one index seek — no scan of the unit's history.
+"""
+from datetime import datetime, timezone
+
+import pandas as pd
+from database.connection import get_connection
+
+KINDS = ("Rental", "Share")
+
+# The single candidate that can overlap [?start, ?end) for one unit. A correlated
+# subquery so find_free_units() can run it per unit.
+_PROBE_SQL = """
+    SELECT ReservationID, EndTs FROM Reservations
+    WHERE Kind = :kind AND EquipmentID = {unit} AND StartTs < :end
+    ORDER BY StartTs DESC
+    LIMIT 1
+"""
+
+
+def parse_time(value) -> int:
+    """
+    Epoch seconds for an ISO date or date-time ('2025-09-01', '2025-09-01 10:00').
+    Naive values are taken as UTC, like the telemetry timestamps.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        parsed = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid date/time {value!r}. Use YYYY-MM-DD or YYYY-MM-DD HH:MM.") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _interval(start, end) -> tuple[int, int]:
+    start, end = parse_time(start), parse_time(end)
+    if end <= start:
+        raise ValueError("The end of a booking must be after its start.")
+    return start, end
+
+
+def no_overlap_sql(unit: str) -> str:
+    """
+    SQL condition that the unit `unit` (a column expression) has no :kind
+    booking overlapping [:start, :end): one index probe per row it's tested on.
+    """
+    return f"NOT EXISTS (SELECT 1 FROM ({_PROBE_SQL.format(unit=unit)}) WHERE EndTs > :start)"
+
+
+def find_conflict(equipment_id: str, start, end, kind: str = "Rental"):
+    """ReservationID of the `kind` booking overlapping [start, end) on the unit, or None."""
+    start, end = _interval(start, end)
+    with get_connection() as conn:
+        row = conn.execute(
+            _PROBE_SQL.format(unit=":unit"), {"kind": kind, "unit": equipment_id, "end": end}
+        ).fetchone()
+    return row[0] if row and row[1] > start else None
+
+
+def book(equipment_id: str, start, end, kind: str, ref_id=None, site_id=None) -> int:
+    """
+    Add a `kind` booking for [start, end) on the unit and return its ReservationID.
+    Raises ValueError if it overlaps an existing one.
+
+    Run it inside the caller's BEGIN IMMEDIATE transaction so the check and the
+    insert can't interleave with another writer's.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Invalid reservation kind: {kind!r}. Use one of {list(KINDS)}.")
+    start, end = _interval(start, end)
+    with get_connection() as conn:
+        if find_conflict(equipment_id, start, end, kind) is not None:
+            raise ValueError(f"{equipment_id} is already booked during {_fmt(start)} – {_fmt(end)}.")
+        cur = conn.execute(
+            "INSERT INTO Reservations (EquipmentID, Kind, StartTs, EndTs, SiteID, RefID) VALUES (?,?,?,?,?,?)",
+            (equipment_id, kind, start, end, site_id, ref_id)
+        )
+        return cur.lastrowid
+
+
+def release(kind: str, ref_id) -> int:
+    """Drop the bookings made for `ref_id` (a RentalID or RequestID). Returns how many."""
+    with get_connection() as conn:
+        return conn.execute("DELETE FROM Reservations WHERE Kind = ? AND RefID = ?", (kind, ref_id)).rowcount
+
+
+def find_free_units(type_: str, start, end, location: str | None = None, kind: str = "Rental") -> list[str]:
+    """
+    EquipmentIDs of `type_` with no `kind` booking overlapping [start, end),
+    optionally only those at `location` (case-insensitive). One index probe per unit.
+    """
+    start, end = _interval(start, end)
+    query = f"""
+        SELECT v.EquipmentID FROM Vendor v
+        WHERE v.Type = :type
+          AND {no_overlap_sql("v.EquipmentID")}
+    """
+    params = {"type": type_, "kind": kind, "start": start, "end": end}
+    if location:
+        query += " AND v.Location = :location COLLATE NOCASE"
+        params["location"] = location
+    query += " ORDER BY v.EquipmentID"
+    with get_connection() as conn:
+        return [row[0] for row in conn.execute(query, params)]
+
+
+def get_reservations(equipment_id: str, since=None, until=None) -> pd.DataFrame:
+    """A unit's bookings overlapping [since, until) (either bound optional), oldest first."""
+    query = """
+        SELECT ReservationID, EquipmentID, Kind, StartTs, EndTs, SiteID, RefID
+        FROM Reservations WHERE EquipmentID = ?
+    """
+    params = [equipment_id]
+    if until is not None:
+        query += " AND StartTs < ?"
+        params.append(parse_time(until))
+    if since is not None:
+        query += " AND EndTs > ?"
+        params.append(parse_time(since))
+    query += " ORDER BY StartTs"
+    with get_connection() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def backfill_reservations(conn):
+    """
+    Book the existing rentals and open share requests, oldest first. Rows
+    whose times don't parse, or that overlap an earlier booking, are skipped.
+    """
+    sources = [
+        ("Rental", "SELECT RentalID, EquipmentID, SiteID, CheckOutDate, CheckInDate FROM Rentals "
+                   "WHERE CheckInDate IS NOT NULL ORDER BY RentalID"),
+        ("Share", "SELECT RequestID, EquipmentID, RequesterSiteID, TimeFrom, TimeTo FROM RentalRequests "
+                  "WHERE Status IN ('Pending', 'Approved') ORDER BY RequestID"),
+    ]
+    booked = skipped = 0
+    for kind, query in sources:
+        for ref_id, equipment_id, site_id, start, end in conn.execute(query).fetchall():
+            try:
+                start, end = _interval(start, end)
+            except ValueError:
+                skipped += 1
+                continue
+            row = conn.execute(
+                _PROBE_SQL.format(unit=":unit"), {"kind": kind, "unit": equipment_id, "end": end}
+            ).fetchone()
+            if row and row[1] > start:
+                skipped += 1
+                continue
+            conn.execute(
+                "INSERT INTO Reservations (EquipmentID, Kind, StartTs, EndTs, SiteID, RefID) VALUES (?,?,?,?,?,?)",
+                (equipment_id, kind, start, end, site_id, ref_id)
+            )
+            booked += 1
+    return booked, skipped
+
+
+def _fmt(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M")
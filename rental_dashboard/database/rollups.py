@@ -0,0 +1,274 @@
+# database/rollups.py
+import threading
+import time
+
+import pandas as pd
+from utils.config import (
+    TELEMETRY_COMPACT_INTERVAL,
+    TELEMETRY_FLUSH_INTERVAL,
+    TELEMETRY_LATE_GRACE,
+    TELEMETRY_RAW_RETENTION_DAYS,
+    TELEMETRY_MINUTE_RETENTION_DAYS,
+    TELEMETRY_HOUR_RETENTION_DAYS,
+)
+from database.connection import get_connection
+from database.telemetry import RAW_SAMPLES
+from database.shards import attached_shards, unattached_shards
+
+DAY = 86400
+
+# Samples reach the table up to a flush interval after their Ts (TelemetryWriter
+# queue) or later still (devices reporting old readings). A raw bucket is only
+# rolled once this long has passed after it ends; later samples miss the rollup.
+LATE_GRACE = max(TELEMETRY_LATE_GRACE, TELEMETRY_FLUSH_INTERVAL)
+
+# (grain, rollup table, bucket seconds, source table, retention days or None = keep forever)
+GRAINS = [
+    ("minute", "TelemetryMinute", 60, "EquipmentTelemetry", TELEMETRY_MINUTE_RETENTION_DAYS),
+    ("hour", "TelemetryHour", 3600, "TelemetryMinute", TELEMETRY_HOUR_RETENTION_DAYS),
+    ("day", "TelemetryDay", DAY, "TelemetryHour", None),
+]
+
+_METRICS = ("Engine", "Idle", "Fuel")
+_RAW_COLUMNS = {"Engine": "EngineHours", "Idle": "IdleHours", "Fuel": "Fuel"}
+
+
+def _from_raw_select() -> str:
+    parts = ["COUNT(*)"]
+    for m in _METRICS:
+        col = _RAW_COLUMNS[m]
+        parts += [f"SUM({col})", f"MIN({col})", f"MAX({col})", f"COUNT({col})"]
+    return ", ".join(parts)
+
+
+def _from_rollup_select() -> str:
+    parts = ["SUM(Samples)"]
+    for m in _METRICS:
+        parts += [f"SUM({m}Sum)", f"MIN({m}Min)", f"MAX({m}Max)", f"SUM({m}Count)"]
+    return ", ".join(parts)
+
+
+def _rollup_columns() -> str:
+    cols = ["Samples"]
+    for m in _METRICS:
+        cols += [f"{m}Sum", f"{m}Min", f"{m}Max", f"{m}Count"]
+    return ", ".join(cols)
+
+
+def _merge_assignments() -> str:
+    # Each range is rolled once, after LATE_GRACE; additive so a bucket rolled in two
+    # parts (a watermark moved back by hand) adds up instead of being overwritten
+    sets = ["Samples = Samples + excluded.Samples"]
+    for m in _METRICS:
+        sets += [
+            f"{m}Sum = COALESCE({m}Sum, 0) + COALESCE(excluded.{m}Sum, 0)",
+            f"{m}Min = MIN(COALESCE({m}Min, excluded.{m}Min), COALESCE(excluded.{m}Min, {m}Min))",
+            f"{m}Max = MAX(COALESCE({m}Max, excluded.{m}Max), COALESCE(excluded.{m}Max, {m}Max))",
+            f"{m}Count = {m}Count + excluded.{m}Count",
+        ]
+    return ",\n            ".join(sets)
+
+
+def rollup_table_sql(table: str) -> str:
+    metric_cols = ",\n        ".join(
+        f"{m}{agg} REAL" if agg != "Count" else f"{m}Count INTEGER"
+        for m in _METRICS for agg in ("Sum", "Min", "Max", "Count")
+    )
+    return f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        EquipmentID TEXT NOT NULL,
+        Bucket INTEGER NOT NULL,
+        Samples INTEGER NOT NULL,
+        {metric_cols},
+        PRIMARY KEY (EquipmentID, Bucket)
+    ) WITHOUT ROWID
+    """
+
+
+def _watermark(conn, grain: str) -> int | None:
+    row = conn.execute("SELECT Watermark FROM RollupWatermark WHERE Grain = ?", (grain,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_watermark(conn, grain: str, value: int):
+    conn.execute(
+        "INSERT INTO RollupWatermark (Grain, Watermark) VALUES (?, ?) "
+        "ON CONFLICT(Grain) DO UPDATE SET Watermark = excluded.Watermark",
+        (grain, value)
+    )
+
+
+def _source_floor(conn, source: str) -> float | None:
+    if source == "EquipmentTelemetry":
+        floors = [conn.execute(f"SELECT MIN(Ts) FROM {RAW_SAMPLES}").fetchone()[0]]
+        for path in unattached_shards(conn):
+            with get_connection(path) as shard:
+                floors.append(shard.execute("SELECT MIN(Ts) FROM EquipmentTelemetry").fetchone()[0])
+        floors = [ts for ts in floors if ts is not None]
+        return min(floors) if floors else None
+    return conn.execute(f"SELECT MIN(Bucket) FROM {source}").fetchone()[0]
+
+
+def _compact_grain(conn, grain, table, size, source, source_watermark) -> int:
+    """Roll closed buckets of `source` in [watermark, upper) into `table`. Returns rows upserted."""
+    # Only buckets that are closed in time and fully present in the source
+    upper = int(source_watermark // size) * size
+    lower = _watermark(conn, grain)
+    if lower is None:
+        floor = _source_floor(conn, source)
+        if floor is None:
+            return 0
+        lower = int(floor // size) * size
+    if upper <= lower:
+        return 0
+
+    raw = source == "EquipmentTelemetry"
+    if raw:
+        # RAW_SAMPLES also covers the attached site shards when sharding is on
+        source = RAW_SAMPLES
+        bucket, select, where = f"CAST(Ts / {size} AS INTEGER) * {size}", _from_raw_select(), "Ts >= ? AND Ts < ?"
+    else:
+        bucket, select, where = f"(Bucket / {size}) * {size}", _from_rollup_select(), "Bucket >= ? AND Bucket < ?"
+
+    grouped = f"SELECT EquipmentID, {bucket} AS B, {select} FROM {{source}} WHERE {where} GROUP BY EquipmentID, B"
+    insert = f"INSERT INTO {table} (EquipmentID, Bucket, {_rollup_columns()})"
+    merge = f"ON CONFLICT(EquipmentID, Bucket) DO UPDATE SET {_merge_assignments()}"
+    cur = conn.execute(f"{insert} {grouped.format(source=source)} {merge}", (lower, upper))
+    upserted = max(cur.rowcount, 0)
+    if raw:
+        # Shards past the attach limit: group on the shard, merge the groups here
+        values = ", ".join("?" * (len(_rollup_columns().split(", ")) + 2))
+        for path in unattached_shards(conn):
+            with get_connection(path) as shard:
+                rows = shard.execute(grouped.format(source="EquipmentTelemetry"), (lower, upper)).fetchall()
+            upserted += max(conn.executemany(f"{insert} VALUES ({values}) {merge}", rows).rowcount, 0)
+    _set_watermark(conn, grain, upper)
+    return upserted
+
+
+def _apply_retention(conn, now: float, grace: float = LATE_GRACE) -> dict:
+    """
+    Drop source rows that are past retention *and* already rolled up one level.
+    Raw rows inside the lateness grace are never dropped, whatever the retention.
+    """
+    deleted = {}
+    raw_cutoff = min(now - TELEMETRY_RAW_RETENTION_DAYS * DAY, now - grace, _watermark(conn, "minute") or 0)
+    deleted["EquipmentTelemetry"] = conn.execute(
+        "DELETE FROM EquipmentTelemetry WHERE Ts < ?", (raw_cutoff,)
+    ).rowcount
+    for shard in attached_shards(conn):
+        deleted["EquipmentTelemetry"] += conn.execute(
+            f"DELETE FROM {shard}.EquipmentTelemetry WHERE Ts < ?", (raw_cutoff,)
+        ).rowcount
+    for path in unattached_shards(conn):
+        with get_connection(path, immediate=True) as shard:
+            deleted["EquipmentTelemetry"] += shard.execute(
+                "DELETE FROM EquipmentTelemetry WHERE Ts < ?", (raw_cutoff,)
+            ).rowcount
+
+    for i, (grain, table, _size, _source, retention_days) in enumerate(GRAINS):
+        if retention_days is None or i + 1 >= len(GRAINS):
+            continue
+        next_grain = GRAINS[i + 1][0]
+        cutoff = min(now - retention_days * DAY, _watermark(conn, next_grain) or 0)
+        deleted[table] = conn.execute(f"DELETE FROM {table} WHERE Bucket < ?", (cutoff,)).rowcount
+    return deleted
+
+
+def compact(now: float | None = None, grace: float = LATE_GRACE) -> dict:
+    """
+    One compactor pass: raw -> minute -> hour -> day for buckets closed since
+    each grain's watermark, then retention. A raw bucket counts as closed
+    `grace` seconds after it ends. Each grain commits on its own so a long
+    pass doesn't hold the write lock for everything at once.
+    """
+    now = time.time() if now is None else now
+    summary = {}
+    source_watermark = now - grace
+    for grain, table, size, source, _retention in GRAINS:
+        with get_connection(immediate=True) as conn:
+            summary[grain] = _compact_grain(conn, grain, table, size, source, source_watermark)
+            source_watermark = _watermark(conn, grain) or 0
+    with get_connection(immediate=True) as conn:
+        summary["deleted"] = _apply_retention(conn, now, grace)
+    return summary
+
+
+# --- Background compactor ---
+
+_compactor: threading.Thread | None = None
+_compactor_stop = threading.Event()
+_compactor_lock = threading.Lock()
+
+
+def _compactor_loop(interval: float):
+    while not _compactor_stop.wait(interval):
+        try:
+            compact()
+        except Exception as e:
+            print(f"⚠️ Telemetry compaction failed: {e}")
+
+
+def start_compactor(interval: float = TELEMETRY_COMPACT_INTERVAL):
+    """Start the process-wide compactor thread once; later calls are no-ops."""
+    global _compactor
+    with _compactor_lock:
+        if _compactor is None or not _compactor.is_alive():
+            _compactor_stop.clear()
+            _compactor = threading.Thread(target=_compactor_loop, args=(interval,), name="telemetry-compactor",
+                                          daemon=True)
+            _compactor.start()
+
+
+def stop_compactor():
+    _compactor_stop.set()
+
+
+# --- Readers ---
+
+def get_daily_usage(since: float | None = None, site_id: int | None = None) -> pd.DataFrame:
+    """
+    Per unit per UTC day: engine/idle hours (sums), fuel min/max/avg and sample
+    count, joined with the unit's Type and SiteID.
+    """
+    query = """
+        SELECT d.EquipmentID, v.Type, v.SiteID,
+               date(d.Bucket, 'unixepoch') AS Day,
+               COALESCE(d.EngineSum, 0) AS EngineHours,
+               COALESCE(d.IdleSum, 0) AS IdleHours,
+               d.FuelMin, d.FuelMax,
+               d.FuelSum / NULLIF(d.FuelCount, 0) AS FuelAvg,
+               d.Samples
+        FROM TelemetryDay d
+        JOIN Vendor v ON v.EquipmentID = d.EquipmentID
+        WHERE 1=1
+    """
+    params = []
+    if since is not None:
+        query += " AND d.Bucket >= ?"
+        params.append(int(since))
+    if site_id is not None:
+        query += " AND v.SiteID = ?"
+        params.append(site_id)
+    query += " ORDER BY d.Bucket, d.EquipmentID"
+    with get_connection() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def get_hourly_usage(equipment_id: str, since: float | None = None) -> pd.DataFrame:
+    query = """
+        SELECT EquipmentID, Bucket,
+               COALESCE(EngineSum, 0) AS EngineHours,
+               COALESCE(IdleSum, 0) AS IdleHours,
+               FuelSum / NULLIF(FuelCount, 0) AS FuelAvg,
+               Samples
+        FROM TelemetryHour
+        WHERE EquipmentID = ?
+    """
+    params = [equipment_id]
+    if since is not None:
+        query += " AND Bucket >= ?"
+        params.append(int(since))
+    query += " ORDER BY Bucket"
+    with get_connection() as conn:
+        return pd.read_sql_query(query, conn, params=params)
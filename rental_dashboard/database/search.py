@@ -0,0 +1,126 @@
+# database/search.py
+"""
+Full-text search over the fleet.
+
+VendorSearch is an FTS5 table with one row per Vendor row (same rowid)
+holding EquipmentID, Type, Location and the owning site's contact details.
+Triggers on Vendor and SiteInfo keep it in step inside the writer's
+transaction. Prefix indexes on 2–4 characters keep typeahead queries such as
+"EQX11" or "crane chen" to a few index lookups.
+
+A full VACUUM may renumber Vendor rowids (its key is TEXT); run
+rebuild_vendor_search() after one.
+"""
+import re
+
+from database.connection import get_connection
+
+VENDOR_SEARCH_TABLE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS VendorSearch USING fts5(
+    EquipmentID, Type, Location, Contact,
+    tokenize = 'unicode61',
+    prefix = '2 3 4'
+)
+"""
+
+
+def _contact(site_id: str) -> str:
+    # A site can have several SiteInfo rows (one per rental); index each contact once
+    return (f"(SELECT group_concat(ContactDetails, ' ') FROM "
+            f"(SELECT DISTINCT ContactDetails FROM SiteInfo WHERE SiteID = {site_id}))")
+
+
+def _refresh_site(site_id: str) -> str:
+    return f"""
+        UPDATE VendorSearch SET Contact = {_contact(site_id)}
+        WHERE rowid IN (SELECT rowid FROM Vendor WHERE SiteID = {site_id});"""
+
+
+def vendor_search_trigger_sql() -> list[str]:
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_vendor_insert
+        AFTER INSERT ON Vendor
+        BEGIN
+            INSERT INTO VendorSearch (rowid, EquipmentID, Type, Location, Contact)
+            VALUES (NEW.rowid, NEW.EquipmentID, NEW.Type, NEW.Location, {_contact("NEW.SiteID")});
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_search_vendor_delete
+        AFTER DELETE ON Vendor
+        BEGIN
+            DELETE FROM VendorSearch WHERE rowid = OLD.rowid;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_vendor_update
+        AFTER UPDATE OF EquipmentID, Type, Location, SiteID ON Vendor
+        BEGIN
+            UPDATE VendorSearch
+            SET EquipmentID = NEW.EquipmentID, Type = NEW.Type, Location = NEW.Location,
+                Contact = {_contact("NEW.SiteID")}
+            WHERE rowid = OLD.rowid;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_siteinfo_insert
+        AFTER INSERT ON SiteInfo
+        BEGIN{_refresh_site("NEW.SiteID")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_siteinfo_update
+        AFTER UPDATE OF SiteID, ContactDetails ON SiteInfo
+        BEGIN{_refresh_site("OLD.SiteID")}{_refresh_site("NEW.SiteID")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_siteinfo_delete
+        AFTER DELETE ON SiteInfo
+        BEGIN{_refresh_site("OLD.SiteID")}
+        END
+        """,
+    ]
+
+
+def rebuild_vendor_search(conn):
+    """Re-index every Vendor row from scratch (each site's contacts are gathered once, not per unit)."""
+    conn.execute("DELETE FROM VendorSearch")
+    conn.execute("""
+        WITH SiteContact AS (
+            SELECT SiteID, group_concat(ContactDetails, ' ') AS Contact
+            FROM (SELECT DISTINCT SiteID, ContactDetails FROM SiteInfo WHERE SiteID IS NOT NULL)
+            GROUP BY SiteID
+        )
+        INSERT INTO VendorSearch (rowid, EquipmentID, Type, Location, Contact)
+        SELECT v.rowid, v.EquipmentID, v.Type, v.Location, c.Contact
+        FROM Vendor v LEFT JOIN SiteContact c ON c.SiteID = v.SiteID
+    """)
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def match_query(text: str) -> str | None:
+    """
+    FTS5 MATCH expression for what a user typed: every word must match as a
+    prefix, in any column ("crane chen" -> "crane"* "chen"*). None if there
+    is nothing to search for. Quoting each word keeps FTS5 syntax out of user input.
+    """
+    words = _TOKEN.findall(text or "")
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_ids(text: str, limit: int = 20) -> list[str]:
+    """EquipmentIDs of the best `limit` matches for `text`, best first."""
+    match = match_query(text)
+    if match is None:
+        return []
+    with get_connection() as conn:
+        return [row[0] for row in conn.execute(
+            "SELECT EquipmentID FROM VendorSearch WHERE VendorSearch MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit)
+        )]
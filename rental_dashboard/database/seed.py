@@ -0,0 +1,23 @@
+# database/seed.py
+# Demo fleet loaded into an empty Vendor table by the seed migration.
+import csv
+import os
+
+# Same layout `python -m database.fleet_io import vendor` reads
+DEMO_FLEET_FILE = os.path.join(os.path.dirname(__file__), "demo_fleet.csv")
+
+
+def seed_demo_fleet(conn):
+    """Insert the demo fleet if Vendor is empty. Returns the number of rows added."""
+    count = conn.execute("SELECT COUNT(*) FROM Vendor").fetchone()[0]
+    if count:
+        return 0
+
+    with open(DEMO_FLEET_FILE, newline="") as f:
+        rows = [(r["EquipmentID"], r["Type"], r["Availability"]) for r in csv.DictReader(f)]
+    conn.executemany("""
+    INSERT INTO Vendor (EquipmentID, Type, Availability)
+    VALUES (?, ?, ?)
+    """, rows)
+    print("✅ Vendor table pre-populated with default equipment data.")
+    return len(rows)
@@ -0,0 +1,192 @@
+# database/shards.py
+"""
+Optional per-site shards for the telemetry write stream (SHARDING_ENABLED).
+
+The catalog database (DB_PATH) keeps every cross-site table: Vendor and the
+shared listings, SiteInfo, RentalRequests, Rentals, the rollups. With
+sharding on, each site's raw samples go to their own file,
+SHARD_DIR/site_<SiteID>.db, which holds EquipmentTelemetry and
+EquipmentLatest with the same trigger as the catalog, so feeds for
+different sites commit under different write locks.
+
+After each shard batch the touched units' EquipmentLatest rows are copied
+into the catalog in one short transaction. VendorCurrent, change capture and
+the live views therefore work unchanged, and the catalog lock is held for
+one upsert per unit instead of for every sample.
+
+Reads of raw samples across sites go through RAW_SAMPLES, a TEMP view that
+is the catalog table UNION ALL the attached shards'. Catalog connections
+ATTACH the first SHARD_ATTACH_LIMIT shard files found on disk whenever they
+are checked out; SQLite refuses more than 10 attached databases, so readers
+open the shards past the limit one by one (unattached_shards()). Units
+without a SiteID keep writing to the catalog.
+"""
+import os
+import re
+import sys
+import threading
+
+from utils.config import SHARD_ATTACH_LIMIT, SHARD_DIR, SHARDING_ENABLED
+from database.connection import get_connection, get_pool
+from database.telemetry import (
+    TELEMETRY_TABLE_SQL, LATEST_TABLE_SQL, LATEST_TRIGGER_SQL, INSERT_SAMPLE_SQL, RAW_SAMPLES,
+)
+
+SHARD_SCHEMA = (TELEMETRY_TABLE_SQL, LATEST_TABLE_SQL, LATEST_TRIGGER_SQL)
+
+# Same parameter order (and resent-sample rule) as INSERT_SAMPLE_SQL; the Rented
+# check already happened in route()
+INSERT_SHARD_SAMPLE_SQL = """
+    INSERT INTO EquipmentTelemetry (Ts, EngineHours, IdleHours, Fuel, EquipmentID)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(EquipmentID, Ts) DO NOTHING
+"""
+
+UPSERT_LATEST_SQL = """
+    INSERT INTO EquipmentLatest (EquipmentID, Ts, Day, EngineHourDay, IdleHourDay, Fuel)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(EquipmentID) DO UPDATE SET
+        Ts = excluded.Ts, Day = excluded.Day, EngineHourDay = excluded.EngineHourDay,
+        IdleHourDay = excluded.IdleHourDay, Fuel = excluded.Fuel
+"""
+
+_SHARD_FILE = re.compile(r"^site_(\d+)\.db$")
+_SHARD_SCHEMA_NAME = re.compile(r"^site_\d+$")
+
+
+def shard_path(site_id) -> str:
+    return os.path.join(SHARD_DIR, f"site_{int(site_id)}.db")
+
+
+def shard_sites() -> list[int]:
+    """SiteIDs that have a shard file."""
+    try:
+        names = os.listdir(SHARD_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(int(m.group(1)) for m in map(_SHARD_FILE.match, names) if m)
+
+
+_ready: set[int] = set()
+_ready_lock = threading.Lock()
+
+
+def ensure_shard(site_id) -> str:
+    """Path of the site's shard, created with the telemetry schema on first use."""
+    site_id = int(site_id)
+    path = shard_path(site_id)
+    with _ready_lock:
+        if site_id not in _ready:
+            os.makedirs(SHARD_DIR, exist_ok=True)
+            with get_connection(path) as conn:
+                for ddl in SHARD_SCHEMA:
+                    conn.execute(ddl)
+            _ready.add(site_id)
+    return path
+
+
+# --- Writes ---
+
+def route(equipment_ids) -> dict:
+    """{EquipmentID: SiteID or None} for the units that are rented (only those accept telemetry)."""
+    ids = sorted(set(equipment_ids))
+    if not ids:
+        return {}
+    with get_connection() as conn:
+        return dict(conn.execute(
+            f"SELECT EquipmentID, SiteID FROM Vendor "
+            f"WHERE Availability = 'Rented' AND EquipmentID IN ({', '.join('?' * len(ids))})",
+            ids
+        ).fetchall())
+
+
+def write_samples(batch: list[tuple]) -> int:
+    """
+    Write INSERT_SAMPLE_SQL parameter tuples to their units' site shards, one
+    transaction per shard. Returns the samples written; samples for units
+    that aren't rented are dropped.
+    """
+    sites = route(params[-1] for params in batch)
+    by_site: dict = {}
+    for params in batch:
+        if params[-1] in sites:
+            by_site.setdefault(sites[params[-1]], []).append(params)
+
+    written = 0
+    for site_id, rows in by_site.items():
+        if site_id is None:
+            with get_connection(immediate=True) as conn:
+                written += max(conn.executemany(INSERT_SAMPLE_SQL, rows).rowcount, 0)
+            continue
+        units = sorted({params[-1] for params in rows})
+        with get_connection(ensure_shard(site_id), immediate=True) as conn:
+            written += max(conn.executemany(INSERT_SHARD_SAMPLE_SQL, rows).rowcount, 0)
+            latest = conn.execute(
+                f"SELECT EquipmentID, Ts, Day, EngineHourDay, IdleHourDay, Fuel FROM EquipmentLatest "
+                f"WHERE EquipmentID IN ({', '.join('?' * len(units))})",
+                units
+            ).fetchall()
+        with get_connection(immediate=True) as conn:
+            conn.executemany(UPSERT_LATEST_SQL, latest)
+    return written
+
+
+# --- Federated reads ---
+
+def attach_shards(conn):
+    """
+    ATTACH the first SHARD_ATTACH_LIMIT shards to `conn` and (re)build the
+    RAW_SAMPLES view over them. Outside a transaction. What is attached is
+    read back from the connection, so nothing here holds on to it.
+    """
+    wanted = {f"site_{site_id}": site_id for site_id in shard_sites()[:SHARD_ATTACH_LIMIT]}
+    present = set(attached_shards(conn))
+    has_view = conn.execute(
+        "SELECT 1 FROM temp.sqlite_master WHERE type = 'view' AND name = ?", (RAW_SAMPLES,)
+    ).fetchone()
+    if present == set(wanted) and has_view:
+        return
+    for name in present - set(wanted):
+        conn.execute(f"DETACH DATABASE {name}")
+    for name, site_id in wanted.items():
+        if name not in present:
+            conn.execute(f"ATTACH DATABASE ? AS {name}", (shard_path(site_id),))
+    sources = ["SELECT * FROM main.EquipmentTelemetry"]
+    sources += [f"SELECT * FROM {name}.EquipmentTelemetry" for name in wanted]
+    conn.execute(f"DROP VIEW IF EXISTS temp.{RAW_SAMPLES}")
+    conn.execute(f"CREATE TEMP VIEW {RAW_SAMPLES} AS {' UNION ALL '.join(sources)}")
+
+
+def attached_shards(conn) -> list[str]:
+    """Schema names of the shards attached to `conn` (e.g. for per-shard retention deletes)."""
+    return [row[1] for row in conn.execute("PRAGMA database_list") if _SHARD_SCHEMA_NAME.match(row[1])]
+
+
+def unattached_shards(conn) -> list[str]:
+    """
+    Paths of the shard files that RAW_SAMPLES on `conn` doesn't cover (past
+    SHARD_ATTACH_LIMIT). Raw-sample readers open each with get_connection(path).
+    """
+    if not SHARDING_ENABLED:
+        return []
+    present = set(attached_shards(conn))
+    return [shard_path(site_id) for site_id in shard_sites() if f"site_{site_id}" not in present]
+
+
+def install():
+    """Attach shards to catalog connections as they are checked out. No-op unless SHARDING_ENABLED."""
+    if SHARDING_ENABLED:
+        get_pool().add_checkout_hook(attach_shards)
+
+
+if __name__ == "__main__":
+    from database.db import init_db
+    init_db()
+    if not SHARDING_ENABLED:
+        print("ℹ️ SHARDING_ENABLED is off; telemetry is written to the catalog database.")
+        sys.exit(0)
+    for site_id in shard_sites():
+        with get_connection(shard_path(site_id)) as conn:
+            samples = conn.execute("SELECT COUNT(*) FROM EquipmentTelemetry").fetchone()[0]
+            units = conn.execute("SELECT COUNT(*) FROM EquipmentLatest").fetchone()[0]
+        print(f"🗄️ Site {site_id}: {shard_path(site_id)} — {samples} samples, {units} units")
@@ -0,0 +1,217 @@
+# database/snapshot.py
+"""
+Columnar snapshots for the analytics pages.
+
+The exporter reads the datasets in one read transaction, so they all reflect
+the same commit, and writes each column to its own .npy file:
+
+    SNAPSHOT_DIR/manifest.json                     which snapshot is current
+    SNAPSHOT_DIR/v<version>/<dataset>/<column>.npy
+
+Each dataset is stamped with data_version() of the tables it reads
+(DATASET_TABLES), and only the datasets whose tables changed are queried
+again; the others are hard-linked from the previous snapshot. Telemetry
+arriving therefore re-exports the datasets built on EquipmentLatest, not
+every one. <version> is the highest dataset version. Numeric and date
+columns are plain arrays; text columns are stored as categorical codes with
+the categories in the manifest. Readers np.load(..., mmap_mode="r") the
+arrays, so a page load maps files instead of decoding rows from SQLite and
+never queues behind the live writer.
+
+The manifest is replaced atomically after the new directory is complete;
+older directories are removed once SNAPSHOT_KEEP newer ones exist (already
+mapped files stay readable until unmapped).
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from utils.config import SNAPSHOT_DIR, SNAPSHOT_INTERVAL, SNAPSHOT_KEEP
+from database.connection import read_snapshot
+from database.changes import data_version
+from database.repository import VENDOR_COLUMNS
+from database.db import RENTAL_HISTORY_SQL
+
+# dataset -> query
+DATASETS = {
+    "vendor": f"SELECT {', '.join(VENDOR_COLUMNS)} FROM VendorCurrent ORDER BY EquipmentID",
+    "rentals": RENTAL_HISTORY_SQL,
+    "telemetry_day": """
+        SELECT EquipmentID, Bucket, EngineSum, IdleSum, FuelSum, FuelCount, Samples
+        FROM TelemetryDay ORDER BY Bucket, EquipmentID
+    """,
+    "sites": "SELECT SiteID, Location, ContactDetails FROM SiteInfo",
+}
+
+# dataset -> versioned tables behind its query (VendorCurrent is Vendor + EquipmentLatest,
+# RentalsAll is Rentals + RentalsArchive)
+DATASET_TABLES = {
+    "vendor": ("Vendor", "EquipmentLatest"),
+    "rentals": ("Rentals", "RentalsArchive", "Vendor", "EquipmentLatest", "TelemetryDay"),
+    "telemetry_day": ("TelemetryDay",),
+    "sites": ("SiteInfo",),
+}
+
+# Stored as datetime64 so readers don't re-parse text dates
+DATE_COLUMNS = {"CheckOutDate", "CheckInDate"}
+
+MANIFEST = "manifest.json"
+
+
+class Snapshot(NamedTuple):
+    frame: pd.DataFrame
+    version: int        # CDC version of the dataset's tables the data reflects
+    created: float      # epoch seconds the dataset was exported
+
+
+# --- Export ---
+
+def _write_column(path: str, name: str, values: pd.Series) -> dict:
+    if name in DATE_COLUMNS:
+        np.save(path, pd.to_datetime(values, errors="coerce").to_numpy("datetime64[ns]"), allow_pickle=False)
+        return {"kind": "datetime"}
+    if pd.api.types.is_numeric_dtype(values):
+        np.save(path, values.to_numpy(), allow_pickle=False)
+        return {"kind": "numeric"}
+    codes = pd.Categorical(values)
+    np.save(path, codes.codes, allow_pickle=False)
+    return {"kind": "category", "categories": codes.categories.tolist()}
+
+
+def read_manifest(directory: str = SNAPSHOT_DIR) -> dict | None:
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def export_snapshot(directory: str = SNAPSHOT_DIR, keep: int = SNAPSHOT_KEEP) -> dict:
+    """
+    Write a snapshot and make it current, querying only the datasets whose
+    tables changed since the last one. A no-op (returns the current manifest)
+    if none did.
+    """
+    # One read transaction: every dataset and its version see the same commit
+    with read_snapshot() as conn:
+        versions = {name: data_version(*DATASET_TABLES[name]) for name in DATASETS}
+        current = read_manifest(directory)
+        previous = current["datasets"] if current is not None else {}
+        stale = [name for name in DATASETS if previous.get(name, {}).get("version") != versions[name]]
+        if not stale:
+            return current
+        frames = {name: pd.read_sql_query(DATASETS[name], conn) for name in stale}
+
+    version = max(versions.values())
+    name = f"v{version}"
+    target = os.path.join(directory, name)
+    staging = target + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    created = time.time()
+    manifest = {"version": version, "created": created, "dir": name, "datasets": {}}
+    for dataset in DATASETS:
+        if dataset not in frames:
+            shutil.copytree(os.path.join(directory, current["dir"], dataset), os.path.join(staging, dataset),
+                            copy_function=_link_or_copy)
+            manifest["datasets"][dataset] = previous[dataset]
+            continue
+        frame = frames[dataset]
+        os.makedirs(os.path.join(staging, dataset))
+        columns = {col: _write_column(os.path.join(staging, dataset, f"{col}.npy"), col, frame[col])
+                   for col in frame.columns}
+        manifest["datasets"][dataset] = {"rows": len(frame), "version": versions[dataset], "created": created,
+                                         "columns": columns}
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+
+    tmp_manifest = os.path.join(directory, MANIFEST + ".tmp")
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest, os.path.join(directory, MANIFEST))
+
+    _prune(directory, keep)
+    return manifest
+
+
+def _prune(directory: str, keep: int):
+    versions = sorted(
+        (int(d[1:]) for d in os.listdir(directory) if d.startswith("v") and d[1:].isdigit()),
+        reverse=True
+    )
+    for version in versions[keep:]:
+        shutil.rmtree(os.path.join(directory, f"v{version}"), ignore_errors=True)
+
+
+# --- Readers ---
+
+def load_snapshot(dataset: str, directory: str = SNAPSHOT_DIR) -> Snapshot | None:
+    """
+    The current snapshot of `dataset` with its columns memory-mapped, or None
+    if none has been exported yet. Numeric/date columns are read-only views
+    of the files; add derived columns rather than writing into them.
+    """
+    manifest = read_manifest(directory)
+    if manifest is None or dataset not in manifest["datasets"]:
+        return None
+    entry = manifest["datasets"][dataset]
+    base = os.path.join(directory, manifest["dir"], dataset)
+    data = {}
+    for col, spec in entry["columns"].items():
+        values = np.load(os.path.join(base, f"{col}.npy"), mmap_mode="r", allow_pickle=False)
+        if spec["kind"] == "category":
+            values = pd.Categorical.from_codes(values, categories=spec["categories"])
+        data[col] = values
+    return Snapshot(pd.DataFrame(data, copy=False), entry.get("version", manifest["version"]),
+                    entry.get("created", manifest["created"]))
+
+
+# --- Background exporter ---
+
+_exporter: threading.Thread | None = None
+_exporter_stop = threading.Event()
+_exporter_lock = threading.Lock()
+
+
+def _exporter_loop(interval: float):
+    while True:
+        try:
+            export_snapshot()
+        except Exception as e:
+            print(f"⚠️ Snapshot export failed: {e}")
+        if _exporter_stop.wait(interval):
+            return
+
+
+def start_snapshot_exporter(interval: float = SNAPSHOT_INTERVAL):
+    """Start the process-wide exporter thread once (exports right away); later calls are no-ops."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None or not _exporter.is_alive():
+            _exporter_stop.clear()
+            _exporter = threading.Thread(target=_exporter_loop, args=(interval,), name="snapshot-exporter",
+                                         daemon=True)
+            _exporter.start()
+
+
+def stop_snapshot_exporter():
+    _exporter_stop.set()
+
+
+if __name__ == "__main__":
+    from database.db import init_db
+    init_db()
+    manifest = export_snapshot()
+    rows = ", ".join(f"{name} {spec['rows']}" for name, spec in manifest["datasets"].items())
+    print(f"📦 Snapshot v{manifest['version']} in {SNAPSHOT_DIR}: {rows}")
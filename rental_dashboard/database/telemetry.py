@@ -0,0 +1,144 @@
+# database/telemetry.py
+import time
+
+import pandas as pd
+from utils.config import SHARDING_ENABLED
+from database.connection import get_connection
+
+# Schema of the telemetry tables; also what every per-site shard holds (database/shards.py)
+TELEMETRY_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS EquipmentTelemetry (
+    EquipmentID TEXT NOT NULL,
+    Ts REAL NOT NULL,
+    EngineHours REAL,
+    IdleHours REAL,
+    Fuel REAL,
+    PRIMARY KEY (EquipmentID, Ts)
+) WITHOUT ROWID
+"""
+
+LATEST_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS EquipmentLatest (
+    EquipmentID TEXT PRIMARY KEY,
+    Ts REAL,
+    Day TEXT,
+    EngineHourDay REAL,
+    IdleHourDay REAL,
+    Fuel REAL
+)
+"""
+
+# Folds each sample into EquipmentLatest
+LATEST_TRIGGER_SQL = """
+CREATE TRIGGER IF NOT EXISTS trg_telemetry_latest
+AFTER INSERT ON EquipmentTelemetry
+BEGIN
+    INSERT INTO EquipmentLatest (EquipmentID, Ts, Day, EngineHourDay, IdleHourDay, Fuel)
+    VALUES (
+        NEW.EquipmentID, NEW.Ts, date(NEW.Ts, 'unixepoch'),
+        MIN(COALESCE(NEW.EngineHours, 0), 24), MIN(COALESCE(NEW.IdleHours, 0), 24), NEW.Fuel
+    )
+    ON CONFLICT(EquipmentID) DO UPDATE SET
+        EngineHourDay = CASE
+            WHEN excluded.Day = Day THEN MIN(EngineHourDay + excluded.EngineHourDay, 24)
+            WHEN excluded.Day > Day THEN excluded.EngineHourDay
+            ELSE EngineHourDay
+        END,
+        IdleHourDay = CASE
+            WHEN excluded.Day = Day THEN MIN(IdleHourDay + excluded.IdleHourDay, 24)
+            WHEN excluded.Day > Day THEN excluded.IdleHourDay
+            ELSE IdleHourDay
+        END,
+        Fuel = CASE WHEN excluded.Fuel IS NOT NULL AND excluded.Ts >= Ts THEN excluded.Fuel ELSE Fuel END,
+        Day = MAX(Day, excluded.Day),
+        Ts = MAX(Ts, excluded.Ts);
+END
+"""
+
+# Batches the TelemetryWriter could not write after TELEMETRY_WRITE_ATTEMPTS tries
+# (same columns and order as sample_params, plus the error), so nothing is lost silently
+DEAD_LETTER_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS TelemetryDeadLetter (
+    DeadLetterID INTEGER PRIMARY KEY,
+    Ts REAL,
+    EngineHours REAL,
+    IdleHours REAL,
+    Fuel REAL,
+    EquipmentID TEXT,
+    Error TEXT,
+    FailedAt TEXT DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+INSERT_DEAD_LETTER_SQL = """
+    INSERT INTO TelemetryDeadLetter (Ts, EngineHours, IdleHours, Fuel, EquipmentID, Error)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Raw samples across the catalog and every site shard (see database/shards.py)
+RAW_SAMPLES = "EquipmentTelemetryAll" if SHARDING_ENABLED else "EquipmentTelemetry"
+
+# One sample per row. The SELECT keeps the old update_usage/update_fuel rule:
+# only units that are currently rented accept telemetry. A device resending a
+# reading (same unit and Ts) is skipped, so it can't fail the whole batch.
+INSERT_SAMPLE_SQL = """
+    INSERT INTO EquipmentTelemetry (EquipmentID, Ts, EngineHours, IdleHours, Fuel)
+    SELECT EquipmentID, ?, ?, ?, ?
+    FROM Vendor
+    WHERE EquipmentID = ? AND Availability = 'Rented'
+    ON CONFLICT(EquipmentID, Ts) DO NOTHING
+"""
+
+
+def sample_params(equipment_id, engine_hours=None, idle_hours=None, fuel=None, ts=None) -> tuple:
+    """Parameters for INSERT_SAMPLE_SQL, in order."""
+    return (ts if ts is not None else time.time(), engine_hours, idle_hours, fuel, equipment_id)
+
+
+def record_sample(equipment_id, engine_hours=None, idle_hours=None, fuel=None, ts=None) -> bool:
+    """
+    Append one telemetry sample. Engine/idle hours are the hours accrued since
+    the previous sample; fuel is the level at `ts` (epoch seconds, default now).
+    Returns False when the sample was dropped: the unit isn't rented, or
+    this reading is already stored.
+    """
+    params = sample_params(equipment_id, engine_hours, idle_hours, fuel, ts)
+    if SHARDING_ENABLED:
+        from database.shards import write_samples
+        return write_samples([params]) == 1
+    with get_connection() as conn:
+        cur = conn.execute(INSERT_SAMPLE_SQL, params)
+        return cur.rowcount == 1
+
+
+def get_latest(equipment_id: str):
+    """(Ts, Day, EngineHourDay, IdleHourDay, Fuel) for a unit, or None if it never reported."""
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT Ts, Day, EngineHourDay, IdleHourDay, Fuel FROM EquipmentLatest WHERE EquipmentID = ?",
+            (equipment_id,)
+        ).fetchone()
+
+
+def get_samples(equipment_id: str, since: float | None = None, until: float | None = None) -> pd.DataFrame:
+    """Raw samples for one unit in [since, until), oldest first."""
+    from database.shards import unattached_shards
+    query = "SELECT EquipmentID, Ts, EngineHours, IdleHours, Fuel FROM {source} WHERE EquipmentID = ?"
+    params = [equipment_id]
+    if since is not None:
+        query += " AND Ts >= ?"
+        params.append(since)
+    if until is not None:
+        query += " AND Ts < ?"
+        params.append(until)
+    query += " ORDER BY Ts"
+    with get_connection() as conn:
+        frames = [pd.read_sql_query(query.format(source=RAW_SAMPLES), conn, params=params)]
+        # Shards past the attach limit aren't in RAW_SAMPLES
+        for path in unattached_shards(conn):
+            with get_connection(path) as shard:
+                frames.append(pd.read_sql_query(query.format(source="EquipmentTelemetry"), shard, params=params))
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True).sort_values("Ts", ignore_index=True)
@@ -8,6 +8,9 @@ from streamlit_autorefresh import st_autorefresh
 import numpy as np
 import random
 from datetime import datetime, timedelta
+from database.db import get_rental_history_for_analysis
+from database.snapshot import load_snapshot
+from database.analytics import daily_counts
 
 
 def generate_sample_data(n=200):
@@ -65,8 +68,18 @@ def demand_forecast_view():
     # 🔄 Auto refresh every 15 seconds
     st_autorefresh(interval=15 * 1000, key="data_refresh")
 
-    # Load synthetic data
-    df = generate_sample_data(200)
+    # Real rental history: the memory-mapped snapshot when there is one (no
+    # SQLite reads on the refresh loop), else the Rentals table directly.
+    # Synthetic data until there is enough.
+    snap = load_snapshot("rentals")
+    if snap is not None:
+        df = snap.frame
+        st.caption(f"Snapshot of data version {snap.version}, taken {datetime.fromtimestamp(snap.created):%H:%M:%S}.")
+    else:
+        df = get_rental_history_for_analysis()
+    if df['CheckOutDate'].nunique() < 2:
+        st.caption("ℹ Not enough recorded rentals yet — showing synthetic sample data.")
+        df = generate_sample_data(200)
 
     # --- Site selection ---
     site_list = df['SiteID'].dropna().unique()
@@ -74,11 +87,9 @@ def demand_forecast_view():
 
     # --- Demand Forecast ---
     st.subheader("🔮 Demand Forecast (Next 30 Days)")
-    site_df = df[df['SiteID'] == site_id].copy()
 
     # Rentals per day (historical demand)
-    daily_rentals = site_df.groupby('CheckOutDate').size().reset_index(name='Rentals')
-    daily_rentals.rename(columns={'CheckOutDate': 'ds', 'Rentals': 'y'}, inplace=True)
+    daily_rentals = daily_counts(df, site_id)
 
     if daily_rentals.shape[0] < 2:
         st.info("ℹ Not enough rental history for forecasting.")
@@ -1,82 +1,94 @@
 # modules/client_dashboard.py
-import pandas as pd
 import streamlit as st
-from database.db import get_connection
-from database.db import add_rental_request
+from database.connection import read_snapshot
+from database.db import (
+    add_rental_request, fetch_vendor_page, fetch_request_page, search_equipment, update_request_status,
+)
+from database.fleet_summary import count_units
+from modules.pagination import paginate, page_cursor, page_controls
+from modules.live import session_subscription, rerun_on_event
+from utils.events import ShareChanged, EquipmentRented, RequestCreated, RequestStatusChanged
+from utils.config import SEARCH_RESULTS
+
+OWNED_COLUMNS = ("EquipmentID", "Type", "SiteID", "Location", "Availability", "RentalType", "ReadyToShare")
+SHARED_COLUMNS = OWNED_COLUMNS[:-1]
 
 def client_dashboard(site_id: int, title: str = "Client Dashboard"):
     st.title(title)
 
-    # ---- Fetch data ----
-    with get_connection() as conn:
-        # Owned by this client (by SiteID)
-        owned_df = pd.read_sql_query(
-            """
-            SELECT EquipmentID, Type, SiteID, Location, Availability, RentalType, ReadyToShare
-            FROM Vendor
-            WHERE SiteID = ?
-            ORDER BY EquipmentID
-            """,
-            conn, params=(site_id,)
-        )
-
-        # All items marked ReadyToShare by any site (global share)
-        shared_df = pd.read_sql_query(
-            """
-            SELECT EquipmentID, Type, SiteID, Location, Availability, RentalType
-            FROM Vendor
-            WHERE ReadyToShare = 1
-            ORDER BY EquipmentID
-            """,
-            conn
-        )
-
-    # ✅ Your equipment ready to rent (your own items with ReadyToShare = 1)
-    if owned_df.empty:
-        ready_df = owned_df  # empty
-    else:
-        tmp = owned_df.copy()
-        if "ReadyToShare" in tmp.columns:
-            tmp["ReadyToShare"] = tmp["ReadyToShare"].fillna(0).astype(int)
+    # Shares/rentals anywhere change "Shared by others"; requests only matter for this site
+    live = session_subscription(f"client_dashboard_{site_id}", [
+        ((ShareChanged, EquipmentRented), None),
+        ((RequestCreated, RequestStatusChanged), site_id),
+    ])
+
+    # Every read for this render runs in one read transaction, so the KPIs, search and
+    # listings agree with each other; the forms below write after it has ended
+    with read_snapshot():
+        # ---- KPIs (FleetSummary group counts; each listing below loads a single keyset page) ----
+        owned_total = count_units(site_id=site_id)
+        ready_total = count_units(site_id=site_id, ready_to_share=True)
+        shared_total = count_units(ready_to_share=True, exclude_site_id=site_id)
+
+        left, mid, right = st.columns(3)
+        with left:
+            st.metric("Your equipment (total)", owned_total)
+        with mid:
+            st.metric("Your equipment ready to rent", ready_total)
+        with right:
+            st.metric("Shared by others", shared_total)
+
+        search = st.text_input("🔎 Find equipment", placeholder="ID, type, location or site contact — e.g. EQX11, crane chen",
+                               key=f"client_search_{site_id}")
+        if search.strip():
+            matches = search_equipment(search, limit=SEARCH_RESULTS, columns=OWNED_COLUMNS)
+            if matches.empty:
+                st.info(f"No equipment matches '{search}'.")
+            else:
+                st.dataframe(matches, use_container_width=True)
+
+        # ---- Section: Equipment owned by this client ----
+        st.subheader("Your Equipment (owned by this client)")
+        if owned_total == 0:
+            st.info("You don't own any equipment yet.")
         else:
-            tmp["ReadyToShare"] = 0
-        ready_df = tmp[tmp["ReadyToShare"] == 1]
-
-    # ✅ Shared equipment from *other* clients only
-    other_shared_df = shared_df[shared_df["SiteID"] != site_id] if not shared_df.empty else shared_df
-
-    # ---- KPIs ----
-    left, mid, right = st.columns(3)
-    with left:
-        st.metric("Your equipment (total)", len(owned_df))
-    with mid:
-        st.metric("Your equipment ready to rent", len(ready_df))
-    with right:
-        st.metric("Shared by others", len(other_shared_df))
-
-    # ---- Section: Equipment owned by this client ----
-    st.subheader("Your Equipment (owned by this client)")
-    if owned_df.empty:
-        st.info("You don't own any equipment yet.")
-    else:
-        filt_col = st.selectbox("Filter by availability", ["All", "Available", "Rented"], index=0)
-        show_df = owned_df
-        if filt_col != "All":
-            show_df = owned_df[owned_df["Availability"].str.upper() == filt_col.upper()]
-        st.dataframe(show_df.reset_index(drop=True), use_container_width=True)
-
-    # ---- Section: Your equipment ready to rent ----
-    st.subheader("Your Equipment Ready to Rent")
-    if ready_df.empty:
-        st.info("None of your equipment is marked ReadyToShare yet.")
-    else:
-        st.dataframe(ready_df.reset_index(drop=True), use_container_width=True)
+            filt_col = st.selectbox("Filter by availability", ["All", "Available", "Rented"], index=0)
+            show_df = paginate(
+                "client_owned",
+                lambda cursor: fetch_vendor_page(cursor, columns=OWNED_COLUMNS, site_id=site_id, filter_by=filt_col),
+                reset_on=(site_id, filt_col),
+            )
+            st.dataframe(show_df.reset_index(drop=True), use_container_width=True)
+
+        # ---- Section: Your equipment ready to rent ----
+        st.subheader("Your Equipment Ready to Rent")
+        if ready_total == 0:
+            st.info("None of your equipment is marked ReadyToShare yet.")
+        else:
+            ready_df = paginate(
+                "client_ready",
+                lambda cursor: fetch_vendor_page(cursor, columns=OWNED_COLUMNS, site_id=site_id, ready_to_share=True),
+                reset_on=site_id,
+            )
+            st.dataframe(ready_df.reset_index(drop=True), use_container_width=True)
+
+        # Pages for the sections with write buttons; their Prev/Next render with them below
+        if shared_total:
+            other_shared_df, shared_next = fetch_vendor_page(
+                page_cursor("client_shared", reset_on=site_id), columns=SHARED_COLUMNS, ready_to_share=True,
+                exclude_site_id=site_id,
+            )
+        incoming_df, incoming_next = fetch_request_page(
+            page_cursor("client_requests", reset_on=site_id), owner_site_id=site_id, status="Pending"
+        )
 
     # ---- Section: Equipment on Share (from other clients) ----
     st.subheader("Equipment on Share (from other clients)")
-    if other_shared_df.empty:
+    if shared_total == 0:
         st.info("No shared items from other clients.")
     else:
+        # ✅ Shared equipment from *other* clients only
+        page_controls("client_shared", shared_next)
         for _, row in other_shared_df.iterrows():
             with st.expander(f"Equipment {row['EquipmentID']} ({row['Type']})", expanded=False):
                 st.write(f"Owner Site: {row['SiteID']}, Location: {row['Location']}")
@@ -91,7 +103,6 @@ def client_dashboard(site_id: int, title: str = "Client Dashboard"):
 
                 if submitted:
                     try:
-                        from database.db import add_rental_request
                         # DO NOT pass owner_site_id; your function looks it up
                         add_rental_request(
                             equipment_id=row["EquipmentID"],
@@ -110,10 +121,8 @@ def client_dashboard(site_id: int, title: str = "Client Dashboard"):
     # ---- Section: Incoming Requests for Your Equipment ----
     # modules/client_dashboard.py (inside client_dashboard)
 
-    from database.db import get_requests_for_owner, approve_request,update_request_status
-
     st.subheader("Incoming Requests for Your Equipment")
-    incoming_df = get_requests_for_owner(site_id)
+    page_controls("client_requests", incoming_next)
 
     if incoming_df.empty:
         st.info("No pending requests.")
@@ -138,13 +147,24 @@ def client_dashboard(site_id: int, title: str = "Client Dashboard"):
                 #         update_request_status(row["RequestID"], "Rejected")
                 #         st.error(f"Request {row['RequestID']} rejected.")
                 #         st.rerun()
+                # Compare-and-swap on the Version shown here: a concurrent decision wins, this one reports it
                 with c1:
                     if st.button("✅ Approve", key=f"approve_{row['RequestID']}"):
-                        update_request_status(row["RequestID"], "Approved", row["RequesterSiteID"])
-                        st.success(f"Request {row['RequestID']} approved.")
-                        st.rerun()
+                        result = update_request_status(row["RequestID"], "Approved", row["RequesterSiteID"],
+                                                       expected_version=int(row["Version"]))
+                        if result.ok:
+                            st.success(result.message)
+                            st.rerun()
+                        else:
+                            st.warning(f"⚠️ {result.message}")
                 with c2:
                     if st.button("❌ Reject", key=f"reject_{row['RequestID']}"):
-                        update_request_status(row["RequestID"], "Rejected", row["RequesterSiteID"])
-                        st.error(f"Request {row['RequestID']} rejected.")
-                        st.rerun()
\ No newline at end of file
+                        result = update_request_status(row["RequestID"], "Rejected", row["RequesterSiteID"],
+                                                       expected_version=int(row["Version"]))
+                        if result.ok:
+                            st.error(result.message)
+                            st.rerun()
+                        else:
+                            st.warning(f"⚠️ {result.message}")
+
+    rerun_on_event(live)
@@ -0,0 +1,45 @@
+# modules/live.py
+import time
+import streamlit as st
+
+from utils.config import LIVE_FALLBACK_SECONDS
+from utils.events import Subscription, subscribe
+
+
+def session_subscription(key: str, topics: list[tuple]) -> Subscription:
+    """
+    This session's event subscription for a page, kept in session_state.
+    `topics` is a list of (event types, site_id or None).
+
+    Anything already pending is discarded: the run that is starting reads
+    fresh data anyway, so only events published from here on should wake it.
+    """
+    sub = st.session_state.get(f"{key}_sub")
+    if sub is None or sub.topics != topics:
+        (types, site_id), *rest = topics
+        sub = subscribe(*types, site_id=site_id)
+        for types, site_id in rest:
+            sub.also(*types, site_id=site_id)
+        st.session_state[f"{key}_sub"] = sub
+    sub.wait(0)
+    return sub
+
+
+def rerun_on_event(sub: Subscription, min_interval: float = 0, fallback: float = LIVE_FALLBACK_SECONDS,
+                   tick: float = 1.0):
+    """
+    End a page run by waiting on `sub`, then rerun once a relevant event has
+    arrived (no sooner than `min_interval` seconds) or after `fallback` seconds.
+
+    The status line is redrawn every `tick` seconds; that Streamlit call is
+    also what lets a widget click interrupt the wait.
+    """
+    status = st.empty()
+    started = time.monotonic()
+    changed = False
+    while True:
+        changed = bool(sub.wait(tick)) or changed
+        elapsed = time.monotonic() - started
+        if (changed and elapsed >= min_interval) or elapsed >= fallback:
+            st.rerun()
+        status.caption(f"🟢 Live — {'update pending' if changed else 'waiting for changes'}")
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 from geopy.distance import geodesic
-from database.db import fetch_vendors, mark_ready_to_share
+from database.db import mark_ready_to_share
+from database.repository import vendors_frame
 
 
 # Keep keys lowercased for reliable lookups
@@ -13,23 +14,6 @@ LOCATION_COORDS = {
     "hyderabad": (17.3850, 78.4867),
 }
 
-# Expected Vendor schema in SELECT * order
-VENDOR_COLUMNS = [
-    "EquipmentID", "Type", "SiteID", "CheckOutDate", "CheckInDate",
-    "EngineHourDay", "IdleHourDay", "OperatingDays", "DaysLeft", "Fuel",
-    "Location", "Availability", "RentalType", "ReadyToShare", "SharedBySiteID"
-]
-
-def _rows_to_df(rows: list[tuple]) -> pd.DataFrame:
-    normalized = []
-    for row in rows:
-        r = list(row)
-        while len(r) < len(VENDOR_COLUMNS):
-            r.append(None)
-        r = r[:len(VENDOR_COLUMNS)]
-        normalized.append(r)
-    return pd.DataFrame(normalized, columns=VENDOR_COLUMNS)
-
 def _norm_loc(s: str | None) -> str | None:
     return s.strip().lower() if isinstance(s, str) else None
 
@@ -37,8 +21,7 @@ def location_view(current_site_id: int):
     st.header("📍 Equipment by Distance from Selected Location")
 
     # --- Load vendor data safely
-    rows = fetch_vendors()  # must be SELECT * FROM Vendor
-    df = _rows_to_df(rows)
+    df = vendors_frame()
 
     # Quick status/diagnostics (collapsible)
     with st.expander("Debug info", expanded=False):
@@ -100,9 +83,6 @@ def location_view(current_site_id: int):
     eq = df.loc[df["_has_coord"]].copy()
     eq["Distance (km)"] = eq["_loc_key"].map(key_to_distance_km)
 
-    # Clean / types
-    eq["SiteID"] = pd.to_numeric(eq["SiteID"], errors="coerce").astype("Int64")
-
     # Sort and show
     eq = eq.sort_values(["Distance (km)", "Type", "EquipmentID"], kind="stable")
     st.subheader("🛠️ Equipment List Sorted by Proximity")
@@ -113,9 +93,8 @@ def location_view(current_site_id: int):
     st.markdown("### 🔁 Flexible Equipment — Share Toggle")
     show_only_flexible = st.checkbox("Show only flexible rentals", value=True)
 
-    # Null/whitespace-safe filter
-    rental_type_series = eq["RentalType"].fillna("").astype(str).str.strip().str.lower()
-    toggles_df = eq[rental_type_series.eq("flexible")] if show_only_flexible else eq
+    # RentalType is stored canonically ('Rigid' / 'Flexible' / NULL)
+    toggles_df = eq[eq["RentalType"].eq("Flexible")] if show_only_flexible else eq
 
     if toggles_df.empty:
         if show_only_flexible:
@@ -1,40 +1,84 @@
+import time
+
 import pandas as pd
 from database.db import get_connection
+from database.snapshot import load_snapshot
+from database.analytics import usage_by_group
 from utils.notifications import send_email_node   # assuming you move your email code here
 
-def check_and_notify_low_utilization(threshold: float = 5.0):
-    """
-    Calculates average EngineHourDay + IdleHourDay grouped by (SiteID, Type).
-    If below threshold, sends email to SiteInfo contacts.
-    """
-
+def _usage_from_db(days: int) -> pd.DataFrame:
     with get_connection() as conn:
-        # Join Vendor with SiteInfo to fetch contacts
+        # One row per unit per day from the day rollups
         q = """
-        SELECT 
+        SELECT
             v.SiteID,
             v.Type,
-            COALESCE(v.EngineHourDay, 0) AS EngineHourDay,
-            COALESCE(v.IdleHourDay, 0) AS IdleHourDay,
+            COALESCE(d.EngineSum, 0) AS EngineHourDay,
+            COALESCE(d.IdleSum, 0) AS IdleHourDay,
             s.ContactDetails
-        FROM Vendor v
+        FROM TelemetryDay d
+        JOIN Vendor v ON v.EquipmentID = d.EquipmentID
         LEFT JOIN SiteInfo s ON v.SiteID = s.SiteID
+        WHERE d.Bucket >= CAST(strftime('%s', 'now', ?) AS INTEGER)
         """
-        df = pd.read_sql_query(q, conn)
+        df = pd.read_sql_query(q, conn, params=(f"-{int(days)} days",))
+
+        if df.empty:
+            # No rollups yet: join current values with SiteInfo to fetch contacts
+            q = """
+            SELECT 
+                v.SiteID,
+                v.Type,
+                COALESCE(v.EngineHourDay, 0) AS EngineHourDay,
+                COALESCE(v.IdleHourDay, 0) AS IdleHourDay,
+                s.ContactDetails
+            FROM VendorCurrent v
+            LEFT JOIN SiteInfo s ON v.SiteID = s.SiteID
+            """
+            df = pd.read_sql_query(q, conn)
+    return df
+
+
+def _usage_from_snapshot(days: int) -> pd.DataFrame | None:
+    """The same rows as _usage_from_db(), from the memory-mapped snapshot (None if there is none)."""
+    telemetry, vendor, sites = (load_snapshot(name) for name in ("telemetry_day", "vendor", "sites"))
+    if telemetry is None or vendor is None or sites is None:
+        return None
+    units = vendor.frame[["EquipmentID", "SiteID", "Type", "EngineHourDay", "IdleHourDay"]]
+    contacts = sites.frame[["SiteID", "ContactDetails"]]
+
+    day = telemetry.frame
+    day = day[day["Bucket"] >= time.time() - days * 86400]
+    if not day.empty:
+        df = day.merge(units[["EquipmentID", "SiteID", "Type"]], on="EquipmentID")
+        df["EngineHourDay"] = df["EngineSum"].fillna(0)
+        df["IdleHourDay"] = df["IdleSum"].fillna(0)
+    else:
+        df = units.assign(EngineHourDay=units["EngineHourDay"].fillna(0), IdleHourDay=units["IdleHourDay"].fillna(0))
+    df = df.merge(contacts, on="SiteID", how="left")
+    df["SiteID"] = df["SiteID"].astype("Int64")  # NULL-able ids come back as float64
+    return df[["SiteID", "Type", "EngineHourDay", "IdleHourDay", "ContactDetails"]]
+
+
+def check_and_notify_low_utilization(threshold: float = 5.0, days: int = 7):
+    """
+    Calculates average EngineHourDay + IdleHourDay grouped by (SiteID, Type).
+    If below threshold, sends email to SiteInfo contacts.
+
+    Uses the daily telemetry rollups for the last `days` days when there are
+    any, and the units' current-day values otherwise. Reads the columnar
+    snapshot when one has been exported, the live tables otherwise.
+    """
+
+    df = _usage_from_snapshot(days)
+    if df is None:
+        df = _usage_from_db(days)
 
     if df.empty:
         print("⚠️ No equipment data found.")
         return
     
-    grouped = (
-        df.groupby(["SiteID", "Type", "ContactDetails"])
-        .agg(avg_usage=pd.NamedAgg(column="EngineHourDay", aggfunc="mean"))
-        .reset_index()
-    )
-
-    grouped["avg_usage"] += (
-        df.groupby(["SiteID", "Type", "ContactDetails"])["IdleHourDay"].mean().values
-    )
+    grouped = usage_by_group(df)
 
     for _, row in grouped.iterrows():
         site_id = row["SiteID"]
@@ -1,16 +1,32 @@
 # modules/map_view.py
-import time
 import pandas as pd
 import streamlit as st
 import pydeck as pdk
 
-from database.db import get_connection
+from database.connection import get_connection, read_snapshot
+from database.cache import cached
+from database.changes import changes_since, data_version, patch_frame
+from database.repository import VENDOR_DTYPES
+from database.analytics import location_mix
 from database.locations import geocode_name, allowed_location_names
+from modules.live import session_subscription, rerun_on_event
+from utils.events import ShareChanged, EquipmentRented, UsageUpdated
 
 
 # --- DATA LAYER --------------------------------------------------------------
 
-@st.cache_data(show_spinner=False, ttl=5)  # auto-expire cached data every 5s
+GEO_VENDOR_COLUMNS = ["EquipmentID", "Type", "SiteID", "Location", "Availability", "RentalType", "ReadyToShare", "Fuel"]
+GEO_TABLES = ("Vendor", "EquipmentLatest", "SiteInfo")
+
+
+@cached("SiteInfo")
+def _site_locations() -> pd.DataFrame:
+    with get_connection() as conn:
+        return pd.read_sql_query("SELECT SiteID, EquipmentID, Location AS SiteLocation FROM SiteInfo", conn)
+
+
+# Shared by every session until Vendor, EquipmentLatest or SiteInfo changes
+@cached(*GEO_TABLES)
 def get_equipment_geodata():
     """
     Build dataframe with:
@@ -24,18 +40,45 @@ def get_equipment_geodata():
       4) Keep only rows that resolve to an allowed name (per geocode_name).
     """
     with get_connection() as conn:
-        v = pd.read_sql_query(
-            """
-            SELECT EquipmentID, Type, SiteID, Location, Availability, RentalType, ReadyToShare, Fuel
-            FROM Vendor
-            """,
-            conn,
-        )
-        s = pd.read_sql_query(
-            "SELECT SiteID, EquipmentID, Location AS SiteLocation FROM SiteInfo",
-            conn,
-        )
+        v = pd.read_sql_query(f"SELECT {', '.join(GEO_VENDOR_COLUMNS)} FROM VendorCurrent", conn)
+    return _resolve_geodata(v, _site_locations())
+
 
+def current_geodata():
+    """
+    get_equipment_geodata() kept in session state and patched from the change
+    log on each rerun: only units that changed are re-resolved. A SiteInfo
+    change can move any unit, so that rebuilds everything.
+    """
+    held = st.session_state.get("map_geodata")
+    if held is None:
+        version = data_version()
+        df, sites = get_equipment_geodata(), _site_locations()
+    else:
+        version, df, sites = held
+        changes = changes_since(version, GEO_TABLES)
+        version = changes.version
+        if "SiteInfo" in changes.keys or "SiteInfo" in changes.deleted:
+            df, sites = get_equipment_geodata(), _site_locations()
+        elif changes:
+            fresh = changes.rows.get("Vendor")
+            resolved, gone = df.iloc[0:0], changes.deleted.get("Vendor", [])
+            if fresh is not None and not fresh.empty:
+                # read_sql_query types, so patched rows look like the full load
+                fresh = fresh[GEO_VENDOR_COLUMNS].astype(
+                    {c: ("float64" if t == "Int64" else object) for c, t in VENDOR_DTYPES.items()
+                     if c in GEO_VENDOR_COLUMNS and t in ("Int64", "string")}
+                )
+                fresh = fresh.where(fresh.notna(), None)
+                resolved = _resolve_geodata(fresh, sites)
+                gone = gone + list(fresh["EquipmentID"])
+            df = patch_frame(df, resolved, "EquipmentID", drop_keys=gone)
+    st.session_state["map_geodata"] = (version, df, sites)
+    return df
+
+
+def _resolve_geodata(v: pd.DataFrame, s: pd.DataFrame) -> pd.DataFrame:
+    """Resolve coordinates and labels for the Vendor rows in `v` (see get_equipment_geodata)."""
     # Step 1: resolve from Vendor.Location
     def resolve_name(name):
         lat, lon, key = geocode_name(name)
@@ -72,6 +115,8 @@ def get_equipment_geodata():
 
     # Labels & flags
     def fuel_str(x):
+        if pd.isna(x):
+            return ""
         try:
             return f" | Fuel: {float(x):.0f}%"
         except Exception:
@@ -83,7 +128,7 @@ def get_equipment_geodata():
         + v["Fuel"].apply(fuel_str)
     )
     v["is_share"] = (v["ReadyToShare"].fillna(0).astype(int) == 1)
-    v["is_rented"] = v["Availability"].str.upper().eq("RENTED")
+    v["is_rented"] = v["Availability"].eq("Rented")
     return v
 
 
@@ -95,20 +140,28 @@ def equipment_map_view():
     # Controls first so a change triggers rerun
     with st.sidebar:
         st.subheader("Live updates")
-        auto_refresh = st.checkbox("Auto-refresh", value=True, help="Re-run the page automatically.")
-        refresh_every = st.number_input("Seconds", min_value=2, max_value=120, value=5, step=1)
+        auto_refresh = st.checkbox("Auto-refresh", value=True, help="Re-run the page when equipment changes.")
+        refresh_every = st.number_input("At most every (seconds)", min_value=2, max_value=120, value=5, step=1)
         colr1, colr2 = st.columns([1,1])
         with colr1:
             if st.button("Refresh now"):
-                st.cache_data.clear()   # clear cached frames immediately
+                st.session_state.pop("map_geodata", None)   # full rebuild on this run
                 st.rerun()
 
         with colr2:
             if st.button("Clear cache"):
-                st.cache_data.clear()
+                # This session's copy only; the shared query cache follows data versions by itself
+                st.session_state.pop("map_geodata", None)
+
+    # Subscribe before reading so nothing published during this run is missed
+    live = session_subscription("map_view", [((ShareChanged, EquipmentRented, UsageUpdated), None)])
 
-    # Fetch data (cached with small TTL)
-    df = get_equipment_geodata()
+    # Fetch data (patched from the change log between reruns) and the unresolved list in one read
+    # transaction, so both reflect the same commit
+    with read_snapshot() as conn:
+        df = current_geodata()
+        raw = pd.read_sql_query("SELECT EquipmentID, SiteID, Location FROM Vendor", conn)
+    unresolved = raw[~raw["EquipmentID"].isin(df["EquipmentID"])]
 
     if df.empty:
         st.info(
@@ -119,8 +172,7 @@ def equipment_map_view():
             st.write(", ".join(allowed_location_names()))
         # Auto-refresh loop even if empty (helpful right after inserting new rows)
         if auto_refresh:
-            time.sleep(int(refresh_every))
-            st.experimental_rerun()
+            rerun_on_event(live, min_interval=int(refresh_every))
         return
 
     # Sidebar filters
@@ -143,15 +195,14 @@ def equipment_map_view():
     if chosen_type != "All":
         filtered = filtered[filtered["Type"] == chosen_type]
     if chosen_avail != "All":
-        filtered = filtered[filtered["Availability"].str.capitalize() == chosen_avail]
+        filtered = filtered[filtered["Availability"] == chosen_avail]
     if share_only:
         filtered = filtered[filtered["is_share"]]
 
     if filtered.empty:
         st.warning("No equipment matches your filters.")
         if auto_refresh:
-            time.sleep(int(refresh_every))
-            st.experimental_rerun()
+            rerun_on_event(live, min_interval=int(refresh_every))
         return
 
     # Center map
@@ -204,14 +255,7 @@ def equipment_map_view():
 
     elif view_mode == "Intensity (by location)":
         # Aggregate by location
-        agg = (
-            filtered.groupby(["loc_name", "lat", "lon"], as_index=False)
-            .agg(
-                count=("EquipmentID", "size"),
-                rented=("is_rented", "sum"),
-                share=("is_share", "sum"),
-            )
-        )
+        agg = location_mix(filtered)
 
         # Radius scales with sqrt(count)
         agg["radius_m"] = (agg["count"] ** 0.5) * float(base_radius_m)
@@ -281,10 +325,7 @@ def equipment_map_view():
             )
         )
         # Optional overlay: counts per location
-        agg = (
-            filtered.groupby(["loc_name", "lat", "lon"], as_index=False)
-            .agg(count=("EquipmentID", "size"))
-        )
+        agg = location_mix(filtered)[["loc_name", "lat", "lon", "count"]]
         layers.append(
             pdk.Layer(
                 "TextLayer",
@@ -303,9 +344,6 @@ def equipment_map_view():
 
     # Debug unresolved
     with st.expander("Unresolved equipment (debug)"):
-        with get_connection() as conn:
-            raw = pd.read_sql_query("SELECT EquipmentID, SiteID, Location FROM Vendor", conn)
-            unresolved = raw[~raw["EquipmentID"].isin(df["EquipmentID"])]
         if unresolved.empty:
             st.caption("All items resolved to allowed locations.")
         else:
@@ -325,13 +363,12 @@ def equipment_map_view():
 - **Heatmap:** density shading.
 
 **Live updates**
-- Auto-refresh re-runs this page every N seconds and the cached data expires every 5s.
-- Use **Refresh now** if you just inserted a row and want an immediate update.
+- Auto-refresh re-runs this page when equipment changes (at most every N seconds); only units that changed since the last run are re-resolved.
+- Use **Refresh now** to reload the whole map (shared with other users while the data is unchanged).
         """
     )
 
-    # Auto-refresh at the very end so the page renders before sleeping
+    # Auto-refresh at the very end so the page renders before waiting
     if auto_refresh:
-        time.sleep(int(refresh_every))
-        st.rerun()
+        rerun_on_event(live, min_interval=int(refresh_every))
 
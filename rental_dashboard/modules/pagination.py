@@ -0,0 +1,39 @@
+# modules/pagination.py
+import streamlit as st
+
+# Keyset pager state lives in st.session_state under "<key>_cursors": a stack of
+# page-start cursors (None = first page), so "Prev" is a pop, not an OFFSET.
+
+
+def page_cursor(key: str, reset_on=None):
+    """Cursor of the page currently shown for `key`. Changing `reset_on` (e.g. the filters) goes back to page 1."""
+    if st.session_state.get(f"{key}_reset_on") != reset_on:
+        st.session_state[f"{key}_reset_on"] = reset_on
+        st.session_state[f"{key}_cursors"] = [None]
+    return st.session_state.setdefault(f"{key}_cursors", [None])[-1]
+
+
+def page_controls(key: str, next_cursor):
+    """Render Prev / Next for `key`; `next_cursor` is what the page fetch returned."""
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    prev_col, next_col, label_col = st.columns([1, 1, 6])
+    with prev_col:
+        if st.button("◀ Prev", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with next_col:
+        if st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    with label_col:
+        st.caption(f"Page {len(cursors)}")
+
+
+def paginate(key: str, fetch_page, reset_on=None):
+    """
+    Fetch and return the current page for `key` and render its controls.
+    `fetch_page(cursor)` must return (page DataFrame, next cursor or None).
+    """
+    page, next_cursor = fetch_page(page_cursor(key, reset_on))
+    page_controls(key, next_cursor)
+    return page
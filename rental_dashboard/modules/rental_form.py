@@ -1,5 +1,5 @@
 import streamlit as st
-from database.db import insert_site, get_available_types, get_available_equipment_ids, rent_equipment
+from database.db import insert_site, get_available_types, get_available_equipment_ids, reserve_units
 
 def rental_form():
     st.header("➕ Add Rental Entry")
@@ -82,23 +82,25 @@ def rental_form():
                     submitted = st.form_submit_button("📌 Rent Equipment")
 
                     if submitted:
-                        assigned_ids = available_ids[:quantity]
-
-                        for eq_id in assigned_ids:
-                            rent_equipment(
-                                equipment_id=eq_id,
+                        try:
+                            # One transaction: either all `quantity` units are claimed or none
+                            assigned_ids = reserve_units(
+                                type_,
+                                quantity,
                                 site_id=site_id,
                                 operating_days=operating_days,
                                 location=equip_location,
                                 start_date=str(start_date),
                                 rental_type=rental_type
                             )
-
-                        st.success(f"✅ Assigned {quantity} {type_}(s): {', '.join(map(str, assigned_ids))}")
-
-                        # Reset selection after renting
-                        st.session_state.selected_type = ""
-                        st.rerun()
+                        except ValueError as e:
+                            st.error(f"❌ {e} Someone may have just rented them; please pick again.")
+                        else:
+                            st.success(f"✅ Assigned {quantity} {type_}(s): {', '.join(map(str, assigned_ids))}")
+
+                            # Reset selection after renting
+                            st.session_state.selected_type = ""
+                            st.rerun()
 
         if st.button("⬅️ Back to Site Info"):
             st.session_state.step = 1
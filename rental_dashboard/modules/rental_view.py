@@ -1,6 +1,11 @@
 import streamlit as st
-import pandas as pd
-from database.db import fetch_vendors, update_usage ,update_fuel
+from database.db import fetch_vendors, fetch_vendor_page, get_rented_equipment_ids, search_equipment
+from database.changes import VENDOR_SOURCES, changes_since, data_version, patch_frame
+from modules.pagination import page_cursor, page_controls
+from modules.live import session_subscription
+from utils.config import LIVE_FALLBACK_SECONDS, SEARCH_RESULTS
+from utils.events import EquipmentRented, ShareChanged, UsageUpdated
+from database.ingest import get_writer
 import time
 import random
 
@@ -79,10 +84,9 @@ def haversine_km(lat1, lon1, lat2, lon2) -> float:
     return R * c
 
 
-def simulate_fuel_updates():
-    rented_vendors = fetch_vendors(filter_by="Rented")
-    rented_ids = [row[0] for row in rented_vendors]
-
+# Simulated samples go through the shared batched writer, not one commit each
+def simulate_fuel_updates(rented_ids):
+    writer = get_writer()
     for eq_id in rented_ids:
         if eq_id not in fuel_levels:
             fuel_levels[eq_id] = random.randint(200, 250)
@@ -92,13 +96,9 @@ def simulate_fuel_updates():
         if fuel_levels[eq_id] <= 5:
             fuel_levels[eq_id] = random.randint(200, 250)
 
-        conn = fetch_vendors()
-        update_fuel(eq_id, fuel_levels[eq_id])
-
-def simulate_usage_updates():
-    rented_vendors = fetch_vendors(filter_by="Rented")
-    rented_ids = [row[0] for row in rented_vendors]
+        writer.submit(eq_id, fuel=fuel_levels[eq_id])
 
+def simulate_usage_updates(rented_ids):
     if not rented_ids:
         return
 
@@ -106,7 +106,7 @@ def simulate_usage_updates():
     engine_hours = round(random.uniform(1.0, 3.0), 2)
     idle_hours = round(random.uniform(0.0, 0.5), 2)
 
-    update_usage(eq_id, engine_hours, idle_hours)
+    get_writer().submit(eq_id, engine_hours=engine_hours, idle_hours=idle_hours)
 
 def rental_view():
     st.header("📊 View Rentals")
@@ -114,9 +114,26 @@ def rental_view():
     filter_option = st.selectbox("Filter By", ["All", "Available", "Rented"])
     site_id = st.text_input("Filter by Site ID (optional)")
 
+    search = st.text_input("🔎 Search equipment", placeholder="ID, type, location or site contact — e.g. EQX11, crane chen")
+    if search.strip():
+        matches = search_equipment(search, limit=SEARCH_RESULTS)
+        if matches.empty:
+            st.info(f"No equipment matches '{search}'.")
+        else:
+            st.caption(f"Top {len(matches)} matches")
+            st.dataframe(matches, use_container_width=True)
+
     # --- NEW: toggle the location section ---
     show_loc_view = st.toggle("📍 Show Location Distance View", value=False, help="Sort rented equipment by proximity to a reference location")
 
+    # One keyset page per render; the live loop below re-reads only this page
+    site_filter = site_id if site_id else None
+    cursor = page_cursor("rental_view", reset_on=(filter_option, site_id))
+    live = session_subscription("rental_view", [((EquipmentRented, ShareChanged, UsageUpdated), None)])
+    version = data_version()
+    df, next_cursor = fetch_vendor_page(cursor, filter_by=filter_option, site_id=site_filter)
+    page_controls("rental_view", next_cursor)
+
     table_placeholder = st.empty()
 
     # UI for Location Distance View (appears when toggled)
@@ -126,7 +143,7 @@ def rental_view():
 
         # Build suggestions from current rented locations
         rented_rows = fetch_vendors(filter_by="Rented")
-        rented_locations = sorted({r[10] for r in rented_rows if r[10]})  # index 10 = Location in your schema
+        rented_locations = sorted({r.Location for r in rented_rows if r.Location})
 
         ref_loc = st.selectbox(
             "Reference Location",
@@ -147,25 +164,43 @@ def rental_view():
         elif not ref_query:
             st.info("Enter or select a reference location to compute distances.")
 
-    # main live loop
+    # main live loop: the page is loaded above. The database is read again only
+    # after a write was published on the event bus (or, for writes from other
+    # processes, after LIVE_FALLBACK_SECONDS), and then only the change log delta.
+    rented_ids = get_rented_equipment_ids()
+    status = st.empty()
+    first = True
+    last_read = time.monotonic()
     while True:
-        simulate_fuel_updates()
-        simulate_usage_updates()
+        simulate_fuel_updates(rented_ids)
+        simulate_usage_updates(rented_ids)
+
+        if not first:
+            time.sleep(2)
+        events = live.wait(0)
+        if any(isinstance(e, EquipmentRented) for e in events):
+            rented_ids = get_rented_equipment_ids()
+        if not first and not events and time.monotonic() - last_read < LIVE_FALLBACK_SECONDS:
+            status.caption("🟢 Live — waiting for changes")
+            continue
+        last_read = time.monotonic()
 
         # base table
-        if filter_option == "All":
-            data = fetch_vendors(site_id=site_id if site_id else None)
-        else:
-            data = fetch_vendors(filter_by=filter_option, site_id=site_id if site_id else None)
-
-        df = pd.DataFrame(data, columns=[
-            "EquipmentID", "Type", "SiteID", "CheckOutDate", "CheckInDate",
-            "EngineHourDay", "IdleHourDay", "OperatingDays", "DaysLeft", "Fuel",
-            "Location", "Availability", "RentalType", "ReadyToShare", "SharedBySiteID"
-        ])
+        changes = changes_since(version, VENDOR_SOURCES)
+        version = changes.version
+        if "Vendor" in changes.keys or "Vendor" in changes.deleted:
+            # a Vendor write can move rows in or out of this filter: re-read the page
+            df, _ = fetch_vendor_page(cursor, filter_by=filter_option, site_id=site_filter)
+        elif changes:
+            # telemetry only: same rows, new usage/fuel values
+            fresh = changes.rows["Vendor"]
+            df = patch_frame(df, fresh[fresh["EquipmentID"].isin(df["EquipmentID"])], "EquipmentID")
+        elif not first:
+            continue
+        first = False
 
         # --- if the Location Distance View is on, show a separate sorted table for RENTED only ---
-                # --- if the Location Distance View is on, show a sorted table for RENTED only ---
+        # (distance order can't be keyset-paged, so this sorts the current page)
         if show_loc_view:
             df_rented = df[df["Availability"] == "Rented"].copy()
             if not df_rented.empty:
@@ -196,6 +231,3 @@ def rental_view():
         else:
             # normal table view
             table_placeholder.dataframe(df, use_container_width=True)
-
-
-        time.sleep(2)
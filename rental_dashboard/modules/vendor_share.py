@@ -1,16 +1,22 @@
 # modules/vendor_share.py
 import streamlit as st
 import pandas as pd
-from database.db import get_flexible_rentals, set_ready_to_share
+from database.db import fetch_vendor_page, set_ready_to_share
+from modules.pagination import paginate
+from modules.live import session_subscription, rerun_on_event
+from utils.events import ShareChanged, EquipmentRented
 
 def vendor_share():
     st.title("Share Flexible Rentals")
     st.caption("Mark Flexible rentals as 'Ready to Share' so clients can see them in their dashboards.")
 
-    df = get_flexible_rentals()
+    # Subscribe before reading so a share made meanwhile by another session still wakes this page
+    live = session_subscription("vendor_share", [((ShareChanged, EquipmentRented), None)])
+    df = paginate("vendor_share", lambda cursor: fetch_vendor_page(cursor, rental_type="Flexible"))
 
     if df.empty:
         st.info("No Flexible rentals found in the Vendor table.")
+        rerun_on_event(live)
         return
 
     # Overview
@@ -50,3 +56,5 @@ def vendor_share():
         with cols[4]:
             with st.popover("Details"):
                 st.json({k: row[k] for k in row.index if k not in ["ReadyToShare"]})
+
+    rerun_on_event(live)
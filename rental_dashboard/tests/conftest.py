@@ -0,0 +1,30 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# The app runs from rental_dashboard/ and imports `database.*`, `utils.*` from there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import connection, migrations  # noqa: E402
+from database.cache import query_cache  # noqa: E402
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    """
+    A freshly migrated catalog database in a temp directory, standing in for
+    DB_PATH. Relative paths (shards, snapshots) land in the same directory.
+    """
+    path = str(tmp_path / "catalog.db")
+    monkeypatch.setattr(connection, "DB_PATH", path)
+    monkeypatch.setattr(migrations, "DB_PATH", path)
+    monkeypatch.chdir(tmp_path)
+    # Cached results are keyed by data version, which restarts with every new file
+    query_cache.clear()
+    from database.db import init_db
+    init_db()
+    yield path
+    query_cache.clear()
+    connection.get_pool(path).close()
@@ -0,0 +1,17 @@
+# tests/test_analytics.py
+import pytest
+
+from database import analytics
+from database.analytics_bench import _frames, _same
+
+pytestmark = pytest.mark.skipif(not analytics.DUCKDB_AVAILABLE, reason="duckdb is not installed")
+
+
+@pytest.mark.parametrize("name, call", [
+    ("usage", analytics.usage_by_group),
+    ("rentals", lambda df, e: analytics.daily_counts(df, 1, e)),
+    ("units", analytics.location_mix),
+])
+def test_engines_agree_on_generated_telemetry(name, call):
+    frame = _frames(20_000)[name]
+    assert _same(call(frame, "pandas"), call(frame, "duckdb"))
@@ -0,0 +1,54 @@
+# tests/test_archive.py
+from database import db
+from database.archive import archive_closed
+from database.connection import get_connection
+
+UNIT = "EQX1151"
+RENTALS = [   # (CheckOutDate, CheckInDate)
+    ("2024-01-01", "2024-01-10"),   # closed long ago: archived
+    ("2024-02-01", "2024-02-05"),   # closed long ago: archived
+    ("2024-03-01", None),           # still out: stays
+]
+
+
+def _ids(frame, key: str) -> set[int]:
+    return set(frame[key].tolist())
+
+
+def _request(site_id: int, time_from: str, time_to: str) -> int:
+    db.add_rental_request(UNIT, site_id, "Pune", time_from, time_to)
+    with get_connection() as conn:
+        return conn.execute("SELECT MAX(RequestID) FROM RentalRequests").fetchone()[0]
+
+
+def test_archiver_moves_closed_rows_and_the_all_views_still_return_them(catalog):
+    db.rent_equipment(UNIT, 1, 30, "Chennai", "2025-03-01", "Flexible")
+    db.set_ready_to_share(UNIT, 1, shared_by_site_id=1)
+    old, pending = _request(2, "2025-03-05", "2025-03-08"), _request(3, "2025-03-10", "2025-03-12")
+    assert db.transition_request(old, "Rejected").ok
+    with get_connection() as conn:
+        conn.execute("UPDATE RentalRequests SET ClosedAt = '2024-01-01 00:00:00' WHERE RequestID = ?", (old,))
+
+    with get_connection() as conn:
+        conn.executemany("INSERT INTO Rentals (EquipmentID, SiteID, CheckOutDate, CheckInDate) VALUES (?, 1, ?, ?)",
+                         [(UNIT, out, back) for out, back in RENTALS])
+        # A recent check-in stays hot
+        conn.execute("INSERT INTO Rentals (EquipmentID, SiteID, CheckOutDate, CheckInDate) "
+                     "VALUES (?, 1, date('now', '-3 days'), date('now'))", (UNIT,))
+    history = db.get_rentals(site_id=1, include_archive=True)
+    hot_before = db.get_rentals(site_id=1)          # cached: the archiver must invalidate it
+    requests, _ = db.fetch_request_page(owner_site_id=1, include_archive=True)
+
+    # The two old rentals and rent_equipment's, which checked in on 2025-03-31
+    assert archive_closed(older_than_days=30, batch_size=1) == {"RentalRequests": 1, "Rentals": 3}
+    assert archive_closed(older_than_days=30) == {"RentalRequests": 0, "Rentals": 0}
+
+    hot = db.get_rentals(site_id=1)
+    assert len(hot) == len(hot_before) - 3
+    assert hot["CheckInDate"].isna().any() and not (hot["CheckInDate"] < "2024-12-31").any()
+    assert db.get_rentals(site_id=1, include_archive=True).equals(history)
+    assert _ids(db.get_equipment_rental_history(UNIT, include_archive=True), "RentalID") == _ids(history, "RentalID")
+
+    assert _ids(db.fetch_request_page(owner_site_id=1)[0], "RequestID") == {pending}
+    assert _ids(db.fetch_request_page(owner_site_id=1, include_archive=True)[0], "RequestID") == \
+        _ids(requests, "RequestID") == {old, pending}
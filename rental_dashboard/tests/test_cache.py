@@ -0,0 +1,65 @@
+# tests/test_cache.py
+import threading
+import time
+
+import pytest
+
+from database.cache import cached, query_cache
+from database.connection import get_connection
+
+
+@pytest.fixture
+def units(catalog):
+    """A cached Vendor count that records how often it actually ran."""
+    runs = []
+
+    @cached("Vendor")
+    def count(type_: str) -> int:
+        runs.append(type_)
+        time.sleep(0.05)   # long enough for concurrent callers to overlap
+        with get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM Vendor WHERE Type = ?", (type_,)).fetchone()[0]
+    count.runs = runs
+    return count
+
+
+def _add_crane(equipment_id: str):
+    with get_connection() as conn:
+        conn.execute("INSERT INTO Vendor (EquipmentID, Type) VALUES (?, 'Crane')", (equipment_id,))
+
+
+def test_write_to_a_dependent_table_invalidates(units):
+    cranes = units("Crane")
+    assert units("Crane") == cranes and len(units.runs) == 1
+
+    with get_connection() as conn:   # another table: still served from the cache
+        conn.execute("UPDATE SiteInfo SET Location = Location")
+    assert units("Crane") == cranes and len(units.runs) == 1
+
+    _add_crane("EQX9001")
+    assert units("Crane") == cranes + 1 and len(units.runs) == 2
+
+
+def test_pending_writes_bypass_the_cache(units):
+    cranes = units("Crane")
+    with get_connection() as conn:
+        conn.execute("INSERT INTO Vendor (EquipmentID, Type) VALUES ('EQX9001', 'Crane')")
+        # The writer sees its own row and the uncommitted count isn't cached
+        assert units("Crane") == cranes + 1
+        conn.rollback()
+    assert units("Crane") == cranes
+    assert len(units.runs) == 2
+
+
+def test_concurrent_misses_run_the_query_once(units):
+    before = query_cache.stats()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(units("Crane"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(results)) == 1 and len(results) == 4
+    assert units.runs == ["Crane"]
+    stats = query_cache.stats()
+    assert (stats.misses - before.misses, stats.hits - before.hits) == (1, 3)
@@ -0,0 +1,78 @@
+# tests/test_events.py
+import threading
+
+import pytest
+
+from database import db
+from database.connection import get_connection
+from utils.events import EquipmentRented, RequestCreated, ShareChanged, publish, subscribe
+
+UNIT = "EQX1151"
+
+
+def test_writers_publish_once_committed(catalog):
+    sub = subscribe(EquipmentRented, ShareChanged)
+    with get_connection():
+        db.rent_equipment(UNIT, 1, 30, "Chennai", "2025-03-01", "Flexible")
+        assert sub.wait(0) == []          # still inside the outer transaction
+    assert sub.wait(0) == [EquipmentRented(UNIT, 1, "Flexible")]
+
+    with pytest.raises(RuntimeError):
+        with get_connection():
+            db.set_ready_to_share(UNIT, 1, shared_by_site_id=1)
+            raise RuntimeError("rolled back")
+    assert sub.wait(0) == []
+    db.set_ready_to_share(UNIT, 1, shared_by_site_id=1)
+    assert sub.wait(0) == [ShareChanged(UNIT, True, 1)]
+
+
+def test_subscriptions_only_receive_their_sites(catalog):
+    db.rent_equipment(UNIT, 1, 30, "Chennai", "2025-03-01", "Flexible")
+    db.set_ready_to_share(UNIT, 1, shared_by_site_id=1)
+    owner, requester, other = subscribe(site_id=1), subscribe(RequestCreated, site_id=2), subscribe(site_id=3)
+    db.add_rental_request(UNIT, 2, "Pune", "2025-03-05", "2025-03-08")
+    assert owner.wait(0) == requester.wait(0) == [RequestCreated(UNIT, 2, 1)]
+    assert other.wait(0) == []
+
+
+class _Rerun(Exception):
+    pass
+
+
+@pytest.fixture
+def page(monkeypatch):
+    """modules.live with Streamlit's rerun and status line swapped for recorders."""
+    pytest.importorskip("streamlit")
+    from modules import live
+
+    def rerun():
+        raise _Rerun
+    captions = []
+
+    class Status:
+        def caption(self, text):
+            captions.append(text)
+    monkeypatch.setattr(live.st, "rerun", rerun)
+    monkeypatch.setattr(live.st, "empty", Status)
+    live.captions = captions
+    return live
+
+
+def test_rerun_on_event_wakes_on_a_matching_event(page):
+    sub = subscribe(EquipmentRented, site_id=1)
+    publish(EquipmentRented(UNIT, 2, "Flexible"))   # another site's: ignored
+    threading.Timer(0.05, publish, [EquipmentRented(UNIT, 1, "Flexible")]).start()
+    with pytest.raises(_Rerun):
+        page.rerun_on_event(sub, fallback=5, tick=0.01)
+    assert page.captions and all("waiting" in c for c in page.captions)
+
+
+def test_rerun_on_event_holds_for_min_interval_then_falls_back(page):
+    sub = subscribe(EquipmentRented)
+    publish(EquipmentRented(UNIT, 1, "Flexible"))
+    with pytest.raises(_Rerun):
+        page.rerun_on_event(sub, min_interval=0.05, fallback=5, tick=0.01)
+    assert "update pending" in page.captions[-1]
+
+    with pytest.raises(_Rerun):   # nothing arrives: the fallback still reruns
+        page.rerun_on_event(sub, fallback=0.03, tick=0.01)
@@ -0,0 +1,71 @@
+# tests/test_fleet_io.py
+import csv
+
+import pytest
+
+from database import db, fleet_io
+from database.connection import get_connection
+from database.fleet_io import export_file, import_file
+from database.migrations import indexes_on
+from database.fleet_summary import count_units
+
+
+def _schema() -> set[str]:
+    with get_connection() as conn:
+        return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('index', 'trigger')")}
+
+
+def _rows(path: str) -> list[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _write(path: str, rows: list[dict]):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]), lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_bulk_round_trip_keeps_summary_and_search(catalog, tmp_path):
+    path = str(tmp_path / "fleet.csv")
+    before = _schema()
+    export_file("vendor", path)
+    rows = _rows(path)
+    rows[0]["Type"] = "Telehandler"
+    rows.append({**rows[1], "EquipmentID": "EQX9001", "Type": "Telehandler", "Location": "Zanzibar"})
+    _write(path, rows)
+
+    assert import_file("vendor", path).rows == len(rows)
+    assert _schema() == before
+    with get_connection() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM Vendor").fetchone()[0]
+    assert count_units() == total == len(rows)
+    assert count_units(type_="Telehandler") == 2
+    assert db.search_equipment("zanzibar")["EquipmentID"].tolist() == ["EQX9001"]
+
+    # Triggers are back: a live write keeps both tables in step again
+    with get_connection() as conn:
+        conn.execute("UPDATE Vendor SET Type = 'Crane', Location = 'Mombasa' WHERE EquipmentID = 'EQX9001'")
+    assert count_units(type_="Telehandler") == 1
+    assert db.search_equipment("mombasa")["EquipmentID"].tolist() == ["EQX9001"]
+
+
+def test_bulk_load_killed_before_the_rebuild_changes_nothing(catalog, tmp_path, monkeypatch):
+    path = str(tmp_path / "fleet.csv")
+    export_file("vendor", path)
+    rows = _rows(path)
+    before, units = _schema(), count_units()
+    _write(path, [{**rows[0], "EquipmentID": "EQX9001"}])
+
+    def killed(conn):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(fleet_io, "DERIVED", [(triggers, killed) for triggers, _ in fleet_io.DERIVED])
+
+    with pytest.raises(KeyboardInterrupt):
+        import_file("vendor", path)
+    assert _schema() == before
+    assert set(indexes_on("Vendor")) <= before
+    with get_connection() as conn:
+        assert conn.execute("SELECT 1 FROM Vendor WHERE EquipmentID = 'EQX9001'").fetchone() is None
+    assert count_units() == units
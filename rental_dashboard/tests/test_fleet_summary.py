@@ -0,0 +1,67 @@
+# tests/test_fleet_summary.py
+from database import db
+from database.connection import get_connection
+from database.fleet_summary import count_units, rebuild_fleet_summary
+from database.repository import count_vendors
+
+FILTERS = [
+    {},
+    {"availability": "Available"},
+    {"availability": "Rented", "site_id": 1},
+    {"type_": "Crane"},
+    {"exclude_site_id": 1},
+    {"ready_to_share": True},
+    {"rental_type": "Flexible"},
+]
+
+
+def _summary() -> list[tuple]:
+    with get_connection() as conn:
+        return conn.execute("SELECT * FROM FleetSummary ORDER BY 1, 2, 3, 4, 5").fetchall()
+
+
+def _assert_in_step():
+    # The trigger-maintained groups are exactly what a recount from Vendor gives...
+    kept = _summary()
+    with get_connection() as conn:
+        rebuild_fleet_summary(conn)
+        assert _summary() == kept
+        conn.rollback()
+    # ...and count_units agrees with counting the units themselves
+    for f in FILTERS:
+        vendor_filters = {"filter_by": f.get("availability"), "site_id": f.get("site_id"),
+                          "exclude_site_id": f.get("exclude_site_id"), "ready_to_share": f.get("ready_to_share"),
+                          "rental_type": f.get("rental_type")}
+        if "type_" in f:
+            with get_connection() as conn:
+                expected = conn.execute("SELECT COUNT(*) FROM Vendor WHERE Type = ?", (f["type_"],)).fetchone()[0]
+        else:
+            expected = count_vendors(**vendor_filters)
+        assert count_units(**f) == expected, f
+
+
+def test_summary_follows_inserts_updates_and_deletes(catalog):
+    _assert_in_step()
+    cranes = count_units(type_="Crane")
+
+    with get_connection() as conn:
+        conn.executemany("INSERT INTO Vendor (EquipmentID, Type, Availability, ReadyToShare) "
+                         "VALUES (?, 'Crane', 'Available', 0)", [("EQX9001",), ("EQX9002",)])
+    assert count_units(type_="Crane") == cranes + 2
+    _assert_in_step()
+
+    db.rent_equipment("EQX9001", 1, 30, "Chennai", "2025-03-01", "Flexible")
+    db.set_ready_to_share("EQX9001", 1, shared_by_site_id=1)
+    assert count_units(site_id=1, type_="Crane", ready_to_share=True, rental_type="Flexible") >= 1
+    _assert_in_step()
+
+    with get_connection() as conn:
+        conn.execute("UPDATE Vendor SET SiteID = NULL, Type = 'Grader' WHERE EquipmentID = 'EQX9001'")
+        conn.execute("UPDATE Vendor SET Location = 'Pune' WHERE EquipmentID = 'EQX9001'")  # not a group column
+    assert count_units(type_="Crane") == cranes + 1
+    _assert_in_step()
+
+    with get_connection() as conn:
+        conn.execute("DELETE FROM Vendor WHERE EquipmentID = 'EQX9002'")
+    assert count_units(type_="Crane") == cranes
+    _assert_in_step()
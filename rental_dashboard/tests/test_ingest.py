@@ -0,0 +1,118 @@
+# tests/test_ingest.py
+import sqlite3
+import threading
+
+from database.connection import get_connection
+from database.ingest import TelemetryWriter
+
+
+def _rented_unit() -> str:
+    with get_connection() as conn:
+        equipment_id = conn.execute("SELECT EquipmentID FROM Vendor LIMIT 1").fetchone()[0]
+        conn.execute("UPDATE Vendor SET Availability = 'Rented' WHERE EquipmentID = ?", (equipment_id,))
+    return equipment_id
+
+
+def test_failed_batch_is_retried(catalog, monkeypatch):
+    equipment_id = _rented_unit()
+    writer = TelemetryWriter(flush_interval=0)
+    real_write, calls = writer._write, []
+
+    def flaky_write(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real_write(batch)
+
+    monkeypatch.setattr(writer, "_write", flaky_write)
+    writer.submit(equipment_id, engine_hours=1.0, ts=1_000_000)
+    assert writer.flush() == 0
+    assert writer.stats()["retrying"] == 1
+    assert writer.flush() == 1
+    stats = writer.stats()
+    assert (stats["failed_batches"], stats["retrying"], stats["dead_lettered"]) == (1, 0, 0)
+
+
+def test_batch_goes_to_dead_letter_after_max_attempts(catalog, monkeypatch):
+    equipment_id = _rented_unit()
+    writer = TelemetryWriter(flush_interval=0, max_attempts=2)
+
+    def failing_write(batch):
+        raise sqlite3.IntegrityError("bad sample")
+
+    monkeypatch.setattr(writer, "_write", failing_write)
+    writer.submit(equipment_id, engine_hours=1.0, ts=1_000_000)
+    writer.submit(equipment_id, engine_hours=2.0, ts=1_000_060)
+    writer.flush()
+    writer.flush()
+    stats = writer.stats()
+    assert (stats["submitted"], stats["failed_batches"], stats["dead_lettered"]) == (2, 2, 2)
+    with get_connection() as conn:
+        rows = conn.execute("SELECT EquipmentID, EngineHours, Error FROM TelemetryDeadLetter ORDER BY Ts").fetchall()
+    assert rows == [(equipment_id, 1.0, "bad sample"), (equipment_id, 2.0, "bad sample")]
+
+
+def test_resent_sample_does_not_fail_the_batch(catalog):
+    equipment_id = _rented_unit()
+    writer = TelemetryWriter(flush_interval=0)
+    writer.submit(equipment_id, engine_hours=1.0, ts=1_000_000)
+    assert writer.flush() == 1
+    writer.submit(equipment_id, engine_hours=1.0, ts=1_000_000)   # the device resends it
+    writer.submit(equipment_id, engine_hours=2.0, ts=1_000_060)
+    assert writer.flush() == 1
+    stats = writer.stats()
+    assert (stats["written"], stats["dropped"], stats["failed_batches"], stats["dead_lettered"]) == (2, 1, 0, 0)
+
+
+def test_last_attempt_dead_letters_only_the_rejected_samples(catalog, monkeypatch):
+    equipment_id = _rented_unit()
+    writer = TelemetryWriter(flush_interval=0, max_attempts=1)
+    real_write = writer._write
+
+    def poisoned_write(batch):
+        if any(params[1] == -1.0 for params in batch):
+            raise sqlite3.IntegrityError("CHECK constraint failed")
+        return real_write(batch)
+
+    monkeypatch.setattr(writer, "_write", poisoned_write)
+    for n, engine in enumerate((1.0, -1.0, 2.0)):
+        writer.submit(equipment_id, engine_hours=engine, ts=1_000_000 + 60 * n)
+    assert writer.flush() == 2
+    assert writer.stats()["dead_lettered"] == 1
+    with get_connection() as conn:
+        assert conn.execute("SELECT EngineHours FROM TelemetryDeadLetter").fetchall() == [(-1.0,)]
+
+
+def test_flush_from_several_threads_with_retries_pending(catalog, monkeypatch):
+    equipment_id = _rented_unit()
+    writer = TelemetryWriter(flush_interval=0, batch_size=1)
+    real_write, failed = writer._write, set()
+
+    def fail_once(batch):
+        if batch[0][0] not in failed:
+            failed.add(batch[0][0])
+            raise sqlite3.OperationalError("database is locked")
+        return real_write(batch)
+
+    monkeypatch.setattr(writer, "_write", fail_once)
+    for n in range(50):
+        writer.submit(equipment_id, engine_hours=1.0, ts=1_000_000 + n)
+    writer.flush()
+    assert writer.stats()["retrying"] == 50
+
+    errors = []
+
+    def flush():
+        try:
+            writer.flush()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=flush) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    stats = writer.stats()
+    assert (stats["written"], stats["retrying"]) == (50, 0)
@@ -0,0 +1,15 @@
+# tests/test_maintenance.py
+from database import maintenance
+
+
+def test_all_intervals_off_starts_no_thread(monkeypatch):
+    monkeypatch.setattr(maintenance, "_scheduler", None)
+    maintenance.start_maintenance({"checkpoint": 0, "optimize": None})
+    assert maintenance._scheduler is None
+
+
+def test_run_task_records_stats(catalog):
+    results = maintenance.run_task("checkpoint")
+    assert list(results) == [catalog]
+    stats = maintenance.maintenance_stats()["checkpoint"]
+    assert stats["runs"] >= 1 and stats["last_error"] is None
@@ -0,0 +1,29 @@
+# tests/test_migrations.py
+from database.connection import get_connection
+from database.migrations import INDEXES, indexes_on
+
+
+def _catalog_indexes() -> dict[str, str]:
+    with get_connection() as conn:
+        return dict(conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+        ).fetchall())
+
+
+def test_fresh_catalog_has_the_current_indexes(catalog):
+    # Steps create their frozen lists in order; the end state is INDEXES, rebuilds included
+    built = _catalog_indexes()
+    for name, ddl in INDEXES.items():
+        assert built[name] == ddl.replace("IF NOT EXISTS ", ""), name
+
+
+def test_indexes_on_lists_a_tables_indexes():
+    assert set(indexes_on("Rentals")) == {"idx_rentals_site_checkout", "idx_rentals_equipment_checkout",
+                                          "idx_rentals_checkin"}
+    assert INDEXES["idx_vendor_rental_type"].endswith("Vendor(RentalType, EquipmentID)")
+
+
+def test_row_versions_are_bumped_by_writers_not_triggers(catalog):
+    # A bump trigger re-ran every Vendor/RentalRequests UPDATE and all the triggers on it
+    with get_connection() as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'trg_%_version'").fetchall() == []
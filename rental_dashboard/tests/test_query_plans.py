@@ -0,0 +1,104 @@
+# tests/test_query_plans.py
+"""
+EXPLAIN QUERY PLAN guard for the hot read helpers.
+
+Each helper runs for real against a fresh temp catalog (the `catalog`
+fixture) with a trace callback on its pooled connection. Every SELECT it
+issues is then explained, and any step that walks a whole table (a plain
+`SCAN <table>` with no index) fails the test. The database has never been
+ANALYZEd, so the plans depend on the schema and its indexes, not on how
+many rows the demo data happens to have:
+
+    python -m pytest -q tests/test_query_plans.py
+"""
+import re
+
+import pytest
+
+from database.connection import get_connection
+from database import db
+from database.changes import changes_since
+from database.fleet_summary import count_units
+from database.reservations import find_conflict, find_free_units
+
+# (label, callable) — every helper here must be served by an index
+HOT_PATHS = [
+    ("get_available_types", lambda: db.get_available_types()),
+    ("get_available_equipment_ids", lambda: db.get_available_equipment_ids("Crane")),
+    ("get_available_equipment", lambda: db.get_available_equipment("Crane")),
+    ("fetch_vendors(filter_by)", lambda: db.fetch_vendors(filter_by="Rented")),
+    ("fetch_vendors(site_id)", lambda: db.fetch_vendors(site_id=1)),
+    ("fetch_vendors(filter_by, site_id)", lambda: db.fetch_vendors(filter_by="Available", site_id=2)),
+    ("fetch_share_ready", lambda: db.fetch_share_ready()),
+    ("fetch_share_ready(exclude_site_id)", lambda: db.fetch_share_ready(exclude_site_id=1)),
+    ("get_requests_for_owner", lambda: db.get_requests_for_owner(1)),
+    ("get_flexible_rentals", lambda: db.get_flexible_rentals()),
+    ("fetch_vendor_page", lambda: db.fetch_vendor_page("EQX1100")),
+    ("fetch_vendor_page(filter_by)", lambda: db.fetch_vendor_page("EQX1100", filter_by="Available")),
+    ("fetch_vendor_page(site_id)", lambda: db.fetch_vendor_page("EQX1100", site_id=1)),
+    ("fetch_vendor_page(rental_type)", lambda: db.fetch_vendor_page("EQX1100", rental_type="Flexible")),
+    ("fetch_vendor_page(share, exclude)", lambda: db.fetch_vendor_page(None, ready_to_share=True, exclude_site_id=1)),
+    ("fetch_request_page", lambda: db.fetch_request_page(100)),
+    ("fetch_request_page(owner, status)", lambda: db.fetch_request_page(100, owner_site_id=1, status="Pending")),
+    ("fetch_request_page(owner, archive)",
+     lambda: db.fetch_request_page(100, owner_site_id=1, status="Approved", include_archive=True)),
+    ("changes_since", lambda: changes_since(0)),
+    ("get_rentals(site_id, range)", lambda: db.get_rentals(site_id=1, start="2025-01-01", end="2025-02-01")),
+    ("get_rentals(site_id, range, archive)",
+     lambda: db.get_rentals(site_id=1, start="2025-01-01", end="2025-02-01", include_archive=True)),
+    ("get_equipment_rental_history", lambda: db.get_equipment_rental_history("EQX1151")),
+    ("get_equipment_rental_history(archive)", lambda: db.get_equipment_rental_history("EQX1151", include_archive=True)),
+    ("get_daily_rental_counts", lambda: db.get_daily_rental_counts(1, start="2025-01-01")),
+    ("find_conflict", lambda: find_conflict("EQX1151", "2025-03-01", "2025-03-10")),
+    ("client KPIs", lambda: (count_units(site_id=1), count_units(ready_to_share=True, exclude_site_id=1))),
+    # Must match the demo fleet, or the Vendor read after the MATCH never runs
+    ("search_equipment", lambda: db.search_equipment("crane eqx1")),
+    ("find_free_units", lambda: find_free_units("Crane", "2025-03-01", "2025-03-10", location="Chennai")),
+]
+
+# "SCAN Vendor" is a full table walk; "SCAN Vendor USING [COVERING] INDEX ..." is not
+_FULL_SCAN = re.compile(r"^SCAN [\w.]+$")
+
+# Aggregate tables hold one row per group, so walking them is the intended plan
+_GROUP_TABLES = {"SCAN FleetSummary"}
+
+
+def traced_selects(fn) -> list[str]:
+    """Run `fn` and return the SELECT statements it sent to SQLite."""
+    statements = []
+    with get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            fn()
+        finally:
+            conn.set_trace_callback(None)
+    # FTS5 reads its shadow tables ('main'.'X_config', ...) with its own statements; those aren't ours to index
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT") and "'main'." not in s]
+
+
+def explain(sql: str) -> list[str]:
+    with get_connection() as conn:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()]
+
+
+def full_scans(sql: str) -> list[str]:
+    return [step for step in explain(sql) if _FULL_SCAN.match(step) and step not in _GROUP_TABLES]
+
+
+def test_catalog_has_no_statistics(catalog):
+    with get_connection() as conn:
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None
+
+
+@pytest.mark.parametrize("label, fn", HOT_PATHS, ids=[label for label, _ in HOT_PATHS])
+def test_hot_path_uses_an_index(catalog, label, fn):
+    selects = traced_selects(fn)
+    assert selects, f"{label} issued no SELECT"
+    failures = {" ".join(sql.split()): scans for sql in selects if (scans := full_scans(sql))}
+    assert not failures, f"{label} walks a whole table: {failures}"
+
+
+def test_search_reaches_the_vendor_read(catalog):
+    selects = traced_selects(lambda: db.search_equipment("crane eqx1"))
+    assert any("VendorSearch MATCH" in sql for sql in selects)
+    assert any("VendorCurrent" in sql for sql in selects)
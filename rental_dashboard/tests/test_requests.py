@@ -0,0 +1,67 @@
+# tests/test_requests.py
+import pytest
+
+from database import db
+from database.changes import data_version
+from database.connection import get_connection
+
+UNIT = "EQX1151"
+
+
+@pytest.fixture
+def shared_unit(catalog):
+    """UNIT rented by site 1 and put on share."""
+    db.rent_equipment(UNIT, 1, 30, "Chennai", "2025-03-01", "Flexible")
+    db.set_ready_to_share(UNIT, 1, shared_by_site_id=1)
+    return UNIT
+
+
+def _request(time_from: str, time_to: str, site_id: int = 2) -> tuple[int, int]:
+    db.add_rental_request(UNIT, site_id, "Pune", time_from, time_to)
+    with get_connection() as conn:
+        return conn.execute("SELECT RequestID, Version FROM RentalRequests ORDER BY RequestID DESC LIMIT 1").fetchone()
+
+
+def _status(request_id: int) -> tuple[str, int]:
+    with get_connection() as conn:
+        return conn.execute("SELECT Status, Version FROM RentalRequests WHERE RequestID = ?", (request_id,)).fetchone()
+
+
+def test_approval_bumps_the_version_once(shared_unit):
+    request_id, version = _request("2025-03-05", "2025-03-08")
+    before = data_version("RentalRequests")
+    result = db.transition_request(request_id, "Approved", expected_version=version)
+    assert result.ok and result.status == "Approved"
+    assert _status(request_id) == ("Approved", version + 1)
+    # One UPDATE, one change-capture stamp
+    assert data_version("RentalRequests") == before + 1
+
+
+def test_already_decided_request_is_a_conflict(shared_unit):
+    request_id, version = _request("2025-03-05", "2025-03-08")
+    assert db.transition_request(request_id, "Rejected").ok
+    result = db.transition_request(request_id, "Approved", expected_version=version + 1)
+    assert (result.ok, result.status) == (False, "Rejected")
+    assert "already Rejected" in result.message
+
+
+def test_stale_version_is_a_conflict(shared_unit):
+    request_id, version = _request("2025-03-05", "2025-03-08")
+    with get_connection() as conn:   # someone else edits the request meanwhile
+        conn.execute("UPDATE RentalRequests SET Location = 'Mumbai', Version = Version + 1 WHERE RequestID = ?",
+                     (request_id,))
+    result = db.transition_request(request_id, "Approved", expected_version=version)
+    assert (result.ok, result.status) == (False, "Pending")
+    assert "changed since" in result.message
+    assert _status(request_id) == ("Pending", version + 1)
+
+
+def test_unit_no_longer_on_share_is_a_conflict(shared_unit):
+    first, _ = _request("2025-03-05", "2025-03-08")
+    second, version = _request("2025-03-10", "2025-03-12", site_id=3)
+    assert db.transition_request(first, "Approved").ok
+    result = db.transition_request(second, "Approved", expected_version=version)
+    assert (result.ok, result.status) == (False, "Pending")
+    assert "no longer on share" in result.message
+    # The status change was rolled back with the failed hand-off
+    assert _status(second) == ("Pending", version)
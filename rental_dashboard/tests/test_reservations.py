@@ -0,0 +1,54 @@
+# tests/test_reservations.py
+import pytest
+
+from database.connection import get_connection
+from database.db import rent_equipment, reserve_units
+from database.reservations import book
+from tests.test_query_plans import full_scans
+
+
+def _available(type_: str) -> list[str]:
+    with get_connection() as conn:
+        return [row[0] for row in conn.execute(
+            "SELECT EquipmentID FROM Vendor WHERE Type = ? AND Availability = 'Available' ORDER BY EquipmentID",
+            (type_,)
+        )]
+
+
+def test_reserve_units_skips_units_booked_in_the_window(catalog):
+    first, second, third = _available("Crane")[:3]
+    book(first, "2025-03-02", "2025-03-04", "Rental")
+    claimed = reserve_units("Crane", 2, 1, 5, "Chennai", "2025-03-01", "Flexible")
+    assert claimed == [second, third]
+    with get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM Reservations WHERE Kind = 'Rental'").fetchone()[0] == 3
+
+
+def test_reserve_units_claims_nothing_when_short(catalog):
+    free = _available("Crane")
+    with pytest.raises(ValueError):
+        reserve_units("Crane", len(free) + 1, 1, 5, "Chennai", "2025-03-01", "Flexible")
+    assert _available("Crane") == free
+
+
+def test_reserve_units_claim_uses_indexes(catalog):
+    statements = []
+    with get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            reserve_units("Crane", 2, 1, 5, "Chennai", "2025-03-01", "Flexible")
+        finally:
+            conn.set_trace_callback(None)
+    claim = next(sql for sql in statements if sql.lstrip().startswith("UPDATE Vendor"))
+    assert not full_scans(claim)
+
+
+def test_rent_equipment_refuses_a_unit_that_is_already_rented(catalog):
+    unit = _available("Crane")[0]
+    rent_equipment(unit, 1, 5, "Chennai", "2025-03-01", "Flexible")
+    # A later window is free on the calendar, but the unit itself is out
+    with pytest.raises(ValueError, match="not available"):
+        rent_equipment(unit, 2, 5, "Pune", "2025-06-01", "Rigid")
+    with get_connection() as conn:
+        assert conn.execute("SELECT SiteID, Location FROM Vendor WHERE EquipmentID = ?", (unit,)).fetchone() == (1, "Chennai")
+        assert conn.execute("SELECT COUNT(*) FROM Rentals WHERE EquipmentID = ?", (unit,)).fetchone()[0] == 1
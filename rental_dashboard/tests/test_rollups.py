@@ -0,0 +1,36 @@
+# tests/test_rollups.py
+from database import rollups
+from database.connection import get_connection
+from database.rollups import compact
+
+T = 1_700_000_000 - 1_700_000_000 % 60   # start of a minute
+
+
+def _insert(ts: float, engine: float):
+    with get_connection() as conn:
+        conn.execute("INSERT INTO EquipmentTelemetry (EquipmentID, Ts, EngineHours) VALUES ('EQX1100', ?, ?)",
+                     (ts, engine))
+
+
+def _minute(bucket: int):
+    with get_connection() as conn:
+        return conn.execute("SELECT Samples, EngineSum FROM TelemetryMinute WHERE Bucket = ?", (bucket,)).fetchone()
+
+
+def test_bucket_waits_for_the_grace_before_rolling(catalog):
+    _insert(T + 10, 1.0)
+    compact(now=T + 90, grace=120)          # the minute ended 30s ago: still open
+    assert _minute(T) is None
+    _insert(T + 20, 2.0)                    # flushed late, Ts inside the same minute
+    compact(now=T + 200, grace=120)
+    assert _minute(T) == (2, 3.0)
+
+
+def test_retention_keeps_raw_rows_inside_the_grace(catalog, monkeypatch):
+    monkeypatch.setattr(rollups, "TELEMETRY_RAW_RETENTION_DAYS", 0)
+    _insert(T + 10, 1.0)
+    _insert(T + 70, 1.0)
+    summary = compact(now=T + 180, grace=120)   # only the first minute is closed and rolled
+    assert summary["deleted"]["EquipmentTelemetry"] == 1
+    with get_connection() as conn:
+        assert conn.execute("SELECT Ts FROM EquipmentTelemetry").fetchall() == [(T + 70,)]
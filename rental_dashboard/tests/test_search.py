@@ -0,0 +1,39 @@
+# tests/test_search.py
+from database.connection import get_connection
+from database.db import search_equipment
+from database.search import match_query, search_ids
+
+
+def test_search_follows_vendor_and_site_writes(catalog):
+    with get_connection() as conn:
+        conn.execute("INSERT INTO Vendor (EquipmentID, Type, Location, SiteID) "
+                     "VALUES ('EQX9001', 'Telehandler', 'Zanzibar', 77)")
+    assert search_ids("EQX900") == ["EQX9001"]
+    assert search_ids("tele zanz") == ["EQX9001"]
+    assert search_equipment("zanzibar")["EquipmentID"].tolist() == ["EQX9001"]
+
+    with get_connection() as conn:
+        conn.execute("UPDATE Vendor SET Location = 'Mombasa' WHERE EquipmentID = 'EQX9001'")
+    assert search_ids("zanzibar") == []
+    assert search_ids("mombasa") == ["EQX9001"]
+
+    # The owning site's contact is indexed with each of its units
+    with get_connection() as conn:
+        conn.execute("INSERT INTO SiteInfo (SiteID, EquipmentID, Location, ContactDetails) "
+                     "VALUES (77, 'EQX9001', 'Mombasa', 'ops@kilifi.example')")
+    assert search_ids("kilifi") == ["EQX9001"]
+    with get_connection() as conn:
+        conn.execute("UPDATE SiteInfo SET ContactDetails = 'yard@malindi.example' WHERE SiteID = 77")
+    assert search_ids("kilifi") == [] and search_ids("malindi") == ["EQX9001"]
+
+    with get_connection() as conn:
+        conn.execute("DELETE FROM SiteInfo WHERE SiteID = 77")
+        conn.execute("DELETE FROM Vendor WHERE EquipmentID = 'EQX9001'")
+    assert search_ids("mombasa") == [] and search_ids("EQX9001") == []
+    assert search_equipment("mombasa").empty
+
+
+def test_user_input_is_never_fts_syntax(catalog):
+    assert match_query('crane" OR NEAR(') == '"crane"* "OR"* "NEAR"*'
+    assert match_query("  -*  ") is None
+    assert search_ids('") * :') == []
@@ -0,0 +1,57 @@
+# tests/test_shards.py
+import pytest
+
+from database import rollups, shards, telemetry
+from database.connection import get_connection, get_pool
+from database.rollups import compact
+from database.shards import (
+    INSERT_SHARD_SAMPLE_SQL, attached_shards, ensure_shard, shard_path, unattached_shards,
+)
+from database.telemetry import get_samples
+from utils.config import SHARD_ATTACH_LIMIT
+
+T = 1_700_000_000 - 1_700_000_000 % 60   # start of a minute
+SITES = range(1, 13)                     # more shards than SQLite can attach (10)
+
+
+@pytest.fixture
+def sharded(catalog, monkeypatch):
+    """The catalog with sharding switched on and the checkout hook installed."""
+    monkeypatch.setattr(shards, "SHARDING_ENABLED", True)
+    for module in (shards, telemetry, rollups):
+        monkeypatch.setattr(module, "RAW_SAMPLES", "EquipmentTelemetryAll")
+    # Shards created by earlier tests lived in another temp directory
+    monkeypatch.setattr(shards, "_ready", set())
+    shards.install()
+    yield catalog
+    for site_id in SITES:
+        get_pool(shard_path(site_id)).close()
+
+
+def _fill_shards():
+    for site_id in SITES:
+        with get_connection(ensure_shard(site_id), immediate=True) as conn:
+            conn.execute(INSERT_SHARD_SAMPLE_SQL, (T + site_id, 1.0, 0.5, 40.0, f"UNIT{site_id}"))
+
+
+def test_checkout_attaches_up_to_the_limit(sharded):
+    _fill_shards()
+    for _ in range(2):   # a pooled connection comes back already attached
+        with get_connection() as conn:
+            assert len(attached_shards(conn)) == SHARD_ATTACH_LIMIT
+            assert len(unattached_shards(conn)) == len(SITES) - SHARD_ATTACH_LIMIT
+
+
+def test_readers_cover_every_shard(sharded, monkeypatch):
+    _fill_shards()
+    for site_id in SITES:
+        assert get_samples(f"UNIT{site_id}")["Ts"].tolist() == [T + site_id]
+
+    summary = compact(now=T + 3600, grace=120)
+    assert summary["minute"] == len(SITES)
+    with get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*), SUM(EngineSum) FROM TelemetryMinute").fetchone() == (len(SITES), 12.0)
+
+    monkeypatch.setattr(rollups, "TELEMETRY_RAW_RETENTION_DAYS", 0)
+    summary = compact(now=T + 7200, grace=120)
+    assert summary["deleted"]["EquipmentTelemetry"] == len(SITES)
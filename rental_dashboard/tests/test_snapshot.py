@@ -0,0 +1,26 @@
+# tests/test_snapshot.py
+from database.connection import get_connection
+from database.snapshot import export_snapshot, load_snapshot
+from database.telemetry import record_sample
+
+
+def test_only_datasets_whose_tables_changed_are_exported_again(catalog):
+    with get_connection() as conn:
+        conn.execute("UPDATE Vendor SET Availability = 'Rented' WHERE EquipmentID = 'EQX1151'")
+    first = export_snapshot("snapshots")
+    assert export_snapshot("snapshots") == first          # nothing changed: no new snapshot
+
+    assert record_sample("EQX1151", engine_hours=2.0, fuel=55.0, ts=1_700_000_000)
+    second = export_snapshot("snapshots")
+    assert second["dir"] != first["dir"]
+    # Telemetry reaches VendorCurrent (and the rentals fallback), not the sites or day rollups
+    for name in ("sites", "telemetry_day"):
+        assert second["datasets"][name] == first["datasets"][name]
+    assert second["datasets"]["vendor"]["version"] > first["datasets"]["vendor"]["version"]
+
+    # Carried-over datasets still load from the new directory
+    sites = load_snapshot("sites", "snapshots")
+    assert sites.version == first["datasets"]["sites"]["version"]
+    assert len(sites.frame) == first["datasets"]["sites"]["rows"]
+    vendor = load_snapshot("vendor", "snapshots").frame
+    assert vendor.loc[vendor["EquipmentID"] == "EQX1151", "Fuel"].tolist() == [55.0]
@@ -1,4 +1,46 @@
 DB_PATH = "rental_dashboard.db"
+DB_POOL_SIZE = 8                # max open SQLite connections per database file
+DB_POOL_TIMEOUT = 30            # seconds to wait for a free pooled connection
+DB_BUSY_TIMEOUT_MS = 5000       # how long a writer waits on a locked database
+DB_CACHE_SIZE_KB = 32768        # page cache per connection (32 MiB)
+DB_WAL_SIZE_LIMIT_MB = 64       # WAL file is truncated back to this after a checkpoint resets it
+
+# Background maintenance (database/maintenance.py): seconds between runs of each task
+MAINTENANCE_INTERVALS = {"checkpoint": 60, "optimize": 3600, "analyze": 86400, "incremental_vacuum": 3600}
+MAINTENANCE_WINDOW = ("01:00", "05:00")  # local time for analyze / incremental_vacuum; None = any time
+MAINTENANCE_ANALYSIS_LIMIT = 1000       # rows sampled per index by ANALYZE (0 = exact, slow on big tables)
+MAINTENANCE_VACUUM_PAGES = 2000         # free pages released per incremental_vacuum step
+
+TELEMETRY_BATCH_SIZE = 500      # samples per group commit
+TELEMETRY_FLUSH_INTERVAL = 1.0  # seconds a partial batch may wait
+TELEMETRY_QUEUE_SIZE = 20000    # queued samples before submit() blocks
+TELEMETRY_WRITE_ATTEMPTS = 3    # tries per failed batch (backing off) before it goes to TelemetryDeadLetter
+TELEMETRY_COMPACT_INTERVAL = 60 # seconds between rollup passes
+TELEMETRY_LATE_GRACE = 120      # seconds a bucket stays open after it ends, for queued/late samples (>= flush interval)
+TELEMETRY_RAW_RETENTION_DAYS = 7
+TELEMETRY_MINUTE_RETENTION_DAYS = 30
+TELEMETRY_HOUR_RETENTION_DAYS = 365
+
+SHARDING_ENABLED = False        # per-site telemetry shard files next to the catalog DB (database/shards.py)
+SHARD_DIR = "shards"
+SHARD_ATTACH_LIMIT = 8          # shards ATTACHed per catalog connection (SQLite allows 10); the rest are opened one by one
+
+PAGE_SIZE = 50                  # rows per page in the fleet/request listings
+SEARCH_RESULTS = 20             # matches shown for a search box query
+
+BULK_CHUNK_ROWS = 5000          # rows per executemany / fetchmany in fleet imports and exports
+BULK_COMMIT_ROWS = 100000       # rows per import transaction (and per progress line)
+
+ARCHIVE_AFTER_DAYS = 90         # closed requests / completed rentals older than this move to the archive tables
+ARCHIVE_BATCH_SIZE = 500        # rows moved per archive transaction
+ARCHIVE_INTERVAL = 3600         # seconds between archive passes
+
+SNAPSHOT_DIR = "snapshots"      # columnar exports read by the analytics pages
+SNAPSHOT_INTERVAL = 300         # seconds between export checks (skipped if nothing changed)
+SNAPSHOT_KEEP = 2               # snapshot directories kept on disk
+ANALYTICS_ENGINE = "auto"       # "auto" = DuckDB when installed, "pandas" to force the fallback
+LIVE_FALLBACK_SECONDS = 60      # live pages rerun at least this often (writes from other processes)
+QUERY_CACHE_ENTRIES = 256       # results kept by the shared query cache (database/cache.py), LRU beyond that
 
 SMTP_HOST = "smtp.gmail.com"
 SMTP_PORT = 587 
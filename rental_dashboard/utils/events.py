@@ -0,0 +1,137 @@
+# utils/events.py
+"""
+In-process pub/sub for data changes.
+
+The write helpers in database/db.py publish a typed event once their
+transaction has committed. Each Streamlit session subscribes to the event
+types (and optionally the site) it renders, and waits on that subscription
+instead of sleeping and re-reading the database on a timer.
+
+All sessions of one Streamlit server share this process, so one bus reaches
+every open dashboard. Writes made by another process (a second server, the
+CLI) are not seen here; views keep a long fallback timeout for that.
+"""
+import threading
+import weakref
+from collections import deque
+from typing import NamedTuple
+
+
+# --- Events ---
+
+class ShareChanged(NamedTuple):
+    equipment_id: str
+    ready: bool
+    site_id: int | None            # owning site
+
+
+class RequestCreated(NamedTuple):
+    equipment_id: str
+    requester_site_id: int
+    owner_site_id: int
+
+
+class RequestStatusChanged(NamedTuple):
+    request_id: int
+    status: str
+    requester_site_id: int | None
+    owner_site_id: int | None
+
+
+class EquipmentRented(NamedTuple):
+    equipment_id: str
+    site_id: int | None
+    rental_type: str | None
+
+
+class UsageUpdated(NamedTuple):
+    equipment_ids: tuple[str, ...]  # one sample, or a whole telemetry batch
+
+
+def event_sites(event) -> set:
+    """Sites an event concerns (empty = relevant to everyone)."""
+    return {v for k, v in event._asdict().items() if k.endswith("site_id") and v is not None}
+
+
+# --- Bus ---
+
+class Subscription:
+    """
+    Events delivered to one subscriber. Holds at most `max_pending` events;
+    older ones are dropped, since a waiting view only needs to know it is stale.
+    """
+
+    def __init__(self, max_pending: int):
+        self.topics: list[tuple[tuple, int | None]] = []
+        self._pending: deque = deque(maxlen=max_pending)
+        self._cond = threading.Condition()
+
+    def also(self, *types, site_id: int | None = None) -> "Subscription":
+        """Also receive `types` (all events if none), optionally only those concerning `site_id`."""
+        self.topics.append((types, site_id))
+        return self
+
+    def matches(self, event) -> bool:
+        for types, site_id in self.topics:
+            if types and not isinstance(event, types):
+                continue
+            if site_id is None:
+                return True
+            sites = event_sites(event)
+            if not sites or site_id in sites:
+                return True
+        return False
+
+    def _deliver(self, event):
+        with self._cond:
+            self._pending.append(event)
+            self._cond.notify_all()
+
+    def wait(self, timeout: float | None = None) -> list:
+        """Block until at least one event is pending (or `timeout`), then return and clear them."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending, timeout)
+            events = list(self._pending)
+            self._pending.clear()
+            return events
+
+
+class EventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Weak: a subscription lives as long as the session state holding it
+        self._subscriptions: weakref.WeakSet = weakref.WeakSet()
+
+    def subscribe(self, *types, site_id: int | None = None, max_pending: int = 100) -> Subscription:
+        """Subscribe to `types` (all events if none), optionally only those concerning `site_id`."""
+        sub = Subscription(max_pending).also(*types, site_id=site_id)
+        with self._lock:
+            self._subscriptions.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscriptions.discard(sub)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscriptions)
+        for sub in subscribers:
+            if sub.matches(event):
+                sub._deliver(event)
+
+
+_bus = EventBus()
+
+
+def get_bus() -> EventBus:
+    """The process-wide bus shared by every session."""
+    return _bus
+
+
+def publish(event):
+    _bus.publish(event)
+
+
+def subscribe(*types, site_id: int | None = None, max_pending: int = 100) -> Subscription:
+    return _bus.subscribe(*types, site_id=site_id, max_pending=max_pending)